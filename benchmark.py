@@ -0,0 +1,347 @@
+# Bancada de desempenho do Sistema IVERN: cargas sintéticas reprodutíveis (semente fixa) que misturam inserções,
+# despachos, registro de ações, finalizações, relatórios e rotas sobre mapas sintéticos, medindo vazão e percentis
+# de latência por operação e o pico de memória. O resultado sai em JSON para comparar versões entre si.
+#
+#   python benchmark.py --perfil medio --saida resultado.json
+#   python benchmark.py --perfil medio --comparar referencia.json   # Código de saída 1 se houver regressão
+#   python benchmark.py --incidentes 200000 --nos 5000 --mistura inserir=50,atender=25,finalizar=25
+
+import argparse
+import datetime
+import gc
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+
+try:
+    import resource
+except ImportError:  # Fora do Unix o pico de RSS não é medido
+    resource = None
+
+from main import GrafoCompacto, SaidaNula, SistemaIVERN, distancia_haversine, np
+
+VERSAO_FORMATO = 1
+OPERACOES = ('inserir', 'atender', 'acoes', 'finalizar', 'relatorio', 'rota')
+MISTURA_PADRAO = {'inserir': 40, 'atender': 20, 'acoes': 15, 'finalizar': 20, 'relatorio': 1, 'rota': 4}
+
+# Escalas de 10³ a 10⁷ ocorrências pré-carregadas e de 10 a 10⁵ regiões no mapa
+PERFIS = {
+    'minimo':  {'incidentes': 1_000,      'nos': 10,      'equipes': 10,    'operacoes': 10_000},
+    'pequeno': {'incidentes': 10_000,     'nos': 100,     'equipes': 30,    'operacoes': 50_000},
+    'medio':   {'incidentes': 100_000,    'nos': 1_000,   'equipes': 100,   'operacoes': 200_000},
+    'grande':  {'incidentes': 1_000_000,  'nos': 10_000,  'equipes': 300,   'operacoes': 1_000_000},
+    'extremo': {'incidentes': 10_000_000, 'nos': 100_000, 'equipes': 1_000, 'operacoes': 2_000_000},
+}
+PERCENTIS = (50, 90, 99, 99.9)
+LIMITES_BRASIL = (-33.0, 5.0, -74.0, -35.0)  # Latitude e longitude mínimas/máximas das regiões sintéticas
+ESPECIALIZACOES = ("TERRESTRE", "AEREA", "RESGATE")
+DESCRICOES = ("Foco detectado por satélite", "Fumaça avistada por morador", "Queimada fora de controle", "Alerta de brigadista")
+
+# Mapa sintético: grade irregular (posições com ruído) preenchida linha a linha, com arestas para os vizinhos
+# à direita e abaixo (sempre conexo) e diagonais com probabilidade `diagonais`. O peso é a distância em km
+# multiplicada por um desvio de 1.0 a 1.5, imitando estradas que não seguem a linha reta.
+def gerar_grafo(nos, semente=0, diagonais=0.3, saida=None):
+    rng = random.Random(semente)
+    lado = max(1, math.ceil(math.sqrt(nos)))
+    lat_min, lat_max, lon_min, lon_max = LIMITES_BRASIL
+    nome = lambda i: f"R{i:06d}"
+    coordenadas = {}
+    for i in range(nos):
+        linha, coluna = divmod(i, lado)
+        coordenadas[nome(i)] = (round(lat_min + (lat_max - lat_min) * (linha + rng.random()) / lado, 4),
+                                round(lon_min + (lon_max - lon_min) * (coluna + rng.random()) / lado, 4))
+
+    texto = io.StringIO()
+    texto.write("origem,destino,peso\n")
+    for i in range(nos):
+        linha, coluna = divmod(i, lado)
+        vizinhos = [i + 1] if coluna + 1 < lado else []
+        vizinhos.append(i + lado)
+        if coluna + 1 < lado and rng.random() < diagonais:
+            vizinhos.append(i + lado + 1)
+        for j in vizinhos:
+            if j < nos:
+                peso = distancia_haversine(coordenadas[nome(i)], coordenadas[nome(j)]) * rng.uniform(1.0, 1.5)
+                texto.write(f"{nome(i)},{nome(j)},{max(peso, 0.1):.1f}\n")
+    texto.seek(0)
+    return GrafoCompacto.de_csv(texto, coordenadas, saida=saida or SaidaNula())
+
+# Conjunto com sorteio uniforme em O(1) (lista + posições, remoção trocando com o último)
+class ConjuntoSorteavel:
+    def __init__(self):
+        self.itens, self.posicoes = [], {}
+
+    def __len__(self): return len(self.itens)
+
+    def adicionar(self, item):
+        if item not in self.posicoes:
+            self.posicoes[item] = len(self.itens)
+            self.itens.append(item)
+
+    def remover(self, item):
+        if (posicao := self.posicoes.pop(item, None)) is None:
+            return
+        ultimo = self.itens.pop()
+        if posicao < len(self.itens):
+            self.itens[posicao], self.posicoes[ultimo] = ultimo, posicao
+
+    def sortear(self, rng): return self.itens[rng.randrange(len(self.itens))]
+
+# Executa uma carga sobre um SistemaIVERN silencioso. Só a chamada ao sistema é cronometrada: a escolha da
+# operação e dos argumentos (sorteios, alvos) fica fora da medição.
+class Carga:
+    def __init__(self, incidentes, nos, equipes, operacoes, mistura=None, semente=0, concentracao=1.0, metodo_rota='dijkstra'):
+        self.incidentes, self.nos, self.equipes, self.operacoes = incidentes, nos, equipes, operacoes
+        self.mistura = {op: peso for op, peso in (mistura or MISTURA_PADRAO).items() if peso > 0}
+        desconhecidas = set(self.mistura) - set(OPERACOES)
+        if desconhecidas or not self.mistura:
+            raise ValueError(f"Mistura inválida: {', '.join(sorted(desconhecidas)) or 'nenhuma operação com peso'}")
+        if nos == 1:
+            raise ValueError("O mapa sintético precisa de ao menos 2 regiões (ou 0 para o mapa padrão)")
+        self.semente, self.concentracao, self.metodo_rota = semente, concentracao, metodo_rota
+        self.rng = random.Random(semente)
+        self.latencias = {op: array('q') for op in self.mistura}
+        self.despachadas = ConjuntoSorteavel()  # Ocorrências em atendimento (alvos de ações e finalizações)
+        self.sistema = self.regioes = self.coordenadas = None
+        self.fases = {}
+
+    def parametros(self):
+        return {'incidentes': self.incidentes, 'nos': self.nos, 'equipes': self.equipes, 'operacoes': self.operacoes,
+                'mistura': self.mistura, 'semente': self.semente, 'concentracao': self.concentracao, 'metodo_rota': self.metodo_rota}
+
+    # Mapa, equipes e ocorrências iniciais (inseridas em lotes de 100 mil)
+    def preparar(self):
+        inicio = time.perf_counter()
+        self.sistema = SistemaIVERN(SaidaNula())
+        if self.nos:  # nos=0 mantém o mapa padrão de cinco regiões
+            self.sistema.grafo_regioes = gerar_grafo(self.nos, self.semente, saida=self.sistema.saida)
+        grafo = self.sistema.grafo_regioes
+        self.regioes = list(grafo.vertices)
+        self.coordenadas = [grafo.coordenadas.get(regiao) or (0.0, 0.0) for regiao in self.regioes]
+        for i in range(len(self.sistema.equipes), self.equipes):  # Bases espalhadas pelas regiões do mapa
+            self.sistema.adicionar_equipe(f"Equipe {i + 1}", ESPECIALIZACOES[i % len(ESPECIALIZACOES)], self.regioes[i % len(self.regioes)])
+        self.fases['mapa_s'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for base in range(0, self.incidentes, 100_000):
+            self.sistema.inserir_ocorrencias_em_lote([self._nova_chamada() for _ in range(min(100_000, self.incidentes - base))], silencioso=True)
+        self.fases['carga_inicial_s'] = time.perf_counter() - inicio
+
+    def executar(self):
+        relogio, latencias = time.perf_counter_ns, self.latencias
+        nomes, pesos = list(self.mistura), list(self.mistura.values())
+        inicio = time.perf_counter()
+        for base in range(0, self.operacoes, 100_000):
+            for op in self.rng.choices(nomes, pesos, k=min(100_000, self.operacoes - base)):
+                chamada, argumentos = getattr(self, '_' + op)()
+                if chamada is None:
+                    continue
+                t0 = relogio()
+                resultado = chamada(*argumentos)
+                latencias[op].append(relogio() - t0)
+                if op == 'atender' and resultado is not None:
+                    self.despachadas.adicionar(resultado)
+        self.fases['operacoes_s'] = time.perf_counter() - inicio
+
+    # Cada operação devolve a chamada a cronometrar e seus argumentos (None = nada a fazer no estado atual)
+    def _inserir(self):
+        return self.sistema.inserir_nova_ocorrencia, self._nova_chamada()
+
+    def _atender(self):
+        return self.sistema.atender_proxima_ocorrencia, ()
+
+    def _acoes(self):
+        if (alvo := self._alvo()) is None:
+            return None, ()
+        return self.sistema.registrar_acoes_realizadas, (alvo, ["Perímetro estabelecido", "Combate iniciado"])
+
+    def _finalizar(self):
+        if (alvo := self._alvo()) is None:
+            return None, ()
+        self.despachadas.remover(alvo)
+        return self.sistema.finalizar_ocorrencia, (alvo,)
+
+    def _relatorio(self):
+        return self.sistema.gerar_relatorio_regiao, ()
+
+    def _rota(self):
+        return self.sistema.calcular_rota_otima, (self._sortear_regiao(), self._sortear_regiao(), self.metodo_rota)
+
+    # Alvo preferencial: uma ocorrência em atendimento; sem nenhuma, uma ativa qualquer (ids sorteados até acertar)
+    def _alvo(self):
+        if self.despachadas:
+            return self.despachadas.sortear(self.rng)
+        ativas, limite = self.sistema.ocorrencias_ativas, self.sistema.proximo_id_ocorrencia
+        for _ in range(32):
+            if (candidato := self.rng.randrange(1, limite) if limite > 1 else None) in ativas:
+                return candidato
+        return next(iter(ativas), None)
+
+    # concentracao > 1 concentra as chamadas nas primeiras regiões (focos recorrentes); 1 = uniforme
+    def _sortear_indice(self):
+        return min(int(len(self.regioes) * self.rng.random() ** self.concentracao), len(self.regioes) - 1)
+
+    def _sortear_regiao(self): return self.regioes[self._sortear_indice()]
+
+    def _nova_chamada(self):
+        indice, rng = self._sortear_indice(), self.rng
+        latitude, longitude = self.coordenadas[indice]
+        return (self.regioes[indice], rng.randint(1, 10), (latitude + rng.uniform(-0.05, 0.05), longitude + rng.uniform(-0.05, 0.05)),
+                rng.choice(DESCRICOES))
+
+    def estatisticas(self):
+        resultado = {}
+        for op, amostras in self.latencias.items():
+            if not amostras:
+                resultado[op] = {'quantidade': 0}
+                continue
+            ordenadas, total_ns = sorted(amostras), sum(amostras)
+            resultado[op] = {'quantidade': len(ordenadas), 'vazao_por_s': len(ordenadas) / (total_ns / 1e9) if total_ns else None,
+                             'media_us': total_ns / len(ordenadas) / 1e3, 'max_us': ordenadas[-1] / 1e3,
+                             **{f"p{p:g}_us": percentil(ordenadas, p) / 1e3 for p in PERCENTIS}}
+        return resultado
+
+# Percentil pelo posto mais próximo sobre amostras já ordenadas
+def percentil(ordenadas, p):
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+def pico_rss_kb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == 'darwin' else pico  # macOS informa em bytes; Linux em KiB
+
+# Roda uma carga completa e devolve o relatório (dict serializável em JSON). Com memoria_python, o tracemalloc
+# mede o pico do heap do Python, mas deixa todas as operações várias vezes mais lentas: use numa rodada à parte.
+# Com metricas, a instrumentação interna do sistema fica ligada durante as operações (mede o seu custo e
+# inclui no relatório as latências internas, como dijkstra e _encontrar_melhor_equipe).
+def executar_bancada(perfil=None, memoria_python=False, metricas=False, **parametros):
+    configuracao = dict(PERFIS[perfil]) if perfil else {}
+    configuracao.update({chave: valor for chave, valor in parametros.items() if valor is not None})
+    carga = Carga(**configuracao)
+    if memoria_python:
+        tracemalloc.start()
+    try:
+        carga.preparar()
+        if metricas:
+            carga.sistema.ativar_metricas()
+        gc.collect()  # Lixo da preparação não deve ser cobrado das primeiras operações
+        carga.executar()
+        pico_python = tracemalloc.get_traced_memory()[1] if memoria_python else None
+    finally:
+        if memoria_python:
+            tracemalloc.stop()
+
+    sistema, operacoes = carga.sistema, carga.estatisticas()
+    total = sum(len(amostras) for amostras in carga.latencias.values())
+    return {
+        'versao_formato': VERSAO_FORMATO,
+        'perfil': perfil,
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'parametros': carga.parametros(),
+        'ambiente': {'python': platform.python_version(), 'implementacao': platform.python_implementation(),
+                     'plataforma': platform.platform(), 'processadores': os.cpu_count(), 'numpy': np is not None},
+        'fases': carga.fases,
+        'operacoes': operacoes,
+        'total': {'operacoes': total, 'vazao_por_s': total / carga.fases['operacoes_s'] if carga.fases['operacoes_s'] else None},
+        'memoria': {'pico_rss_kb': pico_rss_kb(), 'pico_python_bytes': pico_python, 'latencias_com_tracemalloc': memoria_python},
+        'estado_final': {'ativas': len(sistema.ocorrencias_ativas), 'na_fila': len(sistema.fila_prioridade),
+                         'equipes_livres': len(sistema.equipes_disponiveis), 'resolvidas': len(sistema.acervo)},
+        'metricas_internas': {chave: valor for chave, valor in sistema.metricas.instantaneo().items() if chave != 'serie'} if metricas else None,
+    }
+
+# Regressões em relação a um relatório de referência: vazão abaixo ou p50/pico de memória acima da tolerância.
+# A cauda (p99) oscila mais entre rodadas e recebe o triplo da folga.
+def comparar(atual, referencia, tolerancia=0.10):
+    avisos, regressoes = [], []
+    if atual['parametros'] != referencia['parametros']:
+        avisos.append("parâmetros diferentes da referência: a comparação é apenas indicativa")
+    for op, dados in atual['operacoes'].items():
+        base = referencia['operacoes'].get(op)
+        if not base or not base.get('quantidade') or not dados.get('quantidade'):
+            continue
+        if dados['vazao_por_s'] < base['vazao_por_s'] * (1 - tolerancia):
+            regressoes.append(f"{op}: vazão {dados['vazao_por_s']:.0f}/s (referência {base['vazao_por_s']:.0f}/s)")
+        if dados['p50_us'] > base['p50_us'] * (1 + tolerancia):
+            regressoes.append(f"{op}: p50 {dados['p50_us']:.1f} µs (referência {base['p50_us']:.1f} µs)")
+        if dados['p99_us'] > base['p99_us'] * (1 + 3 * tolerancia):
+            regressoes.append(f"{op}: p99 {dados['p99_us']:.1f} µs (referência {base['p99_us']:.1f} µs)")
+    pico, pico_base = atual['memoria']['pico_rss_kb'], referencia['memoria'].get('pico_rss_kb')
+    if pico and pico_base and pico > pico_base * (1 + tolerancia):
+        regressoes.append(f"memória: pico {pico} KiB (referência {pico_base} KiB)")
+    return regressoes, avisos
+
+def formatar_tabela(relatorio):
+    linhas = [f"{'operação':<10} {'qtd':>9} {'ops/s':>11} {'média µs':>10} {'p50 µs':>9} {'p90 µs':>9} {'p99 µs':>10} {'p99.9 µs':>10} {'máx µs':>11}"]
+    for op, dados in relatorio['operacoes'].items():
+        if not dados['quantidade']:
+            linhas.append(f"{op:<10} {0:>9}")
+            continue
+        linhas.append(f"{op:<10} {dados['quantidade']:>9} {dados['vazao_por_s']:>11.0f} {dados['media_us']:>10.1f} {dados['p50_us']:>9.1f} "
+                      f"{dados['p90_us']:>9.1f} {dados['p99_us']:>10.1f} {dados['p99.9_us']:>10.1f} {dados['max_us']:>11.1f}")
+    fases, memoria = relatorio['fases'], relatorio['memoria']
+    linhas.append(f"\nmapa {fases['mapa_s']:.2f}s • carga inicial {fases['carga_inicial_s']:.2f}s • operações {fases['operacoes_s']:.2f}s"
+                  f" ({relatorio['total']['vazao_por_s'] or 0:.0f} ops/s)")
+    linhas.append(f"pico RSS: {memoria['pico_rss_kb']} KiB" + (f" • pico heap Python: {memoria['pico_python_bytes'] / 2**20:.1f} MiB"
+                                                             if memoria['pico_python_bytes'] is not None else ""))
+    return "\n".join(linhas)
+
+def _ler_mistura(texto):
+    mistura = {}
+    for parte in texto.split(','):
+        op, _, peso = parte.partition('=')
+        mistura[op.strip()] = float(peso)
+    return mistura
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Bancada de desempenho do Sistema IVERN")
+    parser.add_argument('--perfil', choices=PERFIS, help="escala predefinida (padrão: pequeno; os demais parâmetros a sobrescrevem)")
+    parser.add_argument('--incidentes', type=int, help="ocorrências pré-carregadas antes das operações")
+    parser.add_argument('--nos', type=int, help="regiões do mapa sintético (0 = mapa padrão)")
+    parser.add_argument('--equipes', type=int, help="total de equipes")
+    parser.add_argument('--operacoes', type=int, help="operações da carga mista")
+    parser.add_argument('--mistura', type=_ler_mistura, help="pesos por operação, ex.: inserir=40,atender=20,finalizar=20")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--concentracao', type=float, help="> 1 concentra as chamadas em poucas regiões")
+    parser.add_argument('--metodo-rota', dest='metodo_rota', choices=('dijkstra', 'a_estrela', 'bidirecional'))
+    parser.add_argument('--memoria-python', action='store_true', help="mede o pico do heap com tracemalloc (latências infladas)")
+    parser.add_argument('--metricas', action='store_true', help="liga a instrumentação interna do sistema durante a carga")
+    parser.add_argument('--saida', help="arquivo JSON do relatório ('-' = saída padrão)")
+    parser.add_argument('--comparar', help="relatório JSON de referência; sai com código 1 se houver regressão")
+    parser.add_argument('--tolerancia', type=float, default=0.10, help="folga relativa na comparação (padrão 0.10)")
+    opcoes = parser.parse_args(argumentos)
+    opcoes.perfil = opcoes.perfil or 'pequeno'  # Parâmetros omitidos vêm sempre de um perfil
+
+    relatorio = executar_bancada(opcoes.perfil, opcoes.memoria_python, opcoes.metricas, incidentes=opcoes.incidentes, nos=opcoes.nos,
+                                 equipes=opcoes.equipes, operacoes=opcoes.operacoes, mistura=opcoes.mistura, semente=opcoes.semente,
+                                 concentracao=opcoes.concentracao, metodo_rota=opcoes.metodo_rota)
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if opcoes.saida == '-':
+        print(texto)
+    else:
+        print(formatar_tabela(relatorio), file=sys.stderr)
+        if opcoes.saida:
+            with open(opcoes.saida, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto + "\n")
+
+    if opcoes.comparar:
+        with open(opcoes.comparar, encoding='utf-8') as arquivo:
+            regressoes, avisos = comparar(relatorio, json.load(arquivo), opcoes.tolerancia)
+        for aviso in avisos:
+            print(f"⚠️ {aviso}", file=sys.stderr)
+        for regressao in regressoes:
+            print(f"❌ Regressão: {regressao}", file=sys.stderr)
+        if regressoes:
+            return 1
+        print("✅ Sem regressões em relação à referência", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
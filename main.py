@@ -1,202 +1,2224 @@
 import heapq
+import io
 import random
 import datetime
-from collections import deque
+import csv
+import gc
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import weakref
+import zlib
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
 from typing import Dict, List, Optional, Tuple
 
-# Classe base para nós utilizados em estruturas de dados
-class No:
-    def __init__(self, dados):
-        self.dados, self.proximo, self.esquerda, self.direita = dados, None, None, None
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele a atribuição ótima roda em Python puro
+    np = None
+
+# Registro tipado emitido pela saída estruturada
+Evento = namedtuple('Evento', ['tipo', 'dados', 'timestamp'])
+
+# Saídas plugáveis do sistema: a mensagem (template str.format ou callable) só é formatada
+# pelas saídas que realmente a consomem. A saída nula descarta tudo sem formatar.
+class SaidaNula:
+    ativa = False
+    def emitir(self, tipo, mensagem="", **dados): pass
+
+    @staticmethod
+    def formatar(mensagem, dados):
+        if callable(mensagem): return mensagem()
+        return mensagem.format(**dados) if dados else mensagem
+
+# Saída padrão do menu interativo: imprime cada mensagem no terminal
+class SaidaConsole(SaidaNula):
+    ativa = True
+    def emitir(self, tipo, mensagem="", **dados):
+        print(self.formatar(mensagem, dados))
+
+# Acumula o texto formatado em memória (opcionalmente limitado às últimas N linhas)
+class SaidaBuffer(SaidaNula):
+    ativa = True
+    def __init__(self, limite=None):
+        self.linhas = deque(maxlen=limite)
+
+    def emitir(self, tipo, mensagem="", **dados):
+        self.linhas.append(self.formatar(mensagem, dados))
+
+    def texto(self): return "\n".join(self.linhas)
+    def limpar(self): self.linhas.clear()
+
+# Emite registros tipados (Evento) sem formatar texto, para integração com outros sistemas
+class SaidaEventos(SaidaNula):
+    ativa = True
+    def __init__(self, limite=None, ao_emitir=None):
+        self.eventos, self.ao_emitir = deque(maxlen=limite), ao_emitir
+
+    def emitir(self, tipo, mensagem="", **dados):
+        evento = Evento(tipo, dados, time.time())
+        self.eventos.append(evento)
+        if self.ao_emitir: self.ao_emitir(evento)
+
+    def filtrar(self, tipo): return [e for e in self.eventos if e.tipo == tipo]
+
+# Histograma de latências no estilo HDR: faixas log-lineares (2**BITS subfaixas por potência de 2, erro
+# relativo de até 1/2**BITS) em contadores inteiros de tamanho fixo. Registrar é O(1) e não aloca.
+class HistogramaLatencia:
+    BITS = 5
+    SUBFAIXAS = 1 << BITS
 
-# Lista ligada para histórico de ações das equipes
-class ListaLigada:
     def __init__(self):
-        self.cabeca, self.tamanho = None, 0
+        self.contagens = array('q', bytes(8 * 64 * self.SUBFAIXAS))
+        self.total = self.soma = self.maximo = 0
+        self.minimo = None
+
+    def __len__(self): return self.total
+
+    # Valores abaixo de 2 * SUBFAIXAS são exatos; acima, guardam os BITS + 1 bits mais significativos
+    def registrar(self, valor):
+        valor = max(valor, 0)
+        deslocamento = valor.bit_length() - self.BITS - 1
+        self.contagens[valor if deslocamento <= 0 else (deslocamento << self.BITS) + (valor >> deslocamento)] += 1
+        self.total += 1
+        self.soma += valor
+        if valor > self.maximo: self.maximo = valor
+        if self.minimo is None or valor < self.minimo: self.minimo = valor
+
+    # Maior valor representado pela faixa i
+    def _limite_faixa(self, i):
+        if i < 2 * self.SUBFAIXAS: return i
+        deslocamento = i // self.SUBFAIXAS - 1
+        return ((i - deslocamento * self.SUBFAIXAS + 1) << deslocamento) - 1
+
+    # Percentis pedidos numa única passada pelos contadores (limite superior da faixa, nunca acima do máximo)
+    def percentis(self, percentis):
+        resultado = {p: None for p in percentis}
+        if not self.total:
+            return resultado
+        alvos = sorted((max(1, math.ceil(p / 100 * self.total)), p) for p in percentis)
+        acumulado, proximo = 0, 0
+        for i, contagem in enumerate(self.contagens):
+            if not contagem: continue
+            acumulado += contagem
+            while proximo < len(alvos) and acumulado >= alvos[proximo][0]:
+                resultado[alvos[proximo][1]] = min(self._limite_faixa(i), self.maximo)
+                proximo += 1
+            if proximo == len(alvos): break
+        return resultado
+
+# Métricas opcionais. A versão nula não mede nada; com ela, nenhum método é envolvido por cronômetros.
+class MetricasNulas:
+    ativa = False
+    def incrementar(self, nome, valor=1): pass
+    def registrar_tempo(self, nome, nanossegundos): pass
+    def observar(self, nome, leitura): pass
+    def instantaneo(self): return {}
+
+# Latências (histogramas em ns), contadores de eventos e medidores (funções lidas na exportação, com série
+# temporal amostrada no máximo uma vez por `intervalo_amostragem` segundos). Métodos são medidos envolvendo-os
+# na própria instância (o atributo sombreia o da classe); remover_instrumentacao devolve os originais.
+class Metricas(MetricasNulas):
+    ativa = True
+    PERCENTIS = (50, 90, 99, 99.9)
+
+    def __init__(self, intervalo_amostragem=1.0, tamanho_serie=3600):
+        self.histogramas, self.contadores, self.medidores = {}, {}, {}
+        self.serie, self.intervalo_amostragem = deque(maxlen=tamanho_serie), intervalo_amostragem
+        self.iniciado_em, self._proxima_amostra, self._instrumentados = time.time(), 0.0, []
+
+    def histograma(self, nome):
+        if (histograma := self.histogramas.get(nome)) is None:
+            histograma = self.histogramas[nome] = HistogramaLatencia()
+        return histograma
+
+    def incrementar(self, nome, valor=1): self.contadores[nome] = self.contadores.get(nome, 0) + valor
+    def registrar_tempo(self, nome, nanossegundos): self.histograma(nome).registrar(nanossegundos)
+    def observar(self, nome, leitura): self.medidores[nome] = leitura
+
+    # Registra na série os valores atuais dos medidores (barato de chamar a cada operação)
+    def amostrar(self):
+        if (agora := time.monotonic()) >= self._proxima_amostra:
+            self._proxima_amostra = agora + self.intervalo_amostragem
+            self.serie.append((time.time(), {nome: leitura() for nome, leitura in self.medidores.items()}))
+
+    def instrumentar(self, objeto, metodo, ao_concluir=None):
+        original, relogio, histograma = getattr(objeto, metodo), time.perf_counter_ns, self.histograma(metodo.lstrip('_'))
+        def medido(*args, **kwargs):
+            inicio = relogio()
+            try:
+                resultado = original(*args, **kwargs)
+            finally:
+                histograma.registrar(relogio() - inicio)
+            if ao_concluir: ao_concluir(resultado)
+            return resultado
+        setattr(objeto, metodo, medido)
+        self._instrumentados.append((objeto, metodo))
+
+    def remover_instrumentacao(self):
+        for objeto, metodo in self._instrumentados:
+            vars(objeto).pop(metodo, None)
+        self._instrumentados.clear()
+
+    def instantaneo(self):
+        latencias = {}
+        for nome, histograma in self.histogramas.items():
+            if not histograma.total: continue
+            percentis = histograma.percentis(self.PERCENTIS)
+            latencias[nome] = {'quantidade': histograma.total, 'media_ms': histograma.soma / histograma.total / 1e6,
+                               'min_ms': histograma.minimo / 1e6, 'max_ms': histograma.maximo / 1e6,
+                               **{f"p{p:g}_ms": valor / 1e6 for p, valor in percentis.items()}}
+        return {'desde': self.iniciado_em, 'latencias': latencias, 'contadores': dict(self.contadores),
+                'medidores': {nome: leitura() for nome, leitura in self.medidores.items()},
+                'serie': [{'instante': instante, **valores} for instante, valores in self.serie]}
+
+    # Formato de exposição em texto do Prometheus: latências como summary (quantis em segundos)
+    def prometheus(self, prefixo='ivern'):
+        nome_latencia = f"{prefixo}_operacao_duracao_segundos"
+        linhas = [f"# HELP {nome_latencia} Latência das operações instrumentadas", f"# TYPE {nome_latencia} summary"]
+        for nome, histograma in sorted(self.histogramas.items()):
+            if not histograma.total: continue
+            for p, valor in histograma.percentis(self.PERCENTIS).items():
+                linhas.append(f'{nome_latencia}{{operacao="{nome}",quantile="{p / 100:g}"}} {valor / 1e9:.9g}')
+            linhas.append(f'{nome_latencia}_sum{{operacao="{nome}"}} {histograma.soma / 1e9:.9g}')
+            linhas.append(f'{nome_latencia}_count{{operacao="{nome}"}} {histograma.total}')
+        for nome, valor in sorted(self.contadores.items()):
+            linhas += [f"# TYPE {prefixo}_{nome}_total counter", f"{prefixo}_{nome}_total {valor}"]
+        for nome, leitura in sorted(self.medidores.items()):
+            linhas += [f"# TYPE {prefixo}_{nome} gauge", f"{prefixo}_{nome} {leitura()}"]
+        return "\n".join(linhas) + "\n"
+
+    # Grava de forma atômica (arquivo temporário + os.replace), como espera o coletor de arquivos de texto
+    # do node_exporter. Formato pela extensão: .json gera o instantâneo; qualquer outra, o texto Prometheus.
+    def exportar(self, caminho, formato=None):
+        formato = formato or ('json' if caminho.lower().endswith('.json') else 'prometheus')
+        conteudo = json.dumps(self.instantaneo(), ensure_ascii=False) if formato == 'json' else self.prometheus()
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, caminho)
+        return caminho
+
+
+# Instantes persistidos como inteiros (microssegundos desde 1970, sem fuso): conversão exata nos dois sentidos
+EPOCA, MICROSSEGUNDO = datetime.datetime(1970, 1, 1), datetime.timedelta(microseconds=1)
+MINUTO = datetime.timedelta(minutes=1)
+HORAS_POR_UNIDADE = 0.5  # Tempo estimado de deslocamento por unidade de distância do mapa
+
+def para_microssegundos(instante): return (instante - EPOCA) // MICROSSEGUNDO
+def de_microssegundos(microssegundos): return EPOCA + datetime.timedelta(microseconds=microssegundos)
+
+# Relógios injetáveis: qualquer callable sem argumentos que devolva um datetime. As classes que carimbam
+# instantes recebem um (padrão: relógio do sistema); simulações e testes usam o RelogioVirtual.
+relogio_sistema = datetime.datetime.now
+
+# Relógio que só anda quando mandado: ajustar() salta para um instante (nunca para trás), avancar() soma um intervalo
+class RelogioVirtual:
+    __slots__ = ('instante',)
+    def __init__(self, inicio=None): self.instante = inicio or datetime.datetime(2025, 1, 1)
+    def __call__(self): return self.instante
+
+    def ajustar(self, instante):
+        if instante < self.instante:
+            raise ValueError(f"O relógio virtual não volta no tempo: {instante} < {self.instante}")
+        self.instante = instante
+
+    def avancar(self, intervalo): self.ajustar(self.instante + intervalo)
+
+# Histórico de ações de uma equipe: as mais recentes ficam num buffer circular compacto (instantes em
+# microssegundos num array e textos numa lista pré-alocada); as mais antigas são despejadas num segmento
+# em disco só de acréscimo. Cada registro do segmento termina com (instante, tamanho do texto), o que
+# permite ler o arquivo de trás para frente sem índice em memória. Leituras são geradores do mais novo
+# para o mais antigo e pressupõem registros em ordem cronológica. O segmento só fica aberto durante um
+# despejo ou uma leitura: milhares de equipes não consomem um descritor de arquivo cada.
+class HistoricoAcoes:
+    CAPACIDADE_PADRAO = 1000
+    RODAPE = struct.Struct('<qI')  # instante (µs desde 1970), tamanho do texto em bytes
     
+    def __init__(self, id_equipe, capacidade=CAPACIDADE_PADRAO, diretorio=None, relogio=None):
+        if capacidade < 1:
+            raise ValueError("A capacidade do histórico deve ser positiva")
+        self.id_equipe, self.capacidade, self.diretorio = id_equipe, capacidade, diretorio
+        self.relogio = relogio or relogio_sistema  # Instante das ações registradas sem timestamp
+        self.instantes, self.acoes = array('q', bytes(8 * capacidade)), [None] * capacidade
+        self.inicio = self.em_memoria = 0  # inicio = posição do registro mais antigo no buffer
+        self.segmento, self.em_disco, self.bytes_em_disco = None, 0, 0  # segmento: caminho, criado no 1º despejo
+        if diretorio and os.path.exists(self.caminho_segmento()):
+            self._abrir_segmento()
+    
+    def __len__(self): return self.em_memoria + self.em_disco
+    def __iter__(self): return self.recentes()
+    
+    def caminho_segmento(self):
+        return os.path.join(self.diretorio, f"equipe_{self.id_equipe}.hist") if self.diretorio else None
+    
+    def registrar(self, acao, timestamp=None):
+        instante = para_microssegundos(timestamp or self.relogio())
+        if self.em_memoria == self.capacidade:
+            self._despejar_antigos(max(1, self.capacidade // 4))  # Despejo em bloco: uma escrita por lote
+        posicao = (self.inicio + self.em_memoria) % self.capacidade
+        self.instantes[posicao], self.acoes[posicao] = instante, acao
+        self.em_memoria += 1
+    
+    # Compatibilidade com a antiga lista ligada: inserção de um registro completo
     def inserir_inicio(self, dados):
-        novo_no = No(dados)
-        novo_no.proximo, self.cabeca, self.tamanho = self.cabeca, novo_no, self.tamanho + 1
+        self.registrar(dados['acao'], dados.get('timestamp'))
+    
+    # Registros do mais recente para o mais antigo, lidos sob demanda (memória e depois disco)
+    def recentes(self):
+        for instante, acao in self._brutos():
+            yield self._registro(instante, acao)
+    
+    def pagina(self, numero, tamanho=20):
+        return list(islice(self.recentes(), (numero - 1) * tamanho, numero * tamanho))
+    
+    # Registros com inicio <= timestamp <= fim (datetimes; None = sem limite), do mais recente ao mais antigo
+    def no_periodo(self, inicio=None, fim=None):
+        minimo = None if inicio is None else para_microssegundos(inicio)
+        maximo = None if fim is None else para_microssegundos(fim)
+        for instante, acao in self._brutos():
+            if maximo is not None and instante > maximo:
+                continue
+            if minimo is not None and instante < minimo:
+                return
+            yield self._registro(instante, acao)
     
     def listar(self):
-        elementos, atual = [], self.cabeca
-        while atual:
-            elementos.append(atual.dados)
-            atual = atual.proximo
-        return elementos
+        return list(self.recentes())
+    
+    # Registros ainda no buffer, do mais antigo ao mais recente, como (instante em µs, ação)
+    def registros_em_memoria(self):
+        return [(self.instantes[(self.inicio + i) % self.capacidade], self.acoes[(self.inicio + i) % self.capacidade])
+                for i in range(self.em_memoria)]
+    
+    # Com diretório, o buffer é despejado no segmento para que o histórico sobreviva à reabertura
+    def fechar(self):
+        if self.diretorio and self.em_memoria:
+            self._despejar_antigos(self.em_memoria)
+    
+    # Mantém apenas os primeiros `tamanho` bytes do segmento (usado na recuperação, antes de refazer o diário)
+    def truncar(self, tamanho):
+        if not self.segmento or tamanho >= self.bytes_em_disco:
+            return
+        os.truncate(self.segmento, tamanho)
+        self.bytes_em_disco, self.em_disco = tamanho, sum(1 for _ in self._brutos_disco(tamanho))
+    
+    def _registro(self, instante, acao):
+        return {'timestamp': de_microssegundos(instante), 'acao': acao, 'equipe_id': self.id_equipe}
+    
+    def _brutos(self):
+        for deslocamento in range(self.em_memoria - 1, -1, -1):
+            posicao = (self.inicio + deslocamento) % self.capacidade
+            yield self.instantes[posicao], self.acoes[posicao]
+        yield from self._brutos_disco(self.bytes_em_disco)
+    
+    def _brutos_disco(self, fim):
+        if not self.segmento or fim <= 0:
+            return
+        with open(self.segmento, 'rb') as arquivo:
+            while fim > 0:
+                arquivo.seek(fim - self.RODAPE.size)
+                instante, tamanho = self.RODAPE.unpack(arquivo.read(self.RODAPE.size))
+                fim -= self.RODAPE.size + tamanho
+                arquivo.seek(fim)
+                yield instante, arquivo.read(tamanho).decode('utf-8')
+    
+    # Move os `quantidade` registros mais antigos do buffer para o fim do segmento
+    def _despejar_antigos(self, quantidade):
+        if not self.segmento:
+            self._abrir_segmento()
+        bloco = bytearray()
+        for deslocamento in range(quantidade):
+            posicao = (self.inicio + deslocamento) % self.capacidade
+            texto = self.acoes[posicao].encode('utf-8')
+            bloco += texto
+            bloco += self.RODAPE.pack(self.instantes[posicao], len(texto))
+            self.acoes[posicao] = None
+        with open(self.segmento, 'ab') as arquivo:
+            arquivo.write(bloco)
+        self.inicio = (self.inicio + quantidade) % self.capacidade
+        self.em_memoria -= quantidade
+        self.em_disco += quantidade
+        self.bytes_em_disco += len(bloco)
+    
+    # Sem diretório, o segmento é um arquivo temporário, apagado quando o histórico deixa de existir
+    def _abrir_segmento(self):
+        if not self.diretorio:
+            descritor, self.segmento = tempfile.mkstemp(prefix=f"equipe_{self.id_equipe}_", suffix='.hist')
+            os.close(descritor)
+            weakref.finalize(self, _remover_arquivo, self.segmento)
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        self.segmento = self.caminho_segmento()
+        self.bytes_em_disco = os.path.getsize(self.segmento) if os.path.exists(self.segmento) else 0
+        self.em_disco = sum(1 for _ in self._brutos_disco(self.bytes_em_disco))
 
-# Árvore binária para organizar regiões por prioridade de risco
+def _remover_arquivo(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+# Nó da árvore AVL: guarda a altura da subárvore para o balanceamento
+class NoAVL:
+    def __init__(self, dados):
+        self.dados, self.esquerda, self.direita, self.altura = dados, None, None, 1
+
+# Árvore AVL de regiões ordenada por (prioridade, região): regiões com a mesma prioridade convivem,
+# todas as operações são iterativas (sem limite de recursão) e o índice região→nó permite atualizar
+# a prioridade de uma região em O(log n). Iteradores são preguiçosos: não altere a árvore durante o percurso.
 class ArvoreRegiao:
     def __init__(self):
-        self.raiz = None
+        self.raiz, self.indice = None, {}
+    
+    def __len__(self): return len(self.indice)
+    def __contains__(self, regiao): return regiao in self.indice
+    def __iter__(self): return self.iterar()
     
+    # Inserir uma região já existente apenas atualiza sua prioridade
     def inserir(self, regiao, prioridade):
-        if not self.raiz:
-            self.raiz = No({'regiao': regiao, 'prioridade': prioridade})
-        else:
-            self._inserir_recursivo(self.raiz, regiao, prioridade)
+        if regiao in self.indice:
+            return self.atualizar_prioridade(regiao, prioridade)
+        no = NoAVL({'regiao': regiao, 'prioridade': prioridade})
+        self.indice[regiao] = no
+        self._inserir_no(no)
+        return True
+    
+    def atualizar_prioridade(self, regiao, nova_prioridade):
+        if regiao not in self.indice:
+            return False
+        if self.indice[regiao].dados['prioridade'] != nova_prioridade:
+            self.remover(regiao)
+            self.inserir(regiao, nova_prioridade)
+        return True
     
-    def _inserir_recursivo(self, no, regiao, prioridade):
-        lado = 'esquerda' if prioridade < no.dados['prioridade'] else 'direita'
-        if getattr(no, lado) is None:
-            setattr(no, lado, No({'regiao': regiao, 'prioridade': prioridade}))
+    def prioridade(self, regiao):
+        no = self.indice.get(regiao)
+        return no.dados['prioridade'] if no else None
+    
+    def remover(self, regiao):
+        if regiao not in self.indice:
+            return False
+        caminho = self._caminho_ate(self.indice.pop(regiao))
+        no = caminho[-1]
+        if no.esquerda and no.direita:
+            # Dois filhos: o sucessor em ordem ocupa o lugar do nó e é removido da subárvore direita
+            sucessor = no.direita
+            caminho.append(sucessor)
+            while sucessor.esquerda:
+                sucessor = sucessor.esquerda
+                caminho.append(sucessor)
+            no.dados = sucessor.dados
+            self.indice[no.dados['regiao']] = no
+            no = sucessor
+        
+        filho = no.esquerda or no.direita
+        caminho.pop()
+        if not caminho:
+            self.raiz = filho
+        elif caminho[-1].esquerda is no:
+            caminho[-1].esquerda = filho
         else:
-            self._inserir_recursivo(getattr(no, lado), regiao, prioridade)
+            caminho[-1].direita = filho
+        self._rebalancear(caminho)
+        return True
     
-    # Busca binária para encontrar região por prioridade
+    # Busca binária para encontrar região por prioridade (entre empatadas, a de menor nome)
     def busca_binaria_regiao(self, prioridade_alvo):
-        return self._buscar_recursivo(self.raiz, prioridade_alvo)
+        no, encontrado = self.raiz, None
+        while no:
+            if no.dados['prioridade'] >= prioridade_alvo:
+                if no.dados['prioridade'] == prioridade_alvo:
+                    encontrado = no.dados
+                no = no.esquerda
+            else:
+                no = no.direita
+        return encontrado
+    
+    # Percurso em ordem preguiçoso restrito às prioridades em [minimo, maximo], podando subárvores fora da faixa
+    def intervalo(self, minimo=None, maximo=None):
+        pilha, no = [], self.raiz
+        while pilha or no:
+            while no:
+                if minimo is not None and no.dados['prioridade'] < minimo:
+                    no = no.direita
+                else:
+                    pilha.append(no)
+                    no = no.esquerda
+            if not pilha:  # Descida podada até o fim: nada mais na faixa
+                return
+            no = pilha.pop()
+            if maximo is not None and no.dados['prioridade'] > maximo:
+                return
+            yield no.dados
+            no = no.direita
     
-    def _buscar_recursivo(self, no, prioridade_alvo):
-        if not no: return None
-        if no.dados['prioridade'] == prioridade_alvo: return no.dados
-        return self._buscar_recursivo(no.esquerda if prioridade_alvo < no.dados['prioridade'] else no.direita, prioridade_alvo)
+    def iterar(self, decrescente=False):
+        if not decrescente:
+            yield from self.intervalo()
+            return
+        pilha, no = [], self.raiz
+        while pilha or no:
+            while no:
+                pilha.append(no)
+                no = no.direita
+            no = pilha.pop()
+            yield no.dados
+            no = no.esquerda
     
     def listar_em_ordem(self):
+        return list(self.intervalo())
+    
+    @staticmethod
+    def _chave(no): return (no.dados['prioridade'], no.dados['regiao'])
+    
+    @staticmethod
+    def _altura(no): return no.altura if no else 0
+    
+    def _caminho_ate(self, alvo):
+        chave, caminho, no = self._chave(alvo), [], self.raiz
+        while no is not alvo:
+            caminho.append(no)
+            no = no.esquerda if chave < self._chave(no) else no.direita
+        caminho.append(alvo)
+        return caminho
+    
+    def _inserir_no(self, novo):
+        chave, caminho, no = self._chave(novo), [], self.raiz
+        while no:
+            caminho.append(no)
+            no = no.esquerda if chave < self._chave(no) else no.direita
+        if not caminho:
+            self.raiz = novo
+        elif chave < self._chave(caminho[-1]):
+            caminho[-1].esquerda = novo
+        else:
+            caminho[-1].direita = novo
+        self._rebalancear(caminho)
+    
+    # Sobe pelo caminho recalculando alturas e rotacionando onde o fator de balanceamento passa de 1
+    def _rebalancear(self, caminho):
+        for i in range(len(caminho) - 1, -1, -1):
+            no = caminho[i]
+            novo = self._balancear(no)
+            if novo is not no:
+                if i == 0:
+                    self.raiz = novo
+                elif caminho[i - 1].esquerda is no:
+                    caminho[i - 1].esquerda = novo
+                else:
+                    caminho[i - 1].direita = novo
+    
+    def _balancear(self, no):
+        self._atualizar_altura(no)
+        fator = self._altura(no.esquerda) - self._altura(no.direita)
+        if fator > 1:
+            if self._altura(no.esquerda.esquerda) < self._altura(no.esquerda.direita):
+                no.esquerda = self._rotacionar_esquerda(no.esquerda)
+            return self._rotacionar_direita(no)
+        if fator < -1:
+            if self._altura(no.direita.direita) < self._altura(no.direita.esquerda):
+                no.direita = self._rotacionar_direita(no.direita)
+            return self._rotacionar_esquerda(no)
+        return no
+    
+    def _atualizar_altura(self, no):
+        no.altura = 1 + max(self._altura(no.esquerda), self._altura(no.direita))
+    
+    def _rotacionar_direita(self, no):
+        pivo = no.esquerda
+        no.esquerda, pivo.direita = pivo.direita, no
+        self._atualizar_altura(no)
+        self._atualizar_altura(pivo)
+        return pivo
+    
+    def _rotacionar_esquerda(self, no):
+        pivo = no.direita
+        no.direita, pivo.esquerda = pivo.esquerda, no
+        self._atualizar_altura(no)
+        self._atualizar_altura(pivo)
+        return pivo
+
+# Heap indexado: mantém a posição de cada item (por id) para remoção e reordenação em O(log n)
+class HeapIndexado:
+    def __init__(self, chave):
+        self.chave, self.itens, self.chaves, self.posicoes = chave, [], [], {}
+        self.adiado = False
+
+    def __len__(self): return len(self.itens)
+    def __contains__(self, id_item): return id_item in self.posicoes
+    def __iter__(self): return iter(list(self.itens))
+
+    def inserir(self, item):
+        if item.id in self.posicoes:
+            return self.atualizar(item.id)
+        self.itens.append(item)
+        self.chaves.append(self.chave(item))
+        self.posicoes[item.id] = len(self.itens) - 1
+        if not self.adiado:
+            self._subir(len(self.itens) - 1)
+
+    # Inserção em lote: para lotes grandes reconstrói o heap inteiro com heapify em O(n + k)
+    def inserir_lote(self, itens):
+        novos = [item for item in itens if item.id not in self.posicoes]
+        if len(novos) < len(self.itens) // 4 and not self.adiado:
+            for item in novos: self.inserir(item)
+            return
+        for item in novos:
+            self.posicoes[item.id] = len(self.itens)
+            self.itens.append(item)
+            self.chaves.append(self.chave(item))
+        if not self.adiado:
+            self.reordenar()
+
+    # Modo adiado (usado ao refazer o diário, cujas operações já trazem as decisões tomadas): inserções,
+    # remoções e atualizações só mantêm itens, chaves e posições; espiar/extrair não valem até reordenar(),
+    # que restaura a propriedade do heap com um único heapify em O(n)
+    def adiar(self): self.adiado = True
+
+    def reordenar(self):
+        self.adiado = False
+        for pos in range(len(self.itens) // 2 - 1, -1, -1):
+            self._descer(pos)
+
+    def espiar(self):
+        return self.itens[0] if self.itens else None
+
+    def extrair(self):
+        return self._remover_posicao(0) if self.itens else None
+
+    def remover(self, id_item):
+        if id_item not in self.posicoes: return None
+        return self._remover_posicao(self.posicoes[id_item])
+
+    # Recalcula a chave do item (aumento ou diminuição de prioridade) e restaura a propriedade do heap
+    def atualizar(self, id_item):
+        if id_item not in self.posicoes: return False
+        pos = self.posicoes[id_item]
+        self.chaves[pos] = self.chave(self.itens[pos])
+        if not self.adiado:
+            self._descer(self._subir(pos))
+        return True
+
+    def _remover_posicao(self, pos):
+        item, ultimo = self.itens[pos], len(self.itens) - 1
+        if pos != ultimo:
+            self._trocar(pos, ultimo)
+        self.itens.pop(), self.chaves.pop()
+        del self.posicoes[item.id]
+        if pos < len(self.itens) and not self.adiado:
+            self._descer(self._subir(pos))
+        return item
+
+    def _trocar(self, i, j):
+        self.itens[i], self.itens[j] = self.itens[j], self.itens[i]
+        self.chaves[i], self.chaves[j] = self.chaves[j], self.chaves[i]
+        self.posicoes[self.itens[i].id], self.posicoes[self.itens[j].id] = i, j
+
+    def _subir(self, pos):
+        while pos > 0:
+            pai = (pos - 1) // 2
+            if not self.chaves[pos] < self.chaves[pai]: break
+            self._trocar(pos, pai)
+            pos = pai
+        return pos
+
+    def _descer(self, pos):
+        tamanho = len(self.itens)
+        while True:
+            menor, esq = pos, 2 * pos + 1
+            for filho in (esq, esq + 1):
+                if filho < tamanho and self.chaves[filho] < self.chaves[menor]:
+                    menor = filho
+            if menor == pos: return pos
+            self._trocar(pos, menor)
+            pos = menor
+
+RAIO_TERRA_KM = 6371.0088
+
+# Distância de grande círculo (fórmula de haversine) entre dois pares (lat, lon), em km
+def distancia_haversine(coord1, coord2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (coord1[0], coord1[1], coord2[0], coord2[1]))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+# Índice espacial em grade (células de tamanho fixo em graus) mantido incrementalmente.
+# Consultas visitam apenas as células próximas ao ponto, sem varrer todas as ocorrências.
+class IndiceEspacial:
+    KM_POR_GRAU = math.pi * RAIO_TERRA_KM / 180
+
+    def __init__(self, tamanho_celula=0.1):
+        self.tamanho_celula, self.celulas, self.pontos = tamanho_celula, {}, {}
+        self.limites = None  # (lat_min, lat_max, lon_min, lon_max) em índices de célula
+
+    def __len__(self): return len(self.pontos)
+    def __contains__(self, id_item): return id_item in self.pontos
+
+    def _celula(self, coordenadas):
+        return (math.floor(coordenadas[0] / self.tamanho_celula), math.floor(coordenadas[1] / self.tamanho_celula))
+
+    def inserir(self, id_item, coordenadas):
+        if id_item in self.pontos: self.remover(id_item)
+        celula = self._celula(coordenadas)
+        self.celulas.setdefault(celula, {})[id_item] = coordenadas
+        self.pontos[id_item] = celula
+        i, j = celula
+        if self.limites is None:
+            self.limites = (i, i, j, j)
+        else:
+            lat_min, lat_max, lon_min, lon_max = self.limites
+            self.limites = (min(lat_min, i), max(lat_max, i), min(lon_min, j), max(lon_max, j))
+
+    def remover(self, id_item):
+        celula = self.pontos.pop(id_item, None)
+        if celula is None: return False
+        pontos_celula = self.celulas[celula]
+        del pontos_celula[id_item]
+        if not pontos_celula: del self.celulas[celula]
+        return True
+
+    def _pontos_no_retangulo(self, i_min, i_max, j_min, j_max):
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > len(self.celulas):
+            for (i, j), pontos in self.celulas.items():
+                if i_min <= i <= i_max and j_min <= j <= j_max: yield from pontos.items()
+            return
+        for i in range(i_min, i_max + 1):
+            for j in range(j_min, j_max + 1):
+                if (pontos := self.celulas.get((i, j))): yield from pontos.items()
+
+    # Todos os pontos a até raio_km do centro, ordenados por distância: [(distancia_km, id), ...]
+    def no_raio(self, centro, raio_km):
+        if not self.pontos: return []
+        delta_lat = raio_km / self.KM_POR_GRAU
+        cos_lat = max(math.cos(math.radians(min(89.0, abs(centro[0]) + delta_lat))), 1e-6)
+        delta_lon = min(180.0, raio_km / (self.KM_POR_GRAU * cos_lat))
+        i_min, j_min = self._celula((centro[0] - delta_lat, centro[1] - delta_lon))
+        i_max, j_max = self._celula((centro[0] + delta_lat, centro[1] + delta_lon))
         resultado = []
-        self._em_ordem_recursivo(self.raiz, resultado)
+        for id_item, coordenadas in self._pontos_no_retangulo(i_min, i_max, j_min, j_max):
+            if (dist := distancia_haversine(centro, coordenadas)) <= raio_km:
+                resultado.append((dist, id_item))
+        resultado.sort()
         return resultado
-    
-    def _em_ordem_recursivo(self, no, resultado):
-        if no:
-            self._em_ordem_recursivo(no.esquerda, resultado)
-            resultado.append(no.dados)
-            self._em_ordem_recursivo(no.direita, resultado)
 
-# Grafo para representar conexões entre regiões e calcular rotas
-class GrafoRegioes:
-    def __init__(self):
-        self.vertices, self.coordenadas = {}, {}
-    
-    def adicionar_vertice(self, regiao, coordenadas=None):
-        if regiao not in self.vertices:
-            self.vertices[regiao] = {}
-            if coordenadas: self.coordenadas[regiao] = coordenadas
+    # k vizinhos mais próximos por busca em anéis de células crescentes ao redor do centro
+    def mais_proximos(self, centro, k=1):
+        if not self.pontos or k <= 0: return []
+        ci, cj = self._celula(centro)
+        lat_min, lat_max, lon_min, lon_max = self.limites
+        anel_maximo = max(ci - lat_min, lat_max - ci, cj - lon_min, lon_max - cj, 0)
+        km_por_celula = self.tamanho_celula * self.KM_POR_GRAU
+        candidatos = []
+        for anel in range(anel_maximo + 1):
+            for i in range(ci - anel, ci + anel + 1):
+                passo = 1 if i in (ci - anel, ci + anel) else 2 * anel or 1
+                for j in range(cj - anel, cj + anel + 1, passo):
+                    for id_item, coordenadas in self.celulas.get((i, j), {}).items():
+                        candidatos.append((distancia_haversine(centro, coordenadas), id_item))
+            # Pontos fora do anel atual estão a pelo menos 'anel' células completas de distância
+            alcance_garantido = anel * km_por_celula * max(math.cos(math.radians(min(89.0, abs(centro[0]) + (anel + 1) * self.tamanho_celula))), 0)
+            if len(candidatos) >= k and heapq.nsmallest(k, candidatos)[-1][0] <= alcance_garantido:
+                break
+        return heapq.nsmallest(k, candidatos)
+
+    # Agrupa pontos a até raio_km uns dos outros (componentes conexas via union-find)
+    def agrupar(self, raio_km):
+        pai = {}
+        def raiz(x):
+            while pai.get(x, x) != x:
+                pai[x] = pai.get(pai[x], pai[x])
+                x = pai[x]
+            return x
+        for id_item, celula in self.pontos.items():
+            for _, vizinho in self.no_raio(self.celulas[celula][id_item], raio_km):
+                if (a := raiz(id_item)) != (b := raiz(vizinho)):
+                    pai[max(a, b)] = min(a, b)
+        grupos = {}
+        for id_item in self.pontos:
+            grupos.setdefault(raiz(id_item), []).append(id_item)
+        return [sorted(g) for g in grupos.values() if len(g) > 1]
+
+# Algoritmos de caminho mínimo compartilhados pelos grafos (dicionário ou compacto). As subclasses
+# fornecem os ganchos _chave/_nome (nome da região ↔ chave interna), _vizinhos, _coordenada e _chaves.
+class BuscaCaminhos:
+    def _iniciar_cache(self, capacidade_cache):
+        # Cache LRU de árvores de caminhos mínimos por origem e matriz opcional de todos os pares
+        self.cache_arvores, self.capacidade_cache, self.todos_pares = OrderedDict(), capacidade_cache, {}
+        self.cache_linhas = OrderedDict()  # Distâncias de uma origem só até conjuntos de alvos (matriz_entre)
+        self._fator_heuristica = None
     
-    # Adiciona conexão bidirecional entre duas regiões
-    def adicionar_aresta(self, regiao1, regiao2, peso):
-        self.adicionar_vertice(regiao1), self.adicionar_vertice(regiao2)
-        self.vertices[regiao1][regiao2] = self.vertices[regiao2][regiao1] = peso
+    def __contains__(self, regiao): return self._chave(regiao) is not None
+    def __len__(self): return len(self.vertices)
     
-    # Algoritmo de Dijkstra para encontrar menor caminho entre regiões
+    # Algoritmo de Dijkstra para encontrar menor caminho entre regiões (reaproveita árvores em cache)
     def dijkstra(self, origem, destino):
-        if origem not in self.vertices or destino not in self.vertices: 
+        chave_origem, chave_destino = self._chave(origem), self._chave(destino)
+        if chave_origem is None or chave_destino is None: 
             return None, float('inf')
         
-        # Inicialização das estruturas do algoritmo
-        distancias = {v: float('inf') for v in self.vertices}
-        predecessores = {v: None for v in self.vertices}
-        visitados = set()
+        # Grafo não direcionado: a árvore de qualquer uma das pontas responde à consulta
+        if chave_origem not in self.todos_pares and chave_origem not in self.cache_arvores and chave_destino in self.cache_arvores:
+            caminho, distancia = self.caminho_ate(self.arvore_caminhos(destino), origem)
+            return (caminho[::-1] if caminho else None), distancia
+        return self.caminho_ate(self.arvore_caminhos(origem), destino)
+    
+    # Árvore de caminhos mínimos de fonte única: (distancias, predecessores) para todos os destinos alcançáveis
+    def arvore_caminhos(self, origem):
+        if (chave := self._chave(origem)) is None:
+            return None
+        if chave in self.todos_pares:
+            return self.todos_pares[chave]
+        if chave in self.cache_arvores:
+            self.cache_arvores.move_to_end(chave)
+            return self.cache_arvores[chave]
         
-        distancias[origem] = 0
+        return self._guardar_arvore(chave, self._dijkstra_fonte_unica(chave))
+    
+    def _guardar_arvore(self, chave, arvore):
+        self.cache_arvores[chave] = arvore
+        if len(self.cache_arvores) > self.capacidade_cache:
+            self.cache_arvores.popitem(last=False)  # Descarta a árvore usada há mais tempo (LRU)
+        return arvore
+    
+    # As distâncias finais saem na ordem em que os vértices são fixados, ou seja, em ordem não decrescente
+    def _dijkstra_fonte_unica(self, origem):
+        fixadas, predecessores = {}, {}
+        for _ in self._fixar_vertices(origem, fixadas, predecessores):
+            pass
+        return fixadas, predecessores
+    
+    # Dijkstra incremental: entrega (vértice, distância) à medida que cada vértice é fixado, preenchendo
+    # fixadas e predecessores; quem consome pode parar a qualquer momento sem pagar pelo resto do mapa
+    def _fixar_vertices(self, origem, fixadas, predecessores):
+        distancias, predecessores[origem] = {origem: 0}, None
         heap = [(0, origem)]  # Min-heap para processar vértices por distância
         
         while heap:
             dist_atual, vertice_atual = heapq.heappop(heap)
-            
-            if vertice_atual in visitados:
+            if vertice_atual in fixadas:
                 continue
-            
-            visitados.add(vertice_atual)
-            
-            # Otimização: parar quando chegamos ao destino
-            if vertice_atual == destino:
-                break
+            fixadas[vertice_atual] = dist_atual
+            yield vertice_atual, dist_atual
             
             # Relaxamento das arestas
-            for vizinho, peso in self.vertices[vertice_atual].items():
-                if vizinho not in visitados:
+            for vizinho, peso in self._vizinhos(vertice_atual):
+                if vizinho not in fixadas:
                     nova_dist = dist_atual + peso
-                    if nova_dist < distancias[vizinho]:
+                    if nova_dist < distancias.get(vizinho, float('inf')):
                         distancias[vizinho] = nova_dist
                         predecessores[vizinho] = vertice_atual
                         heapq.heappush(heap, (nova_dist, vizinho))
-        
-        # Reconstrução do caminho
-        if distancias[destino] == float('inf'):
+    
+    # Reconstrução do caminho até o destino a partir de uma árvore de caminhos mínimos
+    def caminho_ate(self, arvore, destino):
+        chave = self._chave(destino)
+        if arvore is None or chave not in arvore[0]:
             return None, float('inf')
-        
-        caminho = []
-        vertice_atual = destino
+        return [self._nome(v) for v in self._caminho_chaves(arvore[1], chave)], arvore[0][chave]
+    
+    @staticmethod
+    def _caminho_chaves(predecessores, destino):
+        caminho, vertice_atual = [], destino
         while vertice_atual is not None:
             caminho.append(vertice_atual)
             vertice_atual = predecessores[vertice_atual]
-        
         caminho.reverse()
+        return caminho
+    
+    def distancia(self, origem, destino):
+        arvore = self.arvore_caminhos(origem)
+        return arvore[0].get(self._chave(destino), float('inf')) if arvore else float('inf')
+    
+    # Regiões alcançáveis a partir da origem, com a distância, da mais próxima para a mais distante.
+    # Sem árvore em cache a busca é expandida sob demanda: quem para na primeira região útil paga só
+    # pela vizinhança visitada; a árvore só entra no cache se a expansão chegar ao fim.
+    def por_distancia(self, origem):
+        if (chave := self._chave(origem)) is None:
+            return iter(())
+        if chave in self.todos_pares or chave in self.cache_arvores:
+            return ((self._nome(v), d) for v, d in self.arvore_caminhos(origem)[0].items())
+        return self._expandir_por_distancia(chave)
+    
+    def _expandir_por_distancia(self, chave):
+        fixadas, predecessores = {}, {}
+        for vertice, distancia in self._fixar_vertices(chave, fixadas, predecessores):
+            yield self._nome(vertice), distancia
+        self._guardar_arvore(chave, (fixadas, predecessores))
+    
+    # Pré-cálculo opcional de todos os pares (uma árvore por origem), indicado apenas para mapas pequenos
+    def precomputar_todos_pares(self, limite_vertices=500):
+        if len(self) > limite_vertices:
+            return False
+        self.todos_pares = {v: self.cache_arvores.pop(v, None) or self._dijkstra_fonte_unica(v) for v in self._chaves()}
+        return True
+    
+    def matriz_distancias(self):
+        if not self.todos_pares and not self.precomputar_todos_pares():
+            return None
+        return {self._nome(origem): {self._nome(v): d for v, d in arvore[0].items()} for origem, arvore in self.todos_pares.items()}
+    
+    # Matriz de distâncias mínimas entre as regiões dadas (linhas e colunas na ordem recebida; inf = inalcançável).
+    # O grafo é não direcionado: cada par vem da árvore ou linha em cache de qualquer uma das pontas. Os pares que
+    # faltam saem de um Dijkstra por origem que para assim que os alvos ainda desconhecidos são fixados; essas
+    # linhas parciais ficam num cache LRU próprio e são completadas nas chamadas seguintes.
+    def matriz_entre(self, regioes):
+        chaves, infinito = [self._chave(regiao) for regiao in regioes], float('inf')
+        n = len(chaves)
+        matriz = [[None] * n for _ in range(n)]
+        linhas = []
+        for chave in chaves:
+            arvore = self.todos_pares.get(chave) or self.cache_arvores.get(chave) if chave is not None else None
+            linhas.append(arvore[0] if arvore is not None else self.cache_linhas.get(chave) if chave is not None else None)
+        for i, chave in enumerate(chaves):
+            matriz[i][i] = 0 if chave is not None else infinito
+            for j in range(i + 1, n):
+                if chave is None or chaves[j] is None:
+                    matriz[i][j] = matriz[j][i] = infinito
+                elif linhas[i] is not None and chaves[j] in linhas[i]:
+                    matriz[i][j] = matriz[j][i] = linhas[i][chaves[j]]
+                elif linhas[j] is not None and chave in linhas[j]:
+                    matriz[i][j] = matriz[j][i] = linhas[j][chave]
+        # Linhas com mais pares desconhecidos primeiro: uma região nova preenche sua coluna com uma busca só
+        for i in sorted(range(n), key=lambda i: -matriz[i].count(None)):
+            chave = chaves[i]
+            if not (faltam := {chaves[j] for j in range(n) if matriz[i][j] is None}):
+                continue
+            distancias = self._distancias_ate(chave, faltam)
+            if (linha := self.cache_linhas.get(chave)) is not None:
+                linha.update(distancias)
+                self.cache_linhas.move_to_end(chave)
+            else:
+                self.cache_linhas[chave] = distancias
+                if len(self.cache_linhas) > self.capacidade_cache * 8:
+                    self.cache_linhas.popitem(last=False)
+            for j in range(n):
+                if matriz[i][j] is None:
+                    matriz[i][j] = matriz[j][i] = distancias[chaves[j]]
+        return matriz
+    
+    # Dijkstra interrompido quando todos os alvos foram fixados; alvos inalcançáveis ficam com inf
+    def _distancias_ate(self, origem, alvos):
+        distancias, visitados, pendentes = {origem: 0}, set(), set(alvos)
+        heap = [(0, origem)]
+        while heap and pendentes:
+            dist_atual, vertice_atual = heapq.heappop(heap)
+            if vertice_atual in visitados:
+                continue
+            visitados.add(vertice_atual)
+            pendentes.discard(vertice_atual)
+            for vizinho, peso in self._vizinhos(vertice_atual):
+                if vizinho not in visitados and dist_atual + peso < distancias.get(vizinho, float('inf')):
+                    distancias[vizinho] = dist_atual + peso
+                    heapq.heappush(heap, (dist_atual + peso, vizinho))
+        return {alvo: distancias[alvo] if alvo in visitados else float('inf') for alvo in alvos}
+    
+    # Busca ponto a ponto com o método escolhido: (caminho, distancia, vertices_expandidos). Os três métodos fazem
+    # uma busca própria, interrompida ao fixar o destino, para que as expansões sejam comparáveis; o cache de
+    # árvores continua servindo dijkstra() e distancia()
+    def rota(self, origem, destino, metodo='dijkstra'):
+        if metodo == 'a_estrela':
+            return self.a_estrela(origem, destino)
+        if metodo == 'bidirecional':
+            return self.dijkstra_bidirecional(origem, destino)
+        if metodo != 'dijkstra':
+            raise ValueError(f"Método de roteamento desconhecido: {metodo}")
+        return self._busca_dirigida(origem, destino, 0.0)  # Heurística nula: Dijkstra que para no destino
+    
+    # Converte km em unidades de peso das arestas: menor razão peso/haversine entre as arestas. Com esse fator a
+    # heurística nunca superestima a distância restante (admissível e consistente), mas só se todo vértice tiver
+    # coordenadas: um vértice sem elas (h = 0) pode encurtar um caminho abaixo do que a razão mínima prevê.
+    # Nesse caso o fator é 0 e o A* se reduz ao Dijkstra.
+    def fator_heuristica(self):
+        if self._fator_heuristica is None:
+            if any(self._coordenada(v) is None for v in self._chaves()):
+                self._fator_heuristica = 0.0
+                return self._fator_heuristica
+            razoes = [
+                peso / dist_km
+                for v in self._chaves() if (coords := self._coordenada(v)) is not None
+                for vizinho, peso in self._vizinhos(v) if (coords_vizinho := self._coordenada(vizinho)) is not None
+                if (dist_km := distancia_haversine(coords, coords_vizinho)) > 0
+            ]
+            self._fator_heuristica = min(razoes, default=0.0)
+        return self._fator_heuristica
+    
+    # A* com heurística geográfica (haversine calibrada para as unidades das arestas)
+    def a_estrela(self, origem, destino):
+        return self._busca_dirigida(origem, destino, self.fator_heuristica())
+    
+    # Busca ponto a ponto guiada por fator × haversine até o destino; com fator 0 é o Dijkstra interrompido no destino
+    def _busca_dirigida(self, origem, destino, fator):
+        origem, destino = self._chave(origem), self._chave(destino)
+        if origem is None or destino is None:
+            return None, float('inf'), 0
         
-        # Validação do caminho
-        if caminho[0] != origem:
-            return None, float('inf')
+        alvo, estimativas = self._coordenada(destino), {}
+        def heuristica(v):
+            if not fator:
+                return 0
+            if v not in estimativas:
+                coords = self._coordenada(v)
+                estimativas[v] = fator * distancia_haversine(coords, alvo) if coords and alvo else 0
+            return estimativas[v]
+        
+        distancias, predecessores, expandidos = {origem: 0}, {origem: None}, 0
+        heap = [(heuristica(origem), 0, origem)]
+        while heap:
+            _, dist_atual, vertice_atual = heapq.heappop(heap)
+            if dist_atual > distancias[vertice_atual]:
+                continue  # Entrada obsoleta no heap
+            expandidos += 1
+            if vertice_atual == destino:
+                return [self._nome(v) for v in self._caminho_chaves(predecessores, destino)], dist_atual, expandidos
+            
+            for vizinho, peso in self._vizinhos(vertice_atual):
+                nova_dist = dist_atual + peso
+                if nova_dist < distancias.get(vizinho, float('inf')):
+                    distancias[vizinho], predecessores[vizinho] = nova_dist, vertice_atual
+                    heapq.heappush(heap, (nova_dist + heuristica(vizinho), nova_dist, vizinho))
+        return None, float('inf'), expandidos
+    
+    # Dijkstra bidirecional: expande alternadamente a partir da origem e do destino até as buscas se encontrarem
+    def dijkstra_bidirecional(self, origem, destino):
+        origem, destino = self._chave(origem), self._chave(destino)
+        if origem is None or destino is None:
+            return None, float('inf'), 0
+        
+        distancias, predecessores = ({origem: 0}, {destino: 0}), ({origem: None}, {destino: None})
+        heaps, finalizados = ([(0, origem)], [(0, destino)]), (set(), set())
+        melhor, encontro, expandidos = (0, origem, 0) if origem == destino else (float('inf'), None, 0)
         
-        return caminho, distancias[destino]
+        while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < melhor:
+            lado = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            dist_atual, vertice_atual = heapq.heappop(heaps[lado])
+            if vertice_atual in finalizados[lado]:
+                continue
+            finalizados[lado].add(vertice_atual)
+            expandidos += 1
+            
+            outro = distancias[1 - lado]
+            for vizinho, peso in self._vizinhos(vertice_atual):
+                nova_dist = dist_atual + peso
+                if nova_dist < distancias[lado].get(vizinho, float('inf')):
+                    distancias[lado][vizinho], predecessores[lado][vizinho] = nova_dist, vertice_atual
+                    heapq.heappush(heaps[lado], (nova_dist, vizinho))
+                if vizinho in outro and distancias[lado][vizinho] + outro[vizinho] < melhor:
+                    melhor, encontro = distancias[lado][vizinho] + outro[vizinho], vizinho
+        
+        if encontro is None:
+            return None, float('inf'), expandidos
+        ida = self._caminho_chaves(predecessores[0], encontro)
+        volta = self._caminho_chaves(predecessores[1], encontro)
+        return [self._nome(v) for v in ida + volta[-2::-1]], melhor, expandidos
+    
+    def _invalidar_cache(self):
+        self.cache_arvores.clear()
+        self.cache_linhas.clear()
+        self.todos_pares, self._fator_heuristica = {}, None
+    
+    def total_conexoes(self):
+        return sum(len(c) for c in self.vertices.values()) // 2
 
     # Visualização das conexões do grafo
     def listar_conexoes(self):
-        print("\n🗺️ MAPA DE CONEXÕES ENTRE REGIÕES:\n" + "-" * 50)
+        if not self.saida.ativa: return
+        emitir = self.saida.emitir
+        emitir('TITULO', "\n🗺️ MAPA DE CONEXÕES ENTRE REGIÕES:\n" + "-" * 50)
         for regiao, conexoes in self.vertices.items():
-            print(f"📍 {regiao}:")
+            emitir('REGIAO', "📍 {regiao}:", regiao=regiao)
             for vizinho, peso in conexoes.items():
-                print(f"   → {vizinho} (distância: {peso} unidades)")
-            print()
-        
+                emitir('CONEXAO', "   → {vizinho} (distância: {peso} unidades)", regiao=regiao, vizinho=vizinho, peso=peso)
+            emitir('SEPARADOR')
+
         # Estatísticas do grafo
-        total_regioes = len(self.vertices)
-        total_conexoes = sum(len(c) for c in self.vertices.values()) // 2
-        conectividade_media = sum(len(c) for c in self.vertices.values()) / total_regioes
+        total_regioes = len(self)
+        total_conexoes = self.total_conexoes()
+        conectividade_media = 2 * total_conexoes / total_regioes
+
+        emitir('ESTATISTICAS_MAPA', "📊 ESTATÍSTICAS DO MAPA:\n" + "-" * 30 + "\n🌍 Total de regiões: {total_regioes}"
+               "\n🔗 Total de conexões: {total_conexoes}\n📈 Conectividade média: {conectividade_media:.1f} conexões por região",
+               total_regioes=total_regioes, total_conexoes=total_conexoes, conectividade_media=conectividade_media)
+
+        emitir('TITULO', "\n🔗 CONECTIVIDADE DAS REGIÕES:\n" + "-" * 35)
+        for regiao, conexoes in self.vertices.items():
+            emitir('CONECTIVIDADE_REGIAO', "🏞️ {regiao}:\n   🔗 Conectada com: {conexoes}\n   📊 Total de conexões: {total}\n",
+                   regiao=regiao, conexoes=", ".join(conexoes), total=len(conexoes))
+
+# Grafo para representar conexões entre regiões e calcular rotas
+class GrafoRegioes(BuscaCaminhos):
+    def __init__(self, saida=None, capacidade_cache=64):
+        self.vertices, self.coordenadas = {}, {}
+        self.saida = saida or SaidaConsole()
+        self._iniciar_cache(capacidade_cache)
+    
+    def adicionar_vertice(self, regiao, coordenadas=None):
+        if regiao not in self.vertices:
+            self.vertices[regiao] = {}
+            if coordenadas: self.coordenadas[regiao] = coordenadas
+            self._invalidar_cache()
+    
+    # Adiciona conexão bidirecional entre duas regiões
+    def adicionar_aresta(self, regiao1, regiao2, peso):
+        self.adicionar_vertice(regiao1), self.adicionar_vertice(regiao2)
+        self.vertices[regiao1][regiao2] = self.vertices[regiao2][regiao1] = peso
+        self._invalidar_cache()
+    
+    # Ganchos de BuscaCaminhos: no grafo em dicionário a chave interna é o próprio nome da região
+    def _chave(self, regiao): return regiao if regiao in self.vertices else None
+    def _nome(self, chave): return chave
+    def _vizinhos(self, chave): return self.vertices[chave].items()
+    def _coordenada(self, chave): return self.coordenadas.get(chave)
+    def _chaves(self): return self.vertices.keys()
+
+# Visão somente leitura (nome da região → valor) sobre os arrays de um GrafoCompacto
+class _VisaoPorNome(Mapping):
+    def __init__(self, grafo, obter):
+        self.grafo, self.obter = grafo, obter
+
+    def __getitem__(self, regiao):
+        chave = self.grafo._chave(regiao)
+        if chave is None or (valor := self.obter(chave)) is None: raise KeyError(regiao)
+        return valor
+
+    def __iter__(self):
+        return (self.grafo._nome(i) for i in range(self.grafo.total_vertices) if self.obter(i) is not None)
+
+    def __len__(self): return sum(1 for _ in self)
+
+# Grafo compacto em arrays (CSR): os vizinhos e pesos do vértice i ficam em offsets[i]:offsets[i + 1].
+# Pode ser salvo em arquivo binário e reaberto via mmap em milissegundos, sem reconstrução.
+class GrafoCompacto(BuscaCaminhos):
+    MAGICO, VERSAO = b'IVGR', 1
+    CABECALHO = struct.Struct('<4sHHqq')  # mágico, versão, flags, vértices, arcos
+    FLAG_COORDENADAS, FLAG_BIG_ENDIAN = 1, 2
+
+    def __init__(self, offsets, vizinhos, pesos, nomes, latitudes=None, longitudes=None, saida=None, capacidade_cache=64):
+        self.offsets, self.vizinhos, self.pesos = offsets, vizinhos, pesos
+        self.latitudes, self.longitudes = latitudes, longitudes
+        self.total_vertices, self._mapa, self.caminho_arquivo = len(offsets) - 1, None, None  # Arquivo .ivg de origem (abrir)
+        # Tabela nome ↔ id: lista + dicionário em memória, ou blob ordenado no arquivo mapeado
+        if isinstance(nomes, list):
+            self._nomes, self._ids = nomes, {nome: i for i, nome in enumerate(nomes)}
+        else:
+            self._nomes, self._ids = None, None
+            self._blob_nomes, self._offsets_nomes, self._ordem_nomes = nomes
+        self.saida = saida or SaidaConsole()
+        self.vertices = _VisaoPorNome(self, lambda i: {self._nome(v): p for v, p in self._vizinhos(i)})
+        self.coordenadas = _VisaoPorNome(self, self._coordenada)
+        self._iniciar_cache(capacidade_cache)
+
+    def __len__(self): return self.total_vertices
+    def total_conexoes(self): return len(self.vizinhos) // 2
+
+    # Ganchos de BuscaCaminhos: a chave interna é o id inteiro do vértice
+    def _vizinhos(self, i):
+        inicio, fim = self.offsets[i], self.offsets[i + 1]
+        return zip(self.vizinhos[inicio:fim], self.pesos[inicio:fim])
+
+    def _coordenada(self, i):
+        if self.latitudes is None or self.latitudes[i] != self.latitudes[i]: return None  # NaN = sem coordenadas
+        return self.latitudes[i], self.longitudes[i]
+
+    def _chaves(self): return range(self.total_vertices)
+
+    def _nome(self, i):
+        if self._nomes is not None: return self._nomes[i]
+        return bytes(self._blob_nomes[self._offsets_nomes[i]:self._offsets_nomes[i + 1]]).decode('utf-8')
+
+    # No arquivo mapeado, busca binária sobre os ids ordenados pelo nome em UTF-8
+    def _chave(self, regiao):
+        if self._ids is not None: return self._ids.get(regiao)
+        if not isinstance(regiao, str): return None
+        alvo, inicio, fim = regiao.encode('utf-8'), 0, self.total_vertices
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            i = self._ordem_nomes[meio]
+            atual = bytes(self._blob_nomes[self._offsets_nomes[i]:self._offsets_nomes[i + 1]])
+            if atual == alvo: return i
+            if atual < alvo: inicio = meio + 1
+            else: fim = meio
+        return None
+
+    # Monta o CSR a partir de arcos direcionados (ids inteiros) por contagem de graus
+    @classmethod
+    def _de_arcos(cls, nomes, origens, destinos, pesos, coordenadas=None, **kwargs):
+        n = len(nomes)
+        offsets = array('q', bytes(8 * (n + 1)))
+        for u in origens: offsets[u + 1] += 1
+        for i in range(n): offsets[i + 1] += offsets[i]
         
-        print("📊 ESTATÍSTICAS DO MAPA:\n" + "-" * 30)
-        print(f"🌍 Total de regiões: {total_regioes}")
-        print(f"🔗 Total de conexões: {total_conexoes}")
-        print(f"📈 Conectividade média: {conectividade_media:.1f} conexões por região")
+        proxima = array('q', offsets[:-1])
+        vizinhos, pesos_csr = array('i', bytes(4 * len(origens))), array('d', bytes(8 * len(origens)))
+        for u, v, peso in zip(origens, destinos, pesos):
+            vizinhos[proxima[u]], pesos_csr[proxima[u]] = v, peso
+            proxima[u] += 1
         
-        print("\n🔗 CONECTIVIDADE DAS REGIÕES:\n" + "-" * 35)
-        for regiao, conexoes in self.vertices.items():
-            conexoes_formatadas = ", ".join(conexoes.keys())
-            print(f"🏞️ {regiao}:")
-            print(f"   🔗 Conectada com: {conexoes_formatadas}")
-            print(f"   📊 Total de conexões: {len(conexoes)}")
-            print()
+        latitudes = longitudes = None
+        if coordenadas:
+            latitudes, longitudes = array('d', [math.nan]) * n, array('d', [math.nan]) * n
+            for i, nome in enumerate(nomes):
+                if (coords := coordenadas.get(nome)): latitudes[i], longitudes[i] = coords
+        return cls(offsets, vizinhos, pesos_csr, list(nomes), latitudes, longitudes, **kwargs)
+
+    @classmethod
+    def de_grafo(cls, grafo, **kwargs):
+        nomes = list(grafo.vertices)
+        ids = {nome: i for i, nome in enumerate(nomes)}
+        origens, destinos, pesos = array('i'), array('i'), array('d')
+        for regiao, conexoes in grafo.vertices.items():
+            for vizinho, peso in conexoes.items():
+                origens.append(ids[regiao]), destinos.append(ids[vizinho]), pesos.append(peso)
+        return cls._de_arcos(nomes, origens, destinos, pesos, dict(grafo.coordenadas), saida=kwargs.pop('saida', grafo.saida), **kwargs)
+
+    # Carrega uma lista de arestas CSV (origem,destino,peso com cabeçalho); conexões bidirecionais.
+    # coordenadas: dict ou CSV opcional com regiao,latitude,longitude
+    @classmethod
+    def de_csv(cls, fonte, coordenadas=None, **kwargs):
+        if isinstance(fonte, str):
+            with open(fonte, encoding='utf-8', newline='') as arquivo:
+                return cls.de_csv(arquivo, coordenadas, **kwargs)
+        if isinstance(coordenadas, str):
+            with open(coordenadas, encoding='utf-8', newline='') as arquivo:
+                leitor = csv.reader(arquivo)
+                next(leitor, None)
+                coordenadas = {linha[0]: (float(linha[1]), float(linha[2])) for linha in leitor if linha}
+        
+        ids, origens, destinos, pesos = {}, array('i'), array('i'), array('d')
+        leitor = csv.reader(fonte)
+        next(leitor, None)  # Cabeçalho
+        for linha in leitor:
+            if not linha: continue
+            u, v, peso = ids.setdefault(linha[0], len(ids)), ids.setdefault(linha[1], len(ids)), float(linha[2])
+            origens.append(u), destinos.append(v), pesos.append(peso)
+            origens.append(v), destinos.append(u), pesos.append(peso)
+        return cls._de_arcos(list(ids), origens, destinos, pesos, coordenadas, **kwargs)
+
+    # Formato binário: cabeçalho + seções alinhadas em 8 bytes (offsets, vizinhos, pesos,
+    # latitudes/longitudes opcionais, offsets dos nomes, ids ordenados por nome, nomes em UTF-8)
+    def salvar(self, caminho):
+        n = self.total_vertices
+        nomes = [self._nome(i).encode('utf-8') for i in range(n)]
+        offsets_nomes = array('q', [0])
+        for nome in nomes: offsets_nomes.append(offsets_nomes[-1] + len(nome))
+        ordem_nomes = array('i', sorted(range(n), key=nomes.__getitem__))
+        
+        flags = (self.FLAG_COORDENADAS if self.latitudes is not None else 0) | (self.FLAG_BIG_ENDIAN if sys.byteorder == 'big' else 0)
+        secoes = [self.offsets, self.vizinhos, self.pesos]
+        if self.latitudes is not None: secoes += [self.latitudes, self.longitudes]
+        secoes += [offsets_nomes, ordem_nomes, b''.join(nomes)]
+        
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(self.CABECALHO.pack(self.MAGICO, self.VERSAO, flags, n, len(self.vizinhos)))
+            for secao in secoes:
+                dados = memoryview(secao).cast('B')
+                arquivo.write(dados)
+                arquivo.write(bytes(-len(dados) % 8))
+
+    @classmethod
+    def abrir(cls, caminho, **kwargs):
+        with open(caminho, 'rb') as arquivo:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(mapa)
+        magico, versao, flags, n, m = cls.CABECALHO.unpack_from(buffer, 0)
+        if magico != cls.MAGICO or versao != cls.VERSAO:
+            raise ValueError(f"Arquivo de mapa inválido ou de versão não suportada: {caminho}")
+        if bool(flags & cls.FLAG_BIG_ENDIAN) != (sys.byteorder == 'big'):
+            raise ValueError(f"Arquivo de mapa gerado com outra ordem de bytes: {caminho}")
+        
+        posicao = cls.CABECALHO.size
+        def secao(formato, quantidade):
+            nonlocal posicao
+            tamanho = struct.calcsize(formato) * quantidade
+            visao = buffer[posicao:posicao + tamanho].cast(formato)
+            posicao += tamanho + (-tamanho % 8)
+            return visao
+        
+        offsets, vizinhos, pesos = secao('q', n + 1), secao('i', m), secao('d', m)
+        latitudes = longitudes = None
+        if flags & cls.FLAG_COORDENADAS:
+            latitudes, longitudes = secao('d', n), secao('d', n)
+        offsets_nomes, ordem_nomes = secao('q', n + 1), secao('i', n)
+        blob_nomes = secao('B', offsets_nomes[n])
+        
+        grafo = cls(offsets, vizinhos, pesos, (blob_nomes, offsets_nomes, ordem_nomes), latitudes, longitudes, **kwargs)
+        grafo._mapa, grafo.caminho_arquivo = mapa, caminho
+        return grafo
 
-# Classe para representar uma ocorrência de queimada
+# Armazém colunar das ocorrências (struct-of-arrays): cada campo numa coluna compacta indexada pelo slot da
+# ocorrência, com região e status como códigos de tabelas internas e instantes em microssegundos desde 1970.
+# Slots liberados pelo sistema (ocorrência arquivada ou absorvida numa mesclagem) são reaproveitados.
+class ArmazemOcorrencias:
+    SEM_VALOR = -1  # Despacho/equipe ausentes nas colunas inteiras
+
+    def __init__(self, relogio=None):
+        self.relogio = relogio or relogio_sistema  # Instante de criação das ocorrências sem timestamp
+        self.ids, self.regioes, self.severidades = array('q'), array('i'), array('B')
+        self.latitudes, self.longitudes = array('d'), array('d')  # Precisão dupla: as coordenadas voltam como entraram
+        self.criadas, self.despachos = array('q'), array('q')
+        self.status, self.equipes, self.ativas = array('B'), array('i'), array('B')
+        self.descricoes, self.acoes, self.livres = [], {}, []  # acoes: slot → lista (só as que têm ações)
+        self.nomes_regiao, self.codigos_regiao = [], {}
+        self.nomes_status, self.codigos_status = ["PENDENTE"], {"PENDENTE": 0}  # Código 0: status inicial
+
+    def __len__(self): return len(self.ids) - len(self.livres)
+
+    @staticmethod
+    def _codigo(nomes, codigos, valor):
+        if (codigo := codigos.get(valor)) is None:
+            codigo = codigos[valor] = len(nomes)
+            nomes.append(valor)
+        return codigo
+
+    def codigo_regiao(self, regiao): return self._codigo(self.nomes_regiao, self.codigos_regiao, regiao)
+    def codigo_status(self, status): return self._codigo(self.nomes_status, self.codigos_status, status)
+
+    def alocar(self, id_ocorrencia, regiao, severidade, coordenadas, descricao, criada_em):
+        if not 0 <= severidade <= 255:
+            raise ValueError(f"Severidade fora do intervalo suportado (0-255): {severidade}")
+        if (codigo := self.codigos_regiao.get(regiao)) is None:
+            codigo = self.codigo_regiao(regiao)
+        if descricao: descricao = sys.intern(descricao)  # Descrições repetidas compartilham a mesma string
+        if self.livres:
+            slot = self.livres.pop()
+            self.ids[slot], self.regioes[slot], self.severidades[slot] = id_ocorrencia, codigo, severidade
+            self.latitudes[slot], self.longitudes[slot], self.criadas[slot] = coordenadas[0], coordenadas[1], criada_em
+            self.despachos[slot] = self.equipes[slot] = self.SEM_VALOR
+            self.status[slot], self.ativas[slot], self.descricoes[slot] = 0, 0, descricao
+            return slot
+        self.ids.append(id_ocorrencia)
+        self.regioes.append(codigo)
+        self.severidades.append(severidade)
+        self.latitudes.append(coordenadas[0])
+        self.longitudes.append(coordenadas[1])
+        self.criadas.append(criada_em)
+        self.despachos.append(self.SEM_VALOR)
+        self.equipes.append(self.SEM_VALOR)
+        self.status.append(0)
+        self.ativas.append(0)
+        self.descricoes.append(descricao)
+        return len(self.ids) - 1
+
+    def liberar(self, slot):
+        self.ativas[slot] = 0
+        self.descricoes[slot] = ""
+        self.acoes.pop(slot, None)
+        self.livres.append(slot)
+
+    # Estatísticas das ocorrências ativas por região: quantidade, severidade média/máxima e contagem por faixa
+    # (FAIXAS_SEVERIDADE). Com NumPy, as colunas são lidas sem cópia e agregadas com bincount.
+    def estatisticas_por_regiao(self):
+        total_regioes, nomes_faixa = len(self.nomes_regiao), [nome for _, nome in FAIXAS_SEVERIDADE]
+        faixa_por_severidade = [nomes_faixa.index(faixa_severidade(s)) for s in range(256)]
+        if np is not None:
+            ativas = np.frombuffer(self.ativas, dtype=np.uint8).view(bool)
+            regioes = np.frombuffer(self.regioes, dtype=np.int32)[ativas]
+            severidades = np.frombuffer(self.severidades, dtype=np.uint8)[ativas]
+            quantidade = np.bincount(regioes, minlength=total_regioes)
+            soma = np.bincount(regioes, weights=severidades, minlength=total_regioes)
+            maxima = np.zeros(total_regioes, dtype=np.int64)
+            np.maximum.at(maxima, regioes, severidades)
+            faixas = np.asarray(faixa_por_severidade, dtype=np.int64)[severidades]
+            por_faixa = np.bincount(regioes * len(nomes_faixa) + faixas, minlength=total_regioes * len(nomes_faixa)).reshape(-1, len(nomes_faixa))
+            quantidade, soma, maxima, por_faixa = quantidade.tolist(), soma.tolist(), maxima.tolist(), por_faixa.tolist()
+        else:
+            quantidade, soma, maxima = [0] * total_regioes, [0] * total_regioes, [0] * total_regioes
+            por_faixa = [[0] * len(nomes_faixa) for _ in range(total_regioes)]
+            for ativa, codigo, severidade in zip(self.ativas, self.regioes, self.severidades):
+                if ativa:
+                    quantidade[codigo] += 1
+                    soma[codigo] += severidade
+                    maxima[codigo] = max(maxima[codigo], severidade)
+                    por_faixa[codigo][faixa_por_severidade[severidade]] += 1
+        return {self.nomes_regiao[codigo]: {'ativas': quantidade[codigo], 'severidade_media': soma[codigo] / quantidade[codigo],
+                                            'severidade_maxima': maxima[codigo], 'por_faixa': dict(zip(nomes_faixa, por_faixa[codigo]))}
+                for codigo in range(total_regioes) if quantidade[codigo]}
+
+# Classe para representar uma ocorrência de queimada: registro com __slots__ que guarda o armazém, o slot e o id
+# (o mesmo objeto int usado como chave em todos os índices); os demais campos são propriedades sobre as colunas
 class Ocorrencia:
-    def __init__(self, id_ocorrencia, regiao, severidade, coordenadas, descricao=""):
-        self.id, self.regiao, self.severidade = id_ocorrencia, regiao, severidade
-        self.coordenadas, self.descricao = coordenadas, descricao
-        self.timestamp, self.status = datetime.datetime.now(), "PENDENTE"
-        self.equipe_responsavel, self.acoes_realizadas = None, []
-    
-    # Comparação para heap de prioridade (maior severidade = maior prioridade)
-    def __lt__(self, other): return self.severidade > other.severidade
+    __slots__ = ('_armazem', '_slot', 'id')
+
+    def __init__(self, id_ocorrencia, regiao, severidade, coordenadas, descricao="", timestamp=None, armazem=None):
+        if armazem is None: armazem = ArmazemOcorrencias()  # Ocorrência avulsa, fora de um SistemaIVERN
+        self._slot = armazem.alocar(id_ocorrencia, regiao, severidade, coordenadas, descricao,
+                                    para_microssegundos(timestamp or armazem.relogio()))
+        self._armazem, self.id = armazem, id_ocorrencia
+
+    # Devolve o slot ao armazém quando a ocorrência sai de vez do sistema; o objeto não deve mais ser usado
+    def liberar(self): self._armazem.liberar(self._slot)
+
+    # Todos os campos numa lista serializável (snapshot e pilha de desfazer das mesclagens); de_linha refaz a ocorrência
+    def linha(self):
+        armazem, slot = self._armazem, self._slot
+        despacho = armazem.despachos[slot]
+        return [self.id, self.regiao, armazem.severidades[slot], armazem.latitudes[slot], armazem.longitudes[slot], self.descricao,
+                armazem.criadas[slot], self.status, self.equipe_responsavel, list(self.listar_acoes()),
+                None if despacho == ArmazemOcorrencias.SEM_VALOR else despacho]
+
+    @classmethod
+    def de_linha(cls, linha, armazem):
+        id_ocorrencia, regiao, severidade, latitude, longitude, descricao, instante, status, equipe, acoes, *despacho = linha
+        ocorrencia = cls(id_ocorrencia, regiao, severidade, (latitude, longitude), descricao, de_microssegundos(instante), armazem)
+        ocorrencia.status, ocorrencia.equipe_responsavel, ocorrencia.acoes_realizadas = status, equipe, list(acoes)
+        if despacho and despacho[0] is not None:  # Snapshots anteriores ao acervo não têm o instante do despacho
+            ocorrencia.despachada_em = de_microssegundos(despacho[0])
+        return ocorrencia
+
+    @property
+    def regiao(self): return self._armazem.nomes_regiao[self._armazem.regioes[self._slot]]
+    @property
+    def descricao(self): return self._armazem.descricoes[self._slot]
+    @property
+    def coordenadas(self): return self._armazem.latitudes[self._slot], self._armazem.longitudes[self._slot]
+    @property
+    def timestamp(self): return de_microssegundos(self._armazem.criadas[self._slot])
+
+    @property
+    def severidade(self): return self._armazem.severidades[self._slot]
+    @severidade.setter
+    def severidade(self, valor): self._armazem.severidades[self._slot] = valor
+
+    @property
+    def status(self): return self._armazem.nomes_status[self._armazem.status[self._slot]]
+    @status.setter
+    def status(self, valor): self._armazem.status[self._slot] = self._armazem.codigo_status(valor)
+
+    @property
+    def equipe_responsavel(self):
+        equipe = self._armazem.equipes[self._slot]
+        return None if equipe == ArmazemOcorrencias.SEM_VALOR else equipe
+    @equipe_responsavel.setter
+    def equipe_responsavel(self, valor): self._armazem.equipes[self._slot] = ArmazemOcorrencias.SEM_VALOR if valor is None else valor
+
+    @property
+    def despachada_em(self):  # Instante do despacho da equipe (tempo de resposta no acervo)
+        instante = self._armazem.despachos[self._slot]
+        return None if instante == ArmazemOcorrencias.SEM_VALOR else de_microssegundos(instante)
+    @despachada_em.setter
+    def despachada_em(self, valor):
+        self._armazem.despachos[self._slot] = ArmazemOcorrencias.SEM_VALOR if valor is None else para_microssegundos(valor)
+
+    # A lista é criada no primeiro acesso; leituras que não alteram usam listar_acoes (sem criar listas vazias)
+    @property
+    def acoes_realizadas(self): return self._armazem.acoes.setdefault(self._slot, [])
+    @acoes_realizadas.setter
+    def acoes_realizadas(self, valor):
+        if valor: self._armazem.acoes[self._slot] = valor
+        else: self._armazem.acoes.pop(self._slot, None)
+    def listar_acoes(self): return self._armazem.acoes.get(self._slot, [])
+
+    # Campos crus das colunas (instantes em microssegundos, -1 = ausente), sem criar datetimes: usado pelo acervo
+    def valores_colunas(self):
+        armazem, slot = self._armazem, self._slot
+        return (self.id, armazem.nomes_regiao[armazem.regioes[slot]], armazem.severidades[slot], armazem.latitudes[slot],
+                armazem.longitudes[slot], armazem.criadas[slot], armazem.despachos[slot], armazem.equipes[slot])
+
+    # Marcada pelo sistema enquanto a ocorrência está entre as ativas (base das estatísticas vetorizadas)
+    @property
+    def ativa(self): return bool(self._armazem.ativas[self._slot])
+    @ativa.setter
+    def ativa(self, valor): self._armazem.ativas[self._slot] = valor
+
+    # Chave do heap de prioridade: maior severidade primeiro, desempate estável por timestamp e id. Os três campos
+    # vão num único int (severidade invertida | microssegundos deslocados p/ não negativos | id), que ordena como
+    # a tupla (-severidade, timestamp, id) mas ocupa um objeto só e compara mais rápido
+    def chave_prioridade(self):
+        armazem, slot = self._armazem, self._slot
+        return ((255 - armazem.severidades[slot]) << 112) | ((armazem.criadas[slot] + (1 << 63)) << 48) | self.id
+    def __lt__(self, other): return self.chave_prioridade() < other.chave_prioridade()
     def __str__(self): return f"Ocorrência {self.id} - {self.regiao} (Severidade: {self.severidade})"
 
 # Classe para representar equipes de resposta
 class Equipe:
-    def __init__(self, id_equipe, nome, especializacao):
-        self.id, self.nome, self.especializacao = id_equipe, nome, especializacao
-        self.disponivel, self.localizacao_atual, self.historico_acoes = True, None, ListaLigada()
+    __slots__ = ('id', 'nome', 'especializacao', 'base', 'disponivel', 'localizacao_atual', 'historico_acoes')
+    def __init__(self, id_equipe, nome, especializacao, base=None, capacidade_historico=HistoricoAcoes.CAPACIDADE_PADRAO, diretorio_historico=None, relogio=None):
+        self.id, self.nome, self.especializacao, self.base = id_equipe, nome, especializacao, base
+        self.disponivel, self.localizacao_atual = True, base
+        self.historico_acoes = HistoricoAcoes(id_equipe, capacidade_historico, diretorio_historico, relogio)
+    
+    def registrar_acao(self, acao, timestamp=None):
+        self.historico_acoes.registrar(acao, timestamp)
+
+# Atribuição de custo mínimo (método húngaro com potenciais, O(n²·m)) de n linhas a m >= n colunas.
+# Retorna, para cada linha, o índice da coluna atribuída. Com NumPy, o laço interno é vetorizado.
+def atribuicao_otima(custos):
+    n = len(custos)
+    if n == 0:
+        return []
+    m = len(custos[0])
+    if n > m:
+        raise ValueError("A atribuição exige ao menos tantas colunas quanto linhas")
+    if not all(math.isfinite(custo) for linha in custos for custo in linha):  # Com infinito o método não termina
+        raise ValueError("Os custos da atribuição devem ser finitos (use um valor alto para pares proibidos)")
+    
+    p, caminho = _hungaro_numpy(custos, n, m) if np is not None else _hungaro_python(custos, n, m)
+    atribuicao = [None] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            atribuicao[p[j] - 1] = j - 1
+    return atribuicao
+
+# Arrays indexados a partir de 1: p[j] é a linha atribuída à coluna j (0 = livre), coluna 0 é a sentinela
+def _hungaro_python(custos, n, m):
+    infinito = float('inf')
+    u, v, p, caminho = [0.0] * (n + 1), [0.0] * (m + 1), [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0], j0 = i, 0
+        minimos, usadas = [infinito] * (m + 1), [False] * (m + 1)
+        while p[j0]:
+            usadas[j0] = True
+            i0, delta, j1 = p[j0], infinito, 0
+            linha, ui0 = custos[i0 - 1], u[i0]
+            for j in range(1, m + 1):
+                if not usadas[j]:
+                    atual = linha[j - 1] - ui0 - v[j]
+                    if atual < minimos[j]:
+                        minimos[j], caminho[j] = atual, j0
+                    if minimos[j] < delta:
+                        delta, j1 = minimos[j], j
+            for j in range(m + 1):
+                if usadas[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minimos[j] -= delta
+            j0 = j1
+        while j0:  # Inverte o caminho aumentante
+            j1 = caminho[j0]
+            p[j0], j0 = p[j1], j1
+    return p, caminho
+
+def _hungaro_numpy(custos, n, m):
+    matriz = np.asarray(custos, dtype=float)
+    u, v = np.zeros(n + 1), np.zeros(m + 1)
+    p, caminho = np.zeros(m + 1, dtype=np.int64), np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0], j0 = i, 0
+        minimos, usadas = np.full(m + 1, np.inf), np.zeros(m + 1, dtype=bool)
+        while p[j0]:
+            usadas[j0] = True
+            i0 = p[j0]
+            atual = matriz[i0 - 1] - u[i0] - v[1:]
+            melhora = ~usadas[1:] & (atual < minimos[1:])
+            minimos[1:][melhora] = atual[melhora]
+            caminho[1:][melhora] = j0
+            candidatos = np.where(usadas, np.inf, minimos)
+            j1 = int(candidatos.argmin())
+            delta = candidatos[j1]
+            u[p[usadas]] += delta
+            v[usadas] -= delta
+            minimos[~usadas] -= delta
+            j0 = j1
+        while j0:
+            j1 = caminho[j0]
+            p[j0], j0 = p[j1], j1
+    return p.tolist(), caminho
+
+# Percurso de uma equipe que sai da base (índice 0 da matriz) e visita todas as paradas, sem voltar. O custo é
+# a distância total mais peso_severidade × chegada média ponderada pelos pesos das paradas (as mais graves
+# tendem a ser atendidas antes) e, com prazos {parada: horas}, multa_atraso por hora de atraso em cada parada.
+# Construção por inserção mais próxima e melhoria por 2-opt e Or-opt (trechos de 1 a 3 paradas, também
+# invertidos) restritos às `vizinhos` paradas mais próximas, até não haver melhora ou acabar limite_tempo.
+# Cada movimento é avaliado em O(1) com somas prefixadas de pesos e chegadas (O(n) com prazos).
+# Retorna (ordem das paradas sem a base, custo, movimentos aplicados).
+def otimizar_percurso(distancias, pesos, peso_severidade=1.0, prazos=None, limite_tempo=0.5, vizinhos=12, multa_atraso=1000.0):
+    n = len(distancias) - 1
+    if n <= 0:
+        return [], 0.0, 0
+    limite = time.perf_counter() + limite_tempo
+    fator = peso_severidade / (sum(pesos[1:]) or 1)
+    prazos = prazos or {}
+    
+    # Inserção mais próxima: a parada mais perto do percurso entra onde aumenta menos a distância
+    ordem, perto = [0], {v: distancias[0][v] for v in range(1, n + 1)}
+    while perto:
+        v = min(perto, key=lambda u: (perto[u], -pesos[u], u))
+        del perto[v]
+        melhor, posicao = distancias[ordem[-1]][v], len(ordem)  # No fim do percurso
+        for k in range(len(ordem) - 1):
+            a, b = ordem[k], ordem[k + 1]
+            if (acrescimo := distancias[a][v] + distancias[v][b] - distancias[a][b]) < melhor:
+                melhor, posicao = acrescimo, k + 1
+        ordem.insert(posicao, v)
+        for u in perto:
+            perto[u] = min(perto[u], distancias[v][u])
+    
+    proximos = {v: sorted((u for u in range(1, n + 1) if u != v), key=lambda u: distancias[v][u])[:vizinhos] for v in range(n + 1)}
+    
+    # Somas prefixadas sobre a ordem atual: chegada (distância acumulada), peso e peso × chegada
+    def prefixos():
+        chegada, peso, peso_chegada = [0.0] * (n + 1), [0.0] * (n + 1), [0.0] * (n + 1)
+        for k in range(1, n + 1):
+            chegada[k] = chegada[k - 1] + distancias[ordem[k - 1]][ordem[k]]
+            peso[k] = peso[k - 1] + pesos[ordem[k]]
+            peso_chegada[k] = peso_chegada[k - 1] + pesos[ordem[k]] * chegada[k]
+        return chegada, peso, peso_chegada
+    
+    # Custo da ordem formada pelos trechos (inicio, fim, invertido) de posições da ordem atual, nessa sequência
+    def avaliar(trechos):
+        tempo, latencia, atraso, anterior = 0.0, 0.0, 0.0, 0
+        for inicio, fim, invertido in trechos:
+            entrada, saida = (ordem[fim], ordem[inicio]) if invertido else (ordem[inicio], ordem[fim])
+            base = tempo + distancias[anterior][entrada]
+            soma_pesos, soma_chegadas = peso[fim] - peso[inicio - 1], peso_chegada[fim] - peso_chegada[inicio - 1]
+            if invertido:
+                latencia += (base + chegada[fim]) * soma_pesos - soma_chegadas
+            else:
+                latencia += (base - chegada[inicio]) * soma_pesos + soma_chegadas
+            if prazos:
+                for k in range(inicio, fim + 1):
+                    if (prazo := prazos.get(ordem[k])) is not None:
+                        horas = (base + (chegada[fim] - chegada[k] if invertido else chegada[k] - chegada[inicio])) * HORAS_POR_UNIDADE
+                        atraso += max(0.0, horas - prazo)
+            tempo, anterior = base + chegada[fim] - chegada[inicio], saida
+        return tempo + fator * latencia + multa_atraso * atraso
+    
+    def aplicar(trechos):
+        nova = [0]
+        for inicio, fim, invertido in trechos:
+            nova.extend(ordem[fim:inicio - 1:-1] if invertido else ordem[inicio:fim + 1])
+        return nova
+    
+    chegada, peso, peso_chegada = prefixos()
+    custo, movimentos, melhorou = avaliar([(1, n, False)]), 0, True
+    while melhorou and time.perf_counter() < limite:
+        melhorou = False
+        posicao = {v: k for k, v in enumerate(ordem)}
+        for i in range(1, n + 1):
+            if time.perf_counter() >= limite:
+                break
+            candidatos = []
+            # 2-opt: inverte ordem[i..j] para ligar a parada anterior a i a um vizinho dela
+            for u in proximos[ordem[i - 1]]:
+                if (j := posicao[u]) > i:
+                    candidatos.append([t for t in ((1, i - 1, False), (i, j, True), (j + 1, n, False)) if t[0] <= t[1]])
+            # Or-opt: leva o trecho ordem[i..i+L-1] (direto ou invertido) para junto de um vizinho de suas pontas
+            for tamanho in (1, 2, 3):
+                fim = i + tamanho - 1
+                if fim > n:
+                    break
+                for u in {*proximos[ordem[i]], *proximos[ordem[fim]], 0}:
+                    p = posicao[u]
+                    for invertido in ((False, True) if tamanho > 1 else (False,)):
+                        if p < i - 1:
+                            trechos = ((1, p, False), (i, fim, invertido), (p + 1, i - 1, False), (fim + 1, n, False))
+                        elif p > fim:
+                            trechos = ((1, i - 1, False), (fim + 1, p, False), (i, fim, invertido), (p + 1, n, False))
+                        else:
+                            continue
+                        candidatos.append([t for t in trechos if t[0] <= t[1]])
+            for trechos in candidatos:
+                if (novo := avaliar(trechos)) < custo - 1e-9:
+                    ordem[:] = aplicar(trechos)
+                    chegada, peso, peso_chegada = prefixos()
+                    posicao = {v: k for k, v in enumerate(ordem)}
+                    custo, movimentos, melhorou = novo, movimentos + 1, True
+                    break
+    return ordem[1:], custo, movimentos
+
+# Equipes disponíveis agrupadas por especialização e pela região onde estão (a base até o primeiro despacho;
+# None = localização desconhecida). A escolha percorre as regiões em ordem de distância e para na primeira
+# com equipe livre: o custo depende da vizinhança da ocorrência, não do número de equipes nem de regiões ocupadas
+class PoolEquipes:
+    def __init__(self):
+        self.por_especializacao = {}  # especializacao -> {localizacao: {id: equipe}}
+        self.total = 0
+    
+    def __len__(self): return self.total
+    
+    def __iter__(self):
+        for locais in self.por_especializacao.values():
+            for grupo in locais.values():
+                yield from grupo.values()
+    
+    def adicionar(self, equipe):
+        self.por_especializacao.setdefault(equipe.especializacao, {}).setdefault(equipe.localizacao_atual, {})[equipe.id] = equipe
+        self.total += 1
+    
+    def remover(self, equipe):
+        locais = self.por_especializacao.get(equipe.especializacao, {})
+        grupo = locais.get(equipe.localizacao_atual, {})
+        if grupo.pop(equipe.id, None) is not None:
+            self.total -= 1
+            if not grupo: del locais[equipe.localizacao_atual]
+    
+    # Equipe mais próxima entre as especializações informadas (None = qualquer uma); empate pelo menor id.
+    # `por_distancia` dá (região, distância) em ordem não decrescente; equipes fora dele (localização
+    # desconhecida ou inalcançável) só são escolhidas quando nenhuma alcançável está livre.
+    def mais_proxima(self, por_distancia, especializacoes=None):
+        grupos = [locais for especializacao in (self.por_especializacao if especializacoes is None else especializacoes)
+                  if (locais := self.por_especializacao.get(especializacao))]
+        if not grupos:
+            return None
+        melhor, limite = None, None
+        if any(local is not None for locais in grupos for local in locais):
+            for local, distancia in por_distancia:
+                if limite is not None and distancia > limite:
+                    break  # Regiões mais distantes que a melhor equipe encontrada
+                for locais in grupos:
+                    if grupo := locais.get(local):
+                        equipe = next(iter(grupo.values()))
+                        if melhor is None or equipe.id < melhor.id:
+                            melhor, limite = equipe, distancia
+        if melhor is not None:
+            return melhor
+        return min((next(iter(grupo.values())) for locais in grupos for grupo in locais.values()), key=lambda e: e.id)
+
+# Faixas de severidade do índice secundário: (limite inferior, nome), da mais grave para a mais leve
+FAIXAS_SEVERIDADE = ((8, "CRITICA"), (6, "ALTA"), (4, "MODERADA"), (0, "BAIXA"))
+
+# Tabela pré-calculada para as severidades válidas (1-10); demais valores caem na busca linear
+_FAIXA_POR_SEVERIDADE = [next((nome for limite, nome in FAIXAS_SEVERIDADE if s >= limite), "BAIXA") for s in range(11)]
+
+def faixa_severidade(severidade):
+    if type(severidade) is int and 0 <= severidade <= 10:
+        return _FAIXA_POR_SEVERIDADE[severidade]
+    return next((nome for limite, nome in FAIXAS_SEVERIDADE if severidade >= limite), "BAIXA")
+
+# Índices secundários das ocorrências ativas (por região, status e faixa de severidade) e agregados
+# por região (quantidade e soma das severidades), todos atualizados em O(1) a cada mudança
+class IndicesOcorrencias:
+    def __init__(self):
+        self.por_regiao, self.por_status, self.por_faixa, self.agregados = {}, {}, {}, {}
+    
+    # Campos lidos uma vez só: nas ocorrências colunares cada leitura é uma propriedade
+    def adicionar(self, ocorrencia):
+        id_ocorrencia, regiao, severidade = ocorrencia.id, ocorrencia.regiao, ocorrencia.severidade
+        self.por_regiao.setdefault(regiao, {})[id_ocorrencia] = ocorrencia
+        self.por_status.setdefault(ocorrencia.status, {})[id_ocorrencia] = ocorrencia
+        self.por_faixa.setdefault(faixa_severidade(severidade), {})[id_ocorrencia] = ocorrencia
+        agregado = self.agregados.setdefault(regiao, {'ativas': 0, 'total_severidade': 0})
+        agregado['ativas'] += 1
+        agregado['total_severidade'] += severidade
+    
+    def remover(self, ocorrencia):
+        id_ocorrencia, regiao, severidade = ocorrencia.id, ocorrencia.regiao, ocorrencia.severidade
+        self._descartar(self.por_regiao, regiao, id_ocorrencia)
+        self._descartar(self.por_status, ocorrencia.status, id_ocorrencia)
+        self._descartar(self.por_faixa, faixa_severidade(severidade), id_ocorrencia)
+        agregado = self.agregados[regiao]
+        agregado['ativas'] -= 1
+        agregado['total_severidade'] -= severidade
+        if not agregado['ativas']: del self.agregados[regiao]
+    
+    def alterar_status(self, ocorrencia, status_anterior):
+        self._descartar(self.por_status, status_anterior, ocorrencia.id)
+        self.por_status.setdefault(ocorrencia.status, {})[ocorrencia.id] = ocorrencia
+    
+    def alterar_severidade(self, ocorrencia, severidade_anterior):
+        self._descartar(self.por_faixa, faixa_severidade(severidade_anterior), ocorrencia.id)
+        self.por_faixa.setdefault(faixa_severidade(ocorrencia.severidade), {})[ocorrencia.id] = ocorrencia
+        self.agregados[ocorrencia.regiao]['total_severidade'] += ocorrencia.severidade - severidade_anterior
+    
+    @staticmethod
+    def consultar(indice, chave): return list(indice.get(chave, {}).values())
+    
+    @staticmethod
+    def _descartar(indice, chave, id_ocorrencia):
+        grupo = indice.get(chave)
+        if grupo is not None:
+            grupo.pop(id_ocorrencia, None)
+            if not grupo: del indice[chave]
+
+# Diário de operações (write-ahead log): uma linha JSON por operação, [lsn, tipo, instante em µs, argumentos...].
+# As linhas são confirmadas em grupo (uma escrita + fsync a cada `lote_sync` operações ou quando a próxima
+# operação chega após `intervalo_sync` segundos); no pior caso perde-se esse último grupo. O snapshot é gravado
+# de forma atômica (arquivo temporário + os.replace) e permite truncar o diário. Uma linha final incompleta,
+# deixada por uma escrita interrompida, é descartada na recuperação.
+class DiarioOperacoes:
+    def __init__(self, diretorio, lote_sync=256, intervalo_sync=0.05, snapshot_a_cada=100000):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.caminho_diario = os.path.join(diretorio, 'operacoes.log')
+        self.caminho_snapshot = os.path.join(diretorio, 'snapshot.json')
+        self.lote_sync, self.intervalo_sync, self.snapshot_a_cada = lote_sync, intervalo_sync, snapshot_a_cada
+        self.arquivo, self.pendentes, self.lsn, self.desde_snapshot = None, [], 0, 0
+        self.ultimo_sync, self.tamanho_valido = time.monotonic(), None
+    
+    def ler_snapshot(self):
+        if not os.path.exists(self.caminho_snapshot):
+            return None
+        with open(self.caminho_snapshot, encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+        self.lsn = estado['lsn']
+        return estado
+    
+    # Registros com lsn posterior ao do snapshot, na ordem em que foram gravados
+    def ler_registros(self, apos_lsn=0):
+        self.tamanho_valido = 0
+        if not os.path.exists(self.caminho_diario):
+            return
+        with open(self.caminho_diario, 'rb') as arquivo:
+            # Blocos de ~1 MiB de linhas decodificados numa única chamada ao json; um bloco com linha inválida
+            # (só a última pode estar incompleta) é relido linha a linha até o ponto da interrupção
+            while linhas := arquivo.readlines(1 << 20):
+                try:
+                    if not linhas[-1].endswith(b'\n'):
+                        raise ValueError("linha incompleta")
+                    registros = json.loads(b'[' + b','.join(linhas) + b']')
+                    if len(registros) != len(linhas):
+                        raise ValueError("bloco inconsistente")
+                except ValueError:
+                    registros = []
+                    for linha in linhas:
+                        try:
+                            if not linha.endswith(b'\n'):
+                                raise ValueError("linha incompleta")
+                            registros.append(json.loads(linha.decode('utf-8')))
+                        except ValueError:
+                            break
+                self.tamanho_valido += sum(map(len, linhas[:len(registros)]))
+                for registro in registros:
+                    if registro[0] > apos_lsn:
+                        self.lsn, self.desde_snapshot = registro[0], self.desde_snapshot + 1
+                        yield registro
+                if len(registros) < len(linhas):
+                    return  # Escrita interrompida: o restante é descartado ao reabrir o diário
+    
+    def abrir(self):
+        self.arquivo = open(self.caminho_diario, 'ab')
+        if self.tamanho_valido is not None:
+            self.arquivo.truncate(self.tamanho_valido)
+    
+    def registrar(self, tipo, instante, *argumentos):
+        self.lsn += 1
+        self.desde_snapshot += 1
+        self.pendentes.append(json.dumps([self.lsn, tipo, instante, *argumentos], ensure_ascii=False, separators=(',', ':')))
+        if len(self.pendentes) >= self.lote_sync or time.monotonic() - self.ultimo_sync >= self.intervalo_sync:
+            self.sincronizar()
+    
+    def sincronizar(self):
+        if self.pendentes:
+            self.arquivo.write(('\n'.join(self.pendentes) + '\n').encode('utf-8'))
+            self.pendentes.clear()
+            self.arquivo.flush()
+            os.fsync(self.arquivo.fileno())
+        self.ultimo_sync = time.monotonic()
+    
+    def precisa_snapshot(self): return self.desde_snapshot >= self.snapshot_a_cada
+    
+    def gravar_snapshot(self, estado):
+        self.sincronizar()
+        estado['lsn'] = self.lsn
+        temporario = self.caminho_snapshot + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(estado, ensure_ascii=False, separators=(',', ':')))  # dumps usa o codificador em C
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho_snapshot)
+        # Tudo até o lsn do snapshot já está nele; se a truncagem não ocorrer, a recuperação pula essas linhas
+        self.arquivo.truncate(0)
+        os.fsync(self.arquivo.fileno())
+        self.desde_snapshot = 0
+    
+    def fechar(self):
+        if self.arquivo:
+            self.sincronizar()
+            self.arquivo.close()
+            self.arquivo = None
+
+# Acervo colunar, só de acréscimo, das ocorrências resolvidas. As linhas entram numa cauda em memória
+# (um array por coluna) e são gravadas em blocos; cada bloco guarda cada coluna num segmento contíguo,
+# opcionalmente comprimido com zlib, e o índice (JSON) é regravado de forma atômica a cada bloco.
+# As consultas percorrem bloco a bloco apenas as colunas necessárias, vetorizadas com NumPy quando
+# disponível, sem criar objetos Python por linha. Sem diretório, os blocos ficam num buffer em memória.
+class AcervoOcorrencias:
+    COLUNAS = (('id', 'q'), ('regiao', 'i'), ('severidade', 'B'), ('latitude', 'd'), ('longitude', 'd'),
+               ('criada_em', 'q'), ('despachada_em', 'q'), ('resolvida_em', 'q'), ('equipe', 'i'))
+    TIPOS = dict(COLUNAS)
+    LINHAS_POR_BLOCO = 65536
+    
+    def __init__(self, diretorio=None, comprimir=False, linhas_por_bloco=LINHAS_POR_BLOCO):
+        self.diretorio, self.comprimir, self.linhas_por_bloco = diretorio, comprimir, linhas_por_bloco
+        self.regioes, self.codigos_regiao = [], {}
+        self.blocos, self.linhas_gravadas, self.ordem_bytes = [], 0, sys.byteorder
+        self._nova_cauda()
+        if not diretorio:
+            self.dados = io.BytesIO()
+            return
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho_indice = os.path.join(diretorio, 'indice.json')
+        self.dados = open(os.path.join(diretorio, 'dados.bin'), 'a+b')
+        if os.path.exists(self.caminho_indice):
+            with open(self.caminho_indice, encoding='utf-8') as arquivo:
+                indice = json.load(arquivo)
+            self.regioes, self.blocos, self.ordem_bytes = indice['regioes'], indice['blocos'], indice['ordem_bytes']
+            self.codigos_regiao = {regiao: codigo for codigo, regiao in enumerate(self.regioes)}
+            self.linhas_gravadas = sum(bloco['linhas'] for bloco in self.blocos)
+        self.dados.truncate(self._fim_dos_blocos())  # Descarta um bloco gravado pela metade (sem índice)
+    
+    def __len__(self): return self.linhas_gravadas + len(self.cauda['id'])
+    
+    def arquivar(self, ocorrencia, resolvida_em):
+        cauda = self.cauda
+        id_ocorrencia, regiao, severidade, latitude, longitude, criada_em, despachada_em, equipe = ocorrencia.valores_colunas()
+        codigo = self.codigos_regiao.get(regiao, len(self.regioes))
+        # A linha inteira é convertida antes de tocar na cauda: um valor inválido não deixa colunas desalinhadas
+        linha = [array(tipo, (valor,)) for (_, tipo), valor in zip(self.COLUNAS, (
+            id_ocorrencia, codigo, severidade, latitude, longitude, criada_em, despachada_em, para_microssegundos(resolvida_em), equipe))]
+        acoes = json.dumps(ocorrencia.listar_acoes(), ensure_ascii=False)
+        if codigo == len(self.regioes):
+            self.codigos_regiao[regiao] = codigo
+            self.regioes.append(regiao)
+        for (nome, _), valor in zip(self.COLUNAS, linha):
+            cauda[nome] += valor
+        self.cauda_acoes.append(acoes)
+        if len(cauda['id']) >= self.linhas_por_bloco:
+            self.descarregar()
+    
+    # Grava a cauda como um novo bloco (pode ser parcial: usado antes de snapshots e ao fechar)
+    def descarregar(self):
+        linhas = len(self.cauda['id'])
+        if not linhas:
+            return
+        bloco = {'linhas': linhas, 'zlib': self.comprimir, 'segmentos': {}}
+        self.dados.seek(0, os.SEEK_END)
+        # As ações (listas JSON, sem quebras de linha literais) formam um segmento de texto separado por '\n'
+        conteudos = [(nome, self.cauda[nome].tobytes()) for nome, _ in self.COLUNAS]
+        conteudos.append(('acoes', '\n'.join(self.cauda_acoes).encode('utf-8')))
+        for nome, conteudo in conteudos:
+            if self.comprimir:
+                conteudo = zlib.compress(conteudo)
+            bloco['segmentos'][nome] = [self.dados.tell(), len(conteudo)]
+            self.dados.write(conteudo)
+        self.blocos.append(bloco)
+        self.linhas_gravadas += linhas
+        self._nova_cauda()
+        self._gravar_indice()
+    
+    # Mantém apenas as primeiras `linhas` (usado na recuperação, antes de refazer o diário)
+    def truncar(self, linhas):
+        if linhas >= len(self):
+            return
+        self._nova_cauda()
+        while self.blocos and self.linhas_gravadas - self.blocos[-1]['linhas'] >= linhas:
+            self.linhas_gravadas -= self.blocos.pop()['linhas']
+        if self.linhas_gravadas > linhas:
+            bloco = self.blocos.pop()
+            self.linhas_gravadas -= bloco['linhas']
+            manter = linhas - self.linhas_gravadas
+            for nome, _ in self.COLUNAS:
+                self.cauda[nome] = self._ler_coluna(bloco, nome)[:manter]
+            self.cauda_acoes = self._ler_acoes(bloco)[:manter]
+        self.dados.truncate(self._fim_dos_blocos())
+        self._gravar_indice()
+        self.descarregar()
     
-    def registrar_acao(self, acao):
-        self.historico_acoes.inserir_inicio({
-            'timestamp': datetime.datetime.now(),
-            'acao': acao,
-            'equipe_id': self.id
-        })
+    def fechar(self):
+        if self.diretorio:
+            self.descarregar()
+            self.dados.close()
+    
+    # Colunas pedidas, bloco a bloco, como arrays (a cauda é entregue sem cópia; não arquive durante o percurso)
+    def iterar_blocos(self, colunas):
+        for bloco in self.blocos:
+            yield {nome: self._ler_coluna(bloco, nome) for nome in colunas}
+        if self.cauda['id']:
+            yield {nome: self.cauda[nome] for nome in colunas}
+    
+    # Por região: quantidade resolvida e severidade média/mínima/máxima (janela sobre o instante de resolução)
+    def resumo_por_regiao(self, inicio=None, fim=None):
+        total_regioes = len(self.regioes)
+        contagem, soma = [0] * total_regioes, [0] * total_regioes
+        minima, maxima = [None] * total_regioes, [None] * total_regioes
+        if np is not None:
+            contagem, soma = np.zeros(total_regioes, dtype=np.int64), np.zeros(total_regioes)
+            limites = np.iinfo(self.TIPOS['severidade'])  # Sentinelas pelo tipo da coluna ('B': 0 a 255)
+            minima, maxima = np.full(total_regioes, limites.max, dtype=np.int64), np.full(total_regioes, limites.min, dtype=np.int64)
+            for vetores in self._vetores(('regiao', 'severidade'), inicio, fim):
+                regioes, severidades = vetores['regiao'], vetores['severidade']
+                contagem += np.bincount(regioes, minlength=total_regioes)
+                soma += np.bincount(regioes, weights=severidades, minlength=total_regioes)
+                np.minimum.at(minima, regioes, severidades)
+                np.maximum.at(maxima, regioes, severidades)
+        else:
+            for codigo, severidade in self._linhas(('regiao', 'severidade'), inicio, fim):
+                contagem[codigo] += 1
+                soma[codigo] += severidade
+                minima[codigo] = severidade if minima[codigo] is None else min(minima[codigo], severidade)
+                maxima[codigo] = severidade if maxima[codigo] is None else max(maxima[codigo], severidade)
+        return {self.regioes[codigo]: {'resolvidas': int(contagem[codigo]), 'severidade_media': float(soma[codigo]) / int(contagem[codigo]),
+                                       'severidade_minima': int(minima[codigo]), 'severidade_maxima': int(maxima[codigo])}
+                for codigo in range(total_regioes) if contagem[codigo]}
+    
+    # Distribuição dos tempos (em minutos) entre a criação e o despacho ('despacho') ou a resolução ('resolucao')
+    def tempos_resposta(self, regiao=None, inicio=None, fim=None, ate='despacho', percentis=(50, 90, 99)):
+        coluna = {'despacho': 'despachada_em', 'resolucao': 'resolvida_em'}[ate]
+        codigo = self.codigos_regiao.get(regiao, -1) if regiao is not None else None
+        if np is not None:
+            partes = []
+            for vetores in self._vetores(('regiao', 'criada_em', coluna), inicio, fim):
+                validos = vetores[coluna] >= 0
+                if codigo is not None:
+                    validos &= vetores['regiao'] == codigo
+                partes.append((vetores[coluna][validos] - vetores['criada_em'][validos]) / 60e6)
+            tempos = np.concatenate(partes) if partes else np.zeros(0)
+            if not len(tempos):
+                return {'amostras': 0, 'media': None, 'percentis': {p: None for p in percentis}}
+            valores = np.percentile(tempos, percentis)
+            return {'amostras': int(len(tempos)), 'media': float(tempos.mean()),
+                    'percentis': {p: float(v) for p, v in zip(percentis, valores)}}
+        
+        tempos = sorted((final - criada) / 60e6 for codigo_linha, criada, final in self._linhas(('regiao', 'criada_em', coluna), inicio, fim)
+                        if final >= 0 and (codigo is None or codigo_linha == codigo))
+        if not tempos:
+            return {'amostras': 0, 'media': None, 'percentis': {p: None for p in percentis}}
+        return {'amostras': len(tempos), 'media': sum(tempos) / len(tempos),
+                'percentis': {p: self._percentil(tempos, p) for p in percentis}}
+    
+    # Ocorrências resolvidas por período (alinhado a 1970), opcionalmente de uma região
+    def contagem_por_periodo(self, intervalo=datetime.timedelta(days=1), inicio=None, fim=None, regiao=None):
+        passo = intervalo // MICROSSEGUNDO
+        codigo = self.codigos_regiao.get(regiao, -1) if regiao is not None else None
+        contagens = {}
+        if np is not None:
+            for vetores in self._vetores(('regiao', 'resolvida_em'), inicio, fim):
+                instantes = vetores['resolvida_em'] if codigo is None else vetores['resolvida_em'][vetores['regiao'] == codigo]
+                periodos, quantidades = np.unique(instantes // passo, return_counts=True)
+                for periodo, quantidade in zip(periodos.tolist(), quantidades.tolist()):
+                    contagens[periodo] = contagens.get(periodo, 0) + quantidade
+        else:
+            for codigo_linha, instante in self._linhas(('regiao', 'resolvida_em'), inicio, fim):
+                if codigo is None or codigo_linha == codigo:
+                    contagens[instante // passo] = contagens.get(instante // passo, 0) + 1
+        return [(de_microssegundos(periodo * passo), contagens[periodo]) for periodo in sorted(contagens)]
+    
+    @staticmethod
+    def _percentil(ordenados, p):  # Interpolação linear, como o padrão de np.percentile
+        posicao = (len(ordenados) - 1) * p / 100
+        abaixo = int(posicao)
+        acima = min(abaixo + 1, len(ordenados) - 1)
+        return ordenados[abaixo] + (ordenados[acima] - ordenados[abaixo]) * (posicao - abaixo)
+    
+    def _limites(self, inicio, fim):
+        return (None if inicio is None else para_microssegundos(inicio), None if fim is None else para_microssegundos(fim))
+    
+    def _vetores(self, colunas, inicio, fim):
+        minimo, maximo = self._limites(inicio, fim)
+        for bloco in self.iterar_blocos(set(colunas) | {'resolvida_em'}):
+            vetores = {nome: np.frombuffer(valores, dtype=valores.typecode) for nome, valores in bloco.items()}
+            mascara, instantes = None, vetores['resolvida_em']
+            if minimo is not None:
+                mascara = instantes >= minimo
+            if maximo is not None:
+                mascara = (instantes < maximo) if mascara is None else mascara & (instantes < maximo)
+            yield vetores if mascara is None else {nome: vetor[mascara] for nome, vetor in vetores.items()}
+    
+    def _linhas(self, colunas, inicio, fim):
+        minimo, maximo = self._limites(inicio, fim)
+        for bloco in self.iterar_blocos(tuple(colunas) + ('resolvida_em',)):
+            for linha in zip(*(bloco[nome] for nome in colunas), bloco['resolvida_em']):
+                if (minimo is None or linha[-1] >= minimo) and (maximo is None or linha[-1] < maximo):
+                    yield linha[:-1]
+    
+    def _nova_cauda(self):
+        self.cauda, self.cauda_acoes = {nome: array(tipo) for nome, tipo in self.COLUNAS}, []
+    
+    def _fim_dos_blocos(self):
+        return max((posicao + tamanho for bloco in self.blocos for posicao, tamanho in bloco['segmentos'].values()), default=0)
+    
+    def _ler_segmento(self, bloco, nome):
+        posicao, tamanho = bloco['segmentos'][nome]
+        self.dados.seek(posicao)
+        conteudo = self.dados.read(tamanho)
+        return zlib.decompress(conteudo) if bloco['zlib'] else conteudo
+    
+    def _ler_coluna(self, bloco, nome):
+        valores = array(self.TIPOS[nome])
+        valores.frombytes(self._ler_segmento(bloco, nome))
+        if self.ordem_bytes != sys.byteorder:
+            valores.byteswap()
+        return valores
+    
+    def _ler_acoes(self, bloco):
+        return self._ler_segmento(bloco, 'acoes').decode('utf-8').split('\n')
+    
+    def _gravar_indice(self):
+        if not self.diretorio:
+            return
+        self.dados.flush()
+        os.fsync(self.dados.fileno())
+        temporario = self.caminho_indice + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'versao': 1, 'ordem_bytes': self.ordem_bytes, 'regioes': self.regioes, 'blocos': self.blocos}, arquivo, ensure_ascii=False)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho_indice)
+
+# Agregados em janelas deslizantes por região (por padrão, últimos 15 min, 1 h e 24 h). Cada janela é um anel
+# de baldes de tempo com contagem e soma por tipo de evento: registrar custa O(janelas), consultar O(baldes) e
+# a memória é fixa por região ativa, independente do volume de eventos. A borda antiga de cada janela tem a
+# resolução de um balde (duração / baldes). Eventos podem ser retirados (quantidade negativa) enquanto o
+# balde deles ainda está no anel, o que permite acompanhar o desfazer.
+class JanelasDeslizantes:
+    EVENTOS = ('novas', 'despachos', 'resolucoes')
+    JANELAS_PADRAO = (datetime.timedelta(minutes=15), datetime.timedelta(hours=1), datetime.timedelta(hours=24))
+    _INDICE_EVENTO = {evento: i for i, evento in enumerate(EVENTOS)}
+
+    def __init__(self, janelas=JANELAS_PADRAO, baldes=60, relogio=None):
+        self.janelas, self.baldes = tuple(janelas), baldes
+        self.relogio = relogio or relogio_sistema  # "Agora" das consultas sem instante explícito
+        self.larguras = [max(1, janela // MICROSSEGUNDO // baldes) for janela in self.janelas]  # µs por balde
+        self.rotulos = [self.rotulo(janela) for janela in self.janelas]
+        self.regioes = {}  # regiao → por janela: (µs por balde, épocas dos baldes, contagens, somas); eventos em faixas de `baldes`
+
+    def __len__(self): return len(self.regioes)
+
+    @staticmethod
+    def rotulo(janela):
+        minutos = janela // MINUTO
+        if minutos > 1440 and not minutos % 1440: return f"{minutos // 1440}d"
+        if minutos >= 60 and not minutos % 60: return f"{minutos // 60}h"
+        return f"{minutos}min"
+
+    def _aneis(self, regiao):
+        total = len(self.EVENTOS) * self.baldes
+        aneis = self.regioes[regiao] = [(largura, array('q', [-1]) * self.baldes, array('q', bytes(8 * total)), array('d', bytes(8 * total)))
+                                        for largura in self.larguras]
+        return aneis
+
+    # Conta um evento (valor: duração em minutos, somada para as médias) no balde do instante em cada janela
+    def registrar(self, evento, regiao, instante, valor=0.0, quantidade=1):
+        n, microssegundos = self.baldes, (instante - EPOCA) // MICROSSEGUNDO
+        deslocamento = self._INDICE_EVENTO[evento] * n
+        for largura, epocas, contagens, somas in self.regioes.get(regiao) or self._aneis(regiao):
+            balde = microssegundos // largura
+            posicao = balde % n
+            if epocas[posicao] != balde:
+                if quantidade < 0 or epocas[posicao] > balde:  # Balde já reciclado: evento fora da janela
+                    continue
+                epocas[posicao] = balde
+                for i in range(posicao, len(contagens), n):
+                    contagens[i], somas[i] = 0, 0.0
+            contagens[deslocamento + posicao] += quantidade
+            if valor: somas[deslocamento + posicao] += valor * quantidade
+
+    # {rótulo da janela: {evento: (contagem, soma)}} somando as regiões pedidas (None = todas)
+    def _totais(self, regioes, agora):
+        microssegundos, n, eventos = para_microssegundos(agora), self.baldes, len(self.EVENTOS)
+        totais = {rotulo: [[0, 0.0] for _ in self.EVENTOS] for rotulo in self.rotulos}
+        for regiao in regioes:
+            if not (aneis := self.regioes.get(regiao)):
+                continue
+            for rotulo, (largura, epocas, contagens, somas) in zip(self.rotulos, aneis):
+                atual = microssegundos // largura
+                por_evento = totais[rotulo]
+                for posicao, epoca in enumerate(epocas):
+                    if atual - n < epoca <= atual:
+                        for e in range(eventos):
+                            por_evento[e][0] += contagens[e * n + posicao]
+                            por_evento[e][1] += somas[e * n + posicao]
+        return totais
+
+    # Taxas e médias por janela: novas ocorrências (total e por hora), despachos e resoluções com o tempo médio
+    # (minutos desde a criação da ocorrência); médias ficam None quando não houve eventos na janela
+    def resumo(self, regiao=None, agora=None):
+        totais = self._totais(self.regioes if regiao is None else (regiao,), agora or self.relogio())
+        resultado = {}
+        for janela, rotulo in zip(self.janelas, self.rotulos):
+            (novas, _), (despachos, soma_despacho), (resolucoes, soma_resolucao) = totais[rotulo]
+            resultado[rotulo] = {'novas': novas, 'novas_por_hora': novas / (janela / datetime.timedelta(hours=1)),
+                                 'despachos': despachos, 'tempo_medio_despacho_min': soma_despacho / despachos if despachos else None,
+                                 'resolucoes': resolucoes, 'tempo_medio_resolucao_min': soma_resolucao / resolucoes if resolucoes else None}
+        return resultado
+
+    def resumo_por_regiao(self, agora=None):
+        agora = agora or self.relogio()
+        self.podar(agora)
+        return {regiao: self.resumo(regiao, agora) for regiao in self.regioes}
+
+    # Descarta regiões sem nenhum balde dentro da janela mais longa (memória proporcional às regiões ativas)
+    def podar(self, agora):
+        microssegundos, n = para_microssegundos(agora), self.baldes
+        longa = max(range(len(self.janelas)), key=lambda i: self.janelas[i])
+        for regiao in [r for r, aneis in self.regioes.items() if max(aneis[longa][1]) <= microssegundos // self.larguras[longa] - n]:
+            del self.regioes[regiao]
+
+    # Estado para o snapshot (só é restaurado com a mesma configuração de janelas e baldes)
+    def estado(self):
+        return {'janelas': [janela // MICROSSEGUNDO for janela in self.janelas], 'baldes': self.baldes,
+                'regioes': {regiao: [[anel.tolist() for anel in aneis_janela[1:]] for aneis_janela in aneis] for regiao, aneis in self.regioes.items()}}
+
+    def restaurar(self, estado):
+        if not estado or estado['janelas'] != [janela // MICROSSEGUNDO for janela in self.janelas] or estado['baldes'] != self.baldes:
+            return False
+        self.regioes = {regiao: [(largura, array('q', epocas), array('q', contagens), array('d', somas))
+                                 for largura, (epocas, contagens, somas) in zip(self.larguras, aneis)]
+                        for regiao, aneis in estado['regioes'].items()}
+        return True
+
+def _minutos(valor): return "–" if valor is None else f"{valor:.1f} min"
+
+# Planejamento de múltiplas bases: cada base é uma busca de fonte única independente das demais. Os processos
+# auxiliares abrem o mapa via mmap (GrafoCompacto.abrir), compartilhando as páginas do arquivo sem copiá-lo.
+_planejamento = {}
+
+def _iniciar_planejamento(caminho_mapa, alvos, caminhos):
+    _planejamento.update(grafo=GrafoCompacto.abrir(caminho_mapa, saida=SaidaNula(), capacidade_cache=0), alvos=alvos, caminhos=caminhos)
+
+# Nos processos os caminhos voltam como ids (array compacto de serializar); o processo principal traduz os nomes
+def _planejar_bases_processo(bases):
+    return [_planejar_base(_planejamento['grafo'], base, _planejamento['alvos'], _planejamento['caminhos'], ids=True) for base in bases]
+
+# Regiões alvo alcançáveis a partir da base, ordenadas por score (desempate pelo nome da região)
+def _planejar_base(grafo, base, alvos, caminhos, ids=False):
+    arvore, rotas = grafo.arvore_caminhos(base), []
+    for regiao, ocorrencias, severidade_media in alvos:
+        if regiao == base or (distancia := arvore[0].get(grafo._chave(regiao))) is None:
+            continue
+        rota = {'regiao': regiao, 'distancia': distancia, 'ocorrencias': ocorrencias, 'severidade_media': severidade_media,
+                'score': severidade_media * 10 - distancia}
+        if caminhos:
+            rota['caminho'] = array('i', grafo._caminho_chaves(arvore[1], grafo._chave(regiao))) if ids else grafo.caminho_ate(arvore, regiao)[0]
+        rotas.append(rota)
+    rotas.sort(key=lambda rota: (-rota['score'], rota['regiao']))
+    return rotas
 
 # Sistema principal IVERN
 class SistemaIVERN:
-    def __init__(self):
+    def __init__(self, saida=None, diretorio_historico=None, diretorio_dados=None, metricas=None, relogio=None):
         # Estruturas de dados principais
-        self.fila_prioridade, self.pilha_desfazer, self.fila_processamento = [], deque(), deque()
-        self.arvore_regioes, self.grafo_regioes = ArvoreRegiao(), GrafoRegioes()
+        self.saida = saida or SaidaConsole()  # Destino das mensagens (console, buffer, eventos ou nula)
+        self.relogio = relogio or relogio_sistema  # Fonte de "agora" de todo o sistema (ver RelogioVirtual)
+        self.metricas = MetricasNulas()  # Instrumentação opcional (ver ativar_metricas)
+        self.diretorio_historico = diretorio_historico  # Segmentos de histórico das equipes (None = temporários)
+        self.diario, self.mapa_carregado, self._instante_fixo = None, None, None  # Persistência (ver _recuperar)
+        self.fila_prioridade = HeapIndexado(Ocorrencia.chave_prioridade)  # Apenas ocorrências pendentes
+        self.pilha_desfazer, self.fila_processamento = deque(), deque()  # fila_processamento: ids em ordem de chegada
+        self.arvore_regioes, self.grafo_regioes = ArvoreRegiao(), GrafoRegioes(self.saida)
         self.ocorrencias_ativas, self.equipes, self.regioes_risco = {}, {}, {}
+        self.indice_espacial = IndiceEspacial()  # Coordenadas das ocorrências ativas
+        self.indices = IndicesOcorrencias()  # Índices por região, status e severidade
+        self.equipes_disponiveis = PoolEquipes()  # Equipes livres por especialização e localização
+        self.atendimentos = {}  # id da equipe -> id da última ocorrência que ela assumiu (conferido na leitura)
         self.proximo_id_ocorrencia, self.proximo_id_equipe = 1, 1
+        if diretorio_dados and not isinstance(diretorio_dados, DiarioOperacoes):  # Caminho ou DiarioOperacoes já configurado
+            diretorio_dados = DiarioOperacoes(diretorio_dados)
+        # Ocorrências resolvidas (colunar); em memória quando não há diretório de dados
+        self.acervo = AcervoOcorrencias(os.path.join(diretorio_dados.diretorio, 'acervo') if diretorio_dados else None)
+        self.armazem = ArmazemOcorrencias(self._agora)  # Colunas compactas com os campos de todas as ocorrências do sistema
+        self.janelas = JanelasDeslizantes(relogio=self._agora)  # Taxas recentes por região (novas, despachos, resoluções)
         self._inicializar_sistema()
+        if diretorio_dados:
+            self._recuperar(diretorio_dados)
+        if metricas:  # True ou uma instância de Metricas; a recuperação acima não é medida
+            self.ativar_metricas(None if metricas is True else metricas)
     
     # Configuração inicial do sistema com equipes, regiões e conexões
     def _inicializar_sistema(self):
         # Criação das equipes padrão
-        for nome, esp in [("Brigada Florestal Alpha", "TERRESTRE"), ("Squadrão Aéreo Beta", "AEREA"), ("Equipe Resgate Gamma", "RESGATE")]:
-            self.adicionar_equipe(nome, esp)
+        for nome, esp, base in [("Brigada Florestal Alpha", "TERRESTRE", "Cerrado Central"), ("Squadrão Aéreo Beta", "AEREA", "Amazônia Norte"),
+                                ("Equipe Resgate Gamma", "RESGATE", "Mata Atlântica Sul")]:
+            self.adicionar_equipe(nome, esp, base)
         
         # Configuração das regiões com níveis de risco
         for regiao, prioridade in [("Mata Atlântica Sul", 8), ("Cerrado Central", 6), ("Amazônia Norte", 9), ("Pantanal", 7), ("Caatinga", 5)]:
@@ -229,47 +2251,214 @@ class SistemaIVERN:
     
     # Inserção de nova ocorrência com priorização automática
     def inserir_nova_ocorrencia(self, regiao, severidade, coordenadas, descricao=""):
-        ocorrencia = Ocorrencia(self.proximo_id_ocorrencia, regiao, severidade, coordenadas, descricao)
-        heapq.heappush(self.fila_prioridade, ocorrencia)  # Heap para priorização
-        self.fila_processamento.append(ocorrencia)
-        self.ocorrencias_ativas[ocorrencia.id] = ocorrencia
+        if not 1 <= severidade <= 10:
+            self.saida.emitir('SEVERIDADE_INVALIDA', "❌ Severidade deve estar entre 1 e 10", severidade=severidade)
+            return None
+        agora = self._agora()
+        ocorrencia = Ocorrencia(self.proximo_id_ocorrencia, regiao, severidade, coordenadas, descricao, agora, self.armazem)
+        self._ativar_ocorrencia(ocorrencia)
+        self.janelas.registrar('novas', regiao, agora)
+        self.fila_processamento.append(ocorrencia.id)
         self.pilha_desfazer.append(('INSERIR_OCORRENCIA', ocorrencia.id))
         self.proximo_id_ocorrencia += 1
-        print(f"✅ Nova ocorrência registrada: {ocorrencia}")
+        self._registrar_operacao('I', agora, regiao, severidade, *coordenadas, descricao)
+        self.saida.emitir('OCORRENCIA_INSERIDA', "✅ Nova ocorrência registrada: {ocorrencia}", ocorrencia=ocorrencia)
         return ocorrencia.id
     
+    # Ingestão em lote (tuplas, dicts ou fluxo CSV/NDJSON) com um único heapify e um único registro de desfazer
+    def inserir_ocorrencias_em_lote(self, fonte, formato=None, silencioso=False):
+        agora, primeiro_id = self._agora(), self.proximo_id_ocorrencia
+        novas, rejeitadas, por_regiao = [], [], {}
+        
+        for linha, registro in enumerate(self._ler_registros_lote(fonte, formato), 1):
+            try:
+                regiao, severidade, coordenadas, descricao = self._normalizar_registro(registro)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                rejeitadas.append((linha, str(e)))
+                continue
+            novas.append(Ocorrencia(primeiro_id + len(novas), regiao, severidade, coordenadas, descricao, agora, self.armazem))
+            por_regiao[regiao] = por_regiao.get(regiao, 0) + 1
+        
+        if novas:
+            self._incorporar_ocorrencias(novas)
+            self.pilha_desfazer.append(('INSERIR_LOTE', primeiro_id, self.proximo_id_ocorrencia - 1))
+            self._registrar_operacao('L', agora, [(o.regiao, o.severidade, *o.coordenadas, o.descricao) for o in novas])
+        
+        resumo = {
+            'inseridas': len(novas),
+            'rejeitadas': len(rejeitadas),
+            'ids': (primeiro_id, self.proximo_id_ocorrencia - 1) if novas else None,
+            'por_regiao': por_regiao,
+            'erros': rejeitadas[:20]
+        }
+        if not silencioso:
+            self.saida.emitir('LOTE_INSERIDO', "📥 Lote processado: {inseridas} ocorrências inseridas, {rejeitadas} rejeitadas",
+                              inseridas=resumo['inseridas'], rejeitadas=resumo['rejeitadas'], ids=resumo['ids'])
+        return resumo
+    
+    # Registro em bloco de ocorrências novas (ids consecutivos a partir do próximo id livre)
+    def _incorporar_ocorrencias(self, novas):
+        self.fila_prioridade.inserir_lote(novas)
+        self.fila_processamento.extend(occ.id for occ in novas)
+        self.ocorrencias_ativas.update((occ.id, occ) for occ in novas)
+        por_regiao_instante = {}
+        for occ in novas:
+            occ.ativa = True
+            self.indice_espacial.inserir(occ.id, occ.coordenadas)
+            self.indices.adicionar(occ)
+            chave = (occ.regiao, occ.timestamp)
+            por_regiao_instante[chave] = por_regiao_instante.get(chave, 0) + 1
+        for (regiao, instante), quantidade in por_regiao_instante.items():
+            self.janelas.registrar('novas', regiao, instante, quantidade=quantidade)
+        self.proximo_id_ocorrencia += len(novas)
+    
+    # Aceita um iterável de registros, um arquivo aberto ou o caminho de um arquivo .csv/.ndjson. Arquivo aberto
+    # sem formato: NDJSON se a primeira linha não vazia começa com '{', senão CSV com cabeçalho
+    def _ler_registros_lote(self, fonte, formato):
+        if isinstance(fonte, str):
+            formato = formato or ('csv' if fonte.lower().endswith('.csv') else 'ndjson')
+            with open(fonte, encoding='utf-8', newline='') as arquivo:
+                yield from self._ler_registros_lote(arquivo, formato)
+            return
+        if formato is None and hasattr(fonte, 'read'):
+            if (primeira := next((linha for linha in fonte if linha.strip()), None)) is None:
+                return
+            formato, fonte = ('ndjson' if primeira.lstrip().startswith('{') else 'csv'), chain((primeira,), fonte)
+        if formato == 'csv':
+            yield from csv.DictReader(fonte)
+        elif formato == 'ndjson':
+            yield from (json.loads(linha) for linha in fonte if linha.strip())
+        else:
+            yield from fonte
+    
+    @staticmethod
+    def _normalizar_registro(registro):
+        if isinstance(registro, dict):
+            coordenadas = registro.get('coordenadas') or (registro['latitude'], registro['longitude'])
+            regiao, severidade, descricao = registro['regiao'], registro['severidade'], registro.get('descricao') or ""
+        else:
+            regiao, severidade, coordenadas = registro[0], registro[1], registro[2]
+            descricao = registro[3] if len(registro) > 3 else ""
+        return regiao, SistemaIVERN._validar_severidade(severidade), (float(coordenadas[0]), float(coordenadas[1])), descricao
+    
+    # Severidade inteira de 1 a 10; textos passam por int(), números fracionários são recusados (int(7.9) daria 7).
+    # O intervalo é conferido antes da conversão: NaN e infinitos caem nele como ValueError, não OverflowError.
+    @staticmethod
+    def _validar_severidade(valor):
+        if isinstance(valor, str):
+            valor = int(valor)
+        if not 1 <= valor <= 10:
+            raise ValueError(f"severidade fora do intervalo 1-10: {valor}")
+        if int(valor) != valor:
+            raise ValueError(f"severidade deve ser um número inteiro: {valor}")
+        return int(valor)
+    
     # Sistema de atendimento baseado em prioridade
     def atender_proxima_ocorrencia(self):
-        if not self.fila_prioridade:
-            print("❌ Não há ocorrências pendentes")
+        if not (ocorrencia := self.fila_prioridade.espiar()):
+            self.saida.emitir('FILA_VAZIA', "❌ Não há ocorrências pendentes")
             return None
         
-        ocorrencia = heapq.heappop(self.fila_prioridade)
         if not (equipe := self._encontrar_melhor_equipe(ocorrencia)):
-            heapq.heappush(self.fila_prioridade, ocorrencia)
-            print("⚠️ Nenhuma equipe disponível no momento")
+            self.saida.emitir('SEM_EQUIPE_DISPONIVEL', "⚠️ Nenhuma equipe disponível no momento", id_ocorrencia=ocorrencia.id)
             return None
         
-        # Atribuição da equipe à ocorrência
-        ocorrencia.status, ocorrencia.equipe_responsavel = "EM_ATENDIMENTO", equipe.id
-        equipe.disponivel = False
-        equipe.registrar_acao(f"Iniciado atendimento da ocorrência {ocorrencia.id} em {ocorrencia.regiao}")
-        self.pilha_desfazer.append(('ATENDER_OCORRENCIA', ocorrencia.id, equipe.id))
-        print(f"🚨 Atendimento iniciado: {ocorrencia} por {equipe.nome}")
+        self._despachar(ocorrencia.id, equipe.id)
         return ocorrencia.id
     
-    # Algoritmo de seleção da melhor equipe baseado em especialização e severidade
+    def _despachar(self, id_ocorrencia, id_equipe):
+        ocorrencia, equipe = self.ocorrencias_ativas[id_ocorrencia], self.equipes[id_equipe]
+        self.fila_prioridade.remover(id_ocorrencia)
+        self.pilha_desfazer.append(('ATENDER_OCORRENCIA', id_ocorrencia, id_equipe, equipe.localizacao_atual))
+        self._iniciar_atendimento(ocorrencia, equipe)
+        self._registrar_operacao('A', None, id_ocorrencia, id_equipe)
+    
+    # Atendimento em lote: as K ocorrências pendentes mais graves são distribuídas entre as equipes livres
+    # pela atribuição de menor custo total (distância no mapa + penalidade por especialização inadequada)
+    def atender_em_lote(self, limite=None):
+        if not self.fila_prioridade:
+            self.saida.emitir('FILA_VAZIA', "❌ Não há ocorrências pendentes")
+            return []
+        if not self.equipes_disponiveis:
+            self.saida.emitir('SEM_EQUIPE_DISPONIVEL', "⚠️ Nenhuma equipe disponível no momento")
+            return []
+        
+        equipes = list(self.equipes_disponiveis)
+        quantidade = min(len(self.fila_prioridade), len(equipes), len(equipes) if limite is None else limite)
+        if quantidade <= 0:
+            return []  # Lote vazio: nada a desfazer nem a registrar no diário
+        ocorrencias = [self.fila_prioridade.extrair() for _ in range(quantidade)]
+        atribuicao = atribuicao_otima(self._custos_atribuicao(ocorrencias, equipes))
+        pares = [(ocorrencia.id, equipes[coluna].id) for ocorrencia, coluna in zip(ocorrencias, atribuicao)]
+        self._despachar_lote(pares)
+        self.saida.emitir('LOTE_ATENDIDO', "🚨 Lote despachado: {atendidas} ocorrências atribuídas a equipes", atendidas=len(pares))
+        return pares
+    
+    def _despachar_lote(self, pares):
+        registros = []
+        for id_ocorrencia, id_equipe in pares:
+            ocorrencia, equipe = self.ocorrencias_ativas[id_ocorrencia], self.equipes[id_equipe]
+            self.fila_prioridade.remover(id_ocorrencia)
+            registros.append((id_ocorrencia, id_equipe, equipe.localizacao_atual))
+            self._iniciar_atendimento(ocorrencia, equipe)
+        self.pilha_desfazer.append(('ATENDER_LOTE', registros))  # Um único registro desfaz o lote inteiro
+        self._registrar_operacao('AL', None, pares)
+    
+    # Custo = distância da equipe até a região (desconhecida/inalcançável vale mais que qualquer rota)
+    # + penalidade proporcional à severidade quando a especialização não é a exigida
+    def _custos_atribuicao(self, ocorrencias, equipes):
+        distancias = {}
+        for regiao in {o.regiao for o in ocorrencias}:
+            for local in {e.localizacao_atual for e in equipes}:
+                distancias[regiao, local] = self.grafo_regioes.distancia(regiao, local) if local is not None else float('inf')
+        finitas = [d for d in distancias.values() if d != float('inf')]
+        penalidade = (max(finitas) if finitas else 0) + 1
+        
+        custos = []
+        for ocorrencia in ocorrencias:
+            exigidas = self._especializacoes_exigidas(ocorrencia)
+            inadequacao = 2 * penalidade * ocorrencia.severidade
+            custos.append([min(distancias[ocorrencia.regiao, e.localizacao_atual], penalidade) +
+                           (0 if exigidas is None or e.especializacao in exigidas else inadequacao) for e in equipes])
+        return custos
+    
+    def _iniciar_atendimento(self, ocorrencia, equipe):
+        agora = self._agora()
+        ocorrencia.equipe_responsavel, ocorrencia.despachada_em = equipe.id, agora
+        self.atendimentos[equipe.id] = ocorrencia.id
+        self.janelas.registrar('despachos', ocorrencia.regiao, agora, (agora - ocorrencia.timestamp) / MINUTO)
+        self._alterar_status(ocorrencia, "EM_ATENDIMENTO")
+        self._alterar_disponibilidade(equipe, False, ocorrencia.regiao)
+        equipe.registrar_acao(f"Iniciado atendimento da ocorrência {ocorrencia.id} em {ocorrencia.regiao}", self._agora())
+        self.saida.emitir('ATENDIMENTO_INICIADO', "🚨 Atendimento iniciado: {ocorrencia} por {equipe.nome}", ocorrencia=ocorrencia, equipe=equipe)
+    
+    # Especializações adequadas à severidade (None = qualquer uma serve)
+    @staticmethod
+    def _especializacoes_exigidas(ocorrencia):
+        return ("AEREA", "TERRESTRE") if ocorrencia.severidade >= 8 else ("TERRESTRE",) if ocorrencia.severidade >= 6 else None
+    
+    # Seleção da equipe disponível mais próxima (distância no mapa) dentre as especializações exigidas
+    # pela severidade; sem equipe especializada livre, vale a mais próxima de qualquer especialização
     def _encontrar_melhor_equipe(self, ocorrencia):
-        equipes_disponiveis = [e for e in self.equipes.values() if e.disponivel]
-        return next((e for e in equipes_disponiveis if 
-                   (ocorrencia.severidade >= 8 and e.especializacao == "AEREA") or
-                   (ocorrencia.severidade >= 6 and e.especializacao == "TERRESTRE")), 
-                   equipes_disponiveis[0] if equipes_disponiveis else None)
+        especializacoes = self._especializacoes_exigidas(ocorrencia)
+        regioes = lambda: self.grafo_regioes.por_distancia(ocorrencia.regiao)
+        return ((especializacoes and self.equipes_disponiveis.mais_proxima(regioes(), especializacoes))
+                or self.equipes_disponiveis.mais_proxima(regioes()))
+    
+    # Toda mudança de disponibilidade/localização de equipe passa por aqui para manter o pool
+    def _alterar_disponibilidade(self, equipe, disponivel, localizacao=None):
+        if equipe.disponivel:
+            self.equipes_disponiveis.remover(equipe)
+        equipe.disponivel = disponivel
+        if localizacao is not None:
+            equipe.localizacao_atual = localizacao
+        if disponivel:
+            self.equipes_disponiveis.adicionar(equipe)
 
     # Registro de ações realizadas pelas equipes
     def registrar_acoes_realizadas(self, id_ocorrencia, acoes):
         if id_ocorrencia not in self.ocorrencias_ativas:
-            print(f"❌ Ocorrência {id_ocorrencia} não encontrada")
+            self.saida.emitir('OCORRENCIA_NAO_ENCONTRADA', "❌ Ocorrência {id_ocorrencia} não encontrada", id_ocorrencia=id_ocorrencia)
             return False
         
         ocorrencia = self.ocorrencias_ativas[id_ocorrencia]
@@ -277,196 +2466,735 @@ class SistemaIVERN:
         
         if ocorrencia.equipe_responsavel:
             for acao in acoes:
-                self.equipes[ocorrencia.equipe_responsavel].registrar_acao(f"Ocorrência {id_ocorrencia}: {acao}")
+                self.equipes[ocorrencia.equipe_responsavel].registrar_acao(f"Ocorrência {id_ocorrencia}: {acao}", self._agora())
         
-        print(f"📝 Ações registradas para ocorrência {id_ocorrencia}")
+        self._registrar_operacao('R', None, id_ocorrencia, list(acoes))
+        self.saida.emitir('ACOES_REGISTRADAS', "📝 Ações registradas para ocorrência {id_ocorrencia}", id_ocorrencia=id_ocorrencia, acoes=acoes)
         return True
     
     def finalizar_ocorrencia(self, id_ocorrencia):
         if id_ocorrencia not in self.ocorrencias_ativas:
-            print(f"❌ Ocorrência {id_ocorrencia} não encontrada")
+            self.saida.emitir('OCORRENCIA_NAO_ENCONTRADA', "❌ Ocorrência {id_ocorrencia} não encontrada", id_ocorrencia=id_ocorrencia)
             return False
         
-        ocorrencia = self.ocorrencias_ativas[id_ocorrencia]
-        ocorrencia.status = "RESOLVIDO"
+        ocorrencia, instante = self.ocorrencias_ativas[id_ocorrencia], self._agora()
+        self._alterar_status(ocorrencia, "RESOLVIDO")
         
         # Liberação da equipe para novos atendimentos
         if ocorrencia.equipe_responsavel:
             equipe = self.equipes[ocorrencia.equipe_responsavel]
-            equipe.disponivel = True
-            equipe.registrar_acao(f"Finalizada ocorrência {id_ocorrencia}")
+            self._alterar_disponibilidade(equipe, True, ocorrencia.regiao)  # Equipe fica no local atendido
+            equipe.registrar_acao(f"Finalizada ocorrência {id_ocorrencia}", instante)
         
-        del self.ocorrencias_ativas[id_ocorrencia]
-        print(f"✅ Ocorrência {id_ocorrencia} finalizada")
+        self._desativar_ocorrencia(id_ocorrencia)
+        self.acervo.arquivar(ocorrencia, instante)
+        self.janelas.registrar('resolucoes', ocorrencia.regiao, instante, (instante - ocorrencia.timestamp) / MINUTO)
+        ocorrencia.liberar()  # Daqui em diante a ocorrência vive só no acervo
+        self._registrar_operacao('F', instante, id_ocorrencia)
+        self.saida.emitir('OCORRENCIA_FINALIZADA', "✅ Ocorrência {id_ocorrencia} finalizada", id_ocorrencia=id_ocorrencia)
         return True
     
-    def listar_historico_equipe(self, id_equipe):
+    # Histórico do mais recente ao mais antigo; com tamanho_pagina, apenas a página pedida é lida
+    def listar_historico_equipe(self, id_equipe, pagina=1, tamanho_pagina=None):
         if id_equipe not in self.equipes:
-            print(f"❌ Equipe {id_equipe} não encontrada")
+            self.saida.emitir('EQUIPE_NAO_ENCONTRADA', "❌ Equipe {id_equipe} não encontrada", id_equipe=id_equipe)
             return []
         
-        historico = self.equipes[id_equipe].historico_acoes.listar()
-        print(f"\n📋 Histórico da {self.equipes[id_equipe].nome}:\n" + "-" * 50)
-        for i, registro in enumerate(historico, 1):
-            print(f"{i}. [{registro['timestamp'].strftime('%d/%m/%Y %H:%M:%S')}] {registro['acao']}")
+        historico_acoes = self.equipes[id_equipe].historico_acoes
+        historico = historico_acoes.pagina(pagina, tamanho_pagina) if tamanho_pagina else historico_acoes.listar()
+        inicio = (pagina - 1) * tamanho_pagina + 1 if tamanho_pagina else 1
+        if self.saida.ativa:
+            self.saida.emitir('TITULO', "\n📋 Histórico da {nome}:\n" + "-" * 50, nome=self.equipes[id_equipe].nome)
+            for i, registro in enumerate(historico, inicio):
+                self.saida.emitir('REGISTRO_HISTORICO', "{i}. [{timestamp:%d/%m/%Y %H:%M:%S}] {acao}", i=i, **registro)
         return historico
     
     def atualizar_status_ocorrencia(self, id_ocorrencia, novo_status):
         if id_ocorrencia not in self.ocorrencias_ativas:
-            print(f"❌ Ocorrência {id_ocorrencia} não encontrada")
+            self.saida.emitir('OCORRENCIA_NAO_ENCONTRADA', "❌ Ocorrência {id_ocorrencia} não encontrada", id_ocorrencia=id_ocorrencia)
             return False
         
         if novo_status not in ["PENDENTE", "EM_ATENDIMENTO", "RESOLVIDO"]:
-            print("❌ Status inválido. Use: PENDENTE, EM_ATENDIMENTO ou RESOLVIDO")
+            self.saida.emitir('STATUS_INVALIDO', "❌ Status inválido. Use: PENDENTE, EM_ATENDIMENTO ou RESOLVIDO", status=novo_status)
             return False
         
         ocorrencia = self.ocorrencias_ativas[id_ocorrencia]
         self.pilha_desfazer.append(('ATUALIZAR_STATUS', id_ocorrencia, ocorrencia.status))
-        ocorrencia.status = novo_status
-        print(f"🔄 Status da ocorrência {id_ocorrencia} atualizado: {ocorrencia.status}")
+        self._alterar_status(ocorrencia, novo_status)
+        self._registrar_operacao('S', None, id_ocorrencia, novo_status)
+        self.saida.emitir('STATUS_ATUALIZADO', "🔄 Status da ocorrência {id_ocorrencia} atualizado: {status}", id_ocorrencia=id_ocorrencia, status=novo_status)
         return True
     
+    # Alteração de severidade com reposicionamento da ocorrência no heap
+    def atualizar_severidade_ocorrencia(self, id_ocorrencia, nova_severidade):
+        if id_ocorrencia not in self.ocorrencias_ativas:
+            self.saida.emitir('OCORRENCIA_NAO_ENCONTRADA', "❌ Ocorrência {id_ocorrencia} não encontrada", id_ocorrencia=id_ocorrencia)
+            return False
+        
+        if not 1 <= nova_severidade <= 10:
+            self.saida.emitir('SEVERIDADE_INVALIDA', "❌ Severidade deve estar entre 1 e 10", severidade=nova_severidade)
+            return False
+        
+        ocorrencia = self.ocorrencias_ativas[id_ocorrencia]
+        self.pilha_desfazer.append(('ATUALIZAR_SEVERIDADE', id_ocorrencia, ocorrencia.severidade))
+        self._alterar_severidade(ocorrencia, nova_severidade)
+        self._registrar_operacao('V', None, id_ocorrencia, nova_severidade)
+        self.saida.emitir('SEVERIDADE_ATUALIZADA', "🔥 Severidade da ocorrência {id_ocorrencia} atualizada: {severidade}",
+                          id_ocorrencia=id_ocorrencia, severidade=nova_severidade)
+        return True
+    
+    # Registro e remoção de uma ocorrência em todas as estruturas de ocorrências ativas
+    def _ativar_ocorrencia(self, ocorrencia):
+        self.ocorrencias_ativas[ocorrencia.id], ocorrencia.ativa = ocorrencia, True
+        self.indice_espacial.inserir(ocorrencia.id, ocorrencia.coordenadas)
+        self.indices.adicionar(ocorrencia)
+        self._sincronizar_fila(ocorrencia)
+    
+    def _desativar_ocorrencia(self, id_ocorrencia):
+        self.fila_prioridade.remover(id_ocorrencia)
+        self.indice_espacial.remover(id_ocorrencia)
+        ocorrencia = self.ocorrencias_ativas.pop(id_ocorrencia)
+        ocorrencia.ativa = False
+        self.indices.remover(ocorrencia)
+        return ocorrencia
+    
+    # Toda mudança de status/severidade de ocorrência ativa passa por aqui para manter fila e índices
+    def _alterar_status(self, ocorrencia, novo_status):
+        status_anterior, ocorrencia.status = ocorrencia.status, novo_status
+        if ocorrencia.id in self.ocorrencias_ativas:
+            self.indices.alterar_status(ocorrencia, status_anterior)
+            self._sincronizar_fila(ocorrencia)
+    
+    def _alterar_severidade(self, ocorrencia, nova_severidade):
+        if not 1 <= nova_severidade <= 10:  # A coluna uint8 aceitaria 0 e 11 a 255 em silêncio
+            raise ValueError(f"severidade fora do intervalo 1-10: {nova_severidade}")
+        severidade_anterior, ocorrencia.severidade = ocorrencia.severidade, nova_severidade
+        if ocorrencia.id in self.ocorrencias_ativas:
+            self.indices.alterar_severidade(ocorrencia, severidade_anterior)
+            self.fila_prioridade.atualizar(ocorrencia.id)
+    
+    # Mantém na fila de prioridade somente as ocorrências com status PENDENTE
+    def _sincronizar_fila(self, ocorrencia):
+        if ocorrencia.status == "PENDENTE":
+            self.fila_prioridade.inserir(ocorrencia)
+        else:
+            self.fila_prioridade.remover(ocorrencia.id)
+    
     # Geração de relatórios estatísticos por região
     def gerar_relatorio_regiao(self, regiao=None):
-        print(f"\n📊 RELATÓRIO DE ATENDIMENTO{' - ' + regiao if regiao else ''}\n" + "=" * 60)
-        contadores = {}
+        emitir = self.saida.emitir
+        emitir('TITULO', "\n📊 RELATÓRIO DE ATENDIMENTO{sufixo}\n" + "=" * 60, sufixo=' - ' + regiao if regiao else '')
+        agregados = self.indices.agregados
+        if not self.saida.ativa:
+            estatisticas = {}
+        elif regiao is None:
+            estatisticas = self.armazem.estatisticas_por_regiao()  # Todas as regiões: uma passada vetorizada pelas colunas
+        else:
+            estatisticas = {regiao: self._estatisticas_regiao(regiao)} if regiao in agregados else {}
+        regioes = [reg for reg in (agregados if regiao is None else [regiao]) if reg in estatisticas]
         
-        for ocorrencia in self.ocorrencias_ativas.values():
-            if regiao is None or ocorrencia.regiao == regiao:
-                if ocorrencia.regiao not in contadores:
-                    contadores[ocorrencia.regiao] = {'ativas': 0, 'total_severidade': 0}
-                contadores[ocorrencia.regiao]['ativas'] += 1
-                contadores[ocorrencia.regiao]['total_severidade'] += ocorrencia.severidade
-        
-        for reg, dados in contadores.items():
-            risco = self.regioes_risco.get(reg, 0)
-            print(f"🌍 {reg}:\n   • Ocorrências ativas: {dados['ativas']}\n   • Severidade média: {dados['total_severidade']/dados['ativas']:.1f}\n   • Nível de risco: {risco}/10\n")
-        
-        print(f"📈 Total de ocorrências ativas: {sum(d['ativas'] for d in contadores.values())}")
-        print("\n👥 STATUS DAS EQUIPES:\n" + "-" * 30)
+        agora = self._agora()
+        for reg in regioes:
+            dados, risco = estatisticas[reg], self.regioes_risco.get(reg, 0)
+            recentes, longa = self.janelas.resumo(reg, agora), self.janelas.rotulos[-1]
+            emitir('RELATORIO_REGIAO', lambda: f"🌍 {reg}:\n   • Ocorrências ativas: {dados['ativas']}\n   • Severidade média: {dados['severidade_media']:.1f}\n"
+                   f"   • Severidade máxima: {dados['severidade_maxima']} (" + ", ".join(f"{faixa.lower()} {n}" for faixa, n in dados['por_faixa'].items() if n) +
+                   f")\n   • Novas ({'/'.join(recentes)}): {'/'.join(str(r['novas']) for r in recentes.values())}"
+                   f" • tempo médio ({longa}) até despacho {_minutos(recentes[longa]['tempo_medio_despacho_min'])}"
+                   f", até resolução {_minutos(recentes[longa]['tempo_medio_resolucao_min'])}"
+                   f"\n   • Nível de risco: {risco}/10\n", regiao=reg, risco=risco, recentes=recentes, **dados)
+        
+        emitir('TOTAL_ATIVAS', "📈 Total de ocorrências ativas: {total}", total=sum(estatisticas[reg]['ativas'] for reg in regioes))
+        emitir('TITULO', "\n👥 STATUS DAS EQUIPES:\n" + "-" * 30)
         for equipe in self.equipes.values():
-            print(f"• {equipe.nome} ({equipe.especializacao}): {'🟢 Disponível' if equipe.disponivel else '🔴 Em atendimento'}")
+            emitir('STATUS_EQUIPE', "• {nome} ({especializacao}): {situacao}", nome=equipe.nome, especializacao=equipe.especializacao,
+                   disponivel=equipe.disponivel, situacao='🟢 Disponível' if equipe.disponivel else '🔴 Em atendimento')
+    
+    # Estatísticas de uma região no formato de estatisticas_por_regiao: quantidade e média dos agregados dos índices,
+    # máxima e faixas de uma passada só pelas ocorrências ativas da região
+    def _estatisticas_regiao(self, regiao):
+        agregado, por_faixa, maxima = self.indices.agregados[regiao], {nome: 0 for _, nome in FAIXAS_SEVERIDADE}, 0
+        for ocorrencia in self.indices.por_regiao[regiao].values():
+            severidade = ocorrencia.severidade
+            por_faixa[faixa_severidade(severidade)] += 1
+            maxima = max(maxima, severidade)
+        return {'ativas': agregado['ativas'], 'severidade_media': agregado['total_severidade'] / agregado['ativas'],
+                'severidade_maxima': maxima, 'por_faixa': por_faixa}
+    
+    # Atividade recente por janela (novas por hora, tempos médios até despacho e resolução) nas regiões com eventos
+    def relatorio_atividade_recente(self, regiao=None):
+        agora = self._agora()
+        resumo = {regiao: self.janelas.resumo(regiao, agora)} if regiao else self.janelas.resumo_por_regiao(agora)
+        if self.saida.ativa:
+            emitir = self.saida.emitir
+            emitir('TITULO', "\n📈 ATIVIDADE RECENTE\n" + "=" * 60)
+            for reg, janelas in sorted(resumo.items()):
+                emitir('ATIVIDADE_REGIAO', lambda: f"🌍 {reg}:\n" + "\n".join(
+                    f"   • {rotulo}: {dados['novas']} novas ({dados['novas_por_hora']:.1f}/h) • {dados['despachos']} despachos "
+                    f"(média {_minutos(dados['tempo_medio_despacho_min'])}) • {dados['resolucoes']} resolvidas "
+                    f"(média {_minutos(dados['tempo_medio_resolucao_min'])})" for rotulo, dados in janelas.items()), regiao=reg, janelas=janelas)
+        return resumo
+    
+    # Escalonamento das prioridades na árvore de regiões pela atividade recente: a taxa de novas ocorrências na
+    # janela curta é comparada à da janela longa; cada múltiplo de `fator` soma 1 ao risco configurado (até +3,
+    # máx. 10). O risco configurado (regioes_risco) não muda; sem surto, a região volta a ele.
+    def reavaliar_prioridades(self, fator=2.0, minimo_novas=3):
+        agora, curta, longa = self._agora(), self.janelas.rotulos[0], self.janelas.rotulos[-1]
+        alteradas = {}
+        for regiao, risco in self.regioes_risco.items():
+            recentes = self.janelas.resumo(regiao, agora) if regiao in self.janelas.regioes else None
+            acrescimo = 0
+            if recentes and recentes[curta]['novas'] >= minimo_novas and recentes[longa]['novas_por_hora']:
+                razao = recentes[curta]['novas_por_hora'] / recentes[longa]['novas_por_hora']
+                acrescimo = min(3, int(math.log(razao, fator))) if razao >= fator else 0
+            prioridade = min(10, risco + acrescimo)
+            if self.arvore_regioes.prioridade(regiao) != prioridade:
+                self.arvore_regioes.inserir(regiao, prioridade)
+                alteradas[regiao] = prioridade
+        if alteradas:
+            self._registrar_operacao('Q', agora, alteradas)  # Registra o resultado: a recuperação não recalcula
+            self.saida.emitir('PRIORIDADES_REAVALIADAS', lambda: "📈 Prioridades reavaliadas pela atividade recente: " +
+                              ", ".join(f"{r} → {p}" for r, p in alteradas.items()), alteradas=alteradas)
+        return alteradas
+    
+    # Relatório das ocorrências resolvidas (acervo) finalizadas no período [inicio, fim)
+    def relatorio_historico(self, inicio=None, fim=None):
+        resumo = self.acervo.resumo_por_regiao(inicio, fim)
+        despacho = self.acervo.tempos_resposta(inicio=inicio, fim=fim, ate='despacho')
+        resolucao = self.acervo.tempos_resposta(inicio=inicio, fim=fim, ate='resolucao')
+        if self.saida.ativa:
+            emitir = self.saida.emitir
+            emitir('TITULO', "\n📚 HISTÓRICO DE OCORRÊNCIAS RESOLVIDAS\n" + "=" * 60)
+            for regiao, dados in sorted(resumo.items()):
+                emitir('HISTORICO_REGIAO', "🌍 {regiao}: {resolvidas} resolvidas • severidade média {severidade_media:.1f} "
+                       "(mín. {severidade_minima}, máx. {severidade_maxima})", regiao=regiao, **dados)
+            emitir('TOTAL_RESOLVIDAS', "📈 Total de ocorrências resolvidas: {total}", total=sum(d['resolvidas'] for d in resumo.values()))
+            for ate, rotulo, tempos in (('despacho', "o despacho", despacho), ('resolucao', "a resolução", resolucao)):
+                if tempos['amostras']:
+                    emitir('TEMPOS_RESPOSTA', lambda: f"⏱️ Até {rotulo} (min): média {tempos['media']:.1f} • " +
+                           " • ".join(f"p{p} {v:.1f}" for p, v in tempos['percentis'].items()), ate=ate, **tempos)
+        return {'regioes': resumo, 'despacho': despacho, 'resolucao': resolucao}
     
     # Simulação de chamadas para testes
-    def simular_chamadas_aleatorias(self, quantidade=5):
-        print(f"\n🎲 SIMULANDO {quantidade} CHAMADAS ALEATÓRIAS\n" + "=" * 50)
+    def simular_chamadas_aleatorias(self, quantidade=5, em_lote=False):
+        self.saida.emitir('TITULO', "\n🎲 SIMULANDO {quantidade} CHAMADAS ALEATÓRIAS\n" + "=" * 50, quantidade=quantidade)
+        if em_lote:
+            return self.inserir_ocorrencias_em_lote(self._gerar_chamadas_aleatorias(quantidade))
+        for chamada in self._gerar_chamadas_aleatorias(quantidade):
+            self.inserir_nova_ocorrencia(*chamada)
+    
+    def _gerar_chamadas_aleatorias(self, quantidade):
+        regioes = list(self.regioes_risco.keys())
+        descricoes = [
+            "Fumaça avistada por morador local",
+            "Foco de incêndio detectado por satélite",
+            "Queimada não controlada reportada",
+            "Incêndio florestal em expansão",
+            "Emergência ambiental crítica"
+        ]
         for i in range(quantidade):
-            regiao = random.choice(list(self.regioes_risco.keys()))
             severidade = min(10, 3 + i + random.randint(0, 2))
             coordenadas = (round(random.uniform(-30, 5), 6), round(random.uniform(-70, -35), 6))
-            descricao = random.choice([
-                "Fumaça avistada por morador local",
-                "Foco de incêndio detectado por satélite",
-                "Queimada não controlada reportada",
-                "Incêndio florestal em expansão",
-                "Emergência ambiental crítica"
-            ])
-            self.inserir_nova_ocorrencia(regiao, severidade, coordenadas, descricao)
-    
-    def adicionar_equipe(self, nome, especializacao):
-        equipe = Equipe(self.proximo_id_equipe, nome, especializacao)
+            yield random.choice(regioes), severidade, coordenadas, random.choice(descricoes)
+    
+    def adicionar_equipe(self, nome, especializacao, base=None):
+        equipe = Equipe(self.proximo_id_equipe, nome, especializacao, base, diretorio_historico=self.diretorio_historico, relogio=self._agora)
         self.equipes[equipe.id], self.proximo_id_equipe = equipe, self.proximo_id_equipe + 1
+        self.equipes_disponiveis.adicionar(equipe)
+        self._registrar_operacao('E', None, nome, especializacao, base)
         return equipe.id
     
+    # Posição e disponibilidade de uma equipe fora de atendimento (base inicial, descanso, reabastecimento);
+    # None mantém o valor atual. Equipes despachadas só são liberadas por finalizar_ocorrencia (ou pelo desfazer).
+    def alterar_equipe(self, id_equipe, disponivel=None, localizacao=None):
+        if id_equipe not in self.equipes:
+            self.saida.emitir('EQUIPE_NAO_ENCONTRADA', "❌ Equipe {id_equipe} não encontrada", id_equipe=id_equipe)
+            return False
+        equipe = self.equipes[id_equipe]
+        if disponivel and (em_atendimento := self._atendimento_da_equipe(id_equipe)) is not None:
+            self.saida.emitir('EQUIPE_EM_ATENDIMENTO', "❌ {nome} está atendendo a ocorrência {id_ocorrencia}; finalize-a para liberar a equipe",
+                              nome=equipe.nome, id_equipe=id_equipe, id_ocorrencia=em_atendimento)
+            return False
+        self._alterar_disponibilidade(equipe, equipe.disponivel if disponivel is None else disponivel, localizacao)
+        self._registrar_operacao('P', None, id_equipe, disponivel, localizacao)
+        self.saida.emitir('EQUIPE_ALTERADA', "🚒 {nome}: {situacao} em {local}", nome=equipe.nome, local=equipe.localizacao_atual or "base",
+                          situacao="disponível" if equipe.disponivel else "indisponível")
+        return True
+    
+    # Ocorrência em atendimento pela equipe, ou None; entradas antigas (finalizada, desfeita, mesclada) são descartadas aqui
+    def _atendimento_da_equipe(self, id_equipe):
+        ocorrencia = self.ocorrencias_ativas.get(self.atendimentos.get(id_equipe))
+        if ocorrencia and ocorrencia.status == "EM_ATENDIMENTO" and ocorrencia.equipe_responsavel == id_equipe:
+            return ocorrencia.id
+        self.atendimentos.pop(id_equipe, None)
+        return None
+    
     # Sistema de desfazer para operações críticas
     def desfazer_ultima_acao(self):
         if not self.pilha_desfazer:
-            print("❌ Nenhuma ação para desfazer")
+            self.saida.emitir('NADA_PARA_DESFAZER', "❌ Nenhuma ação para desfazer")
             return False
         
         acao = self.pilha_desfazer.pop()
         if acao[0] == 'ATUALIZAR_STATUS' and acao[1] in self.ocorrencias_ativas:
-            self.ocorrencias_ativas[acao[1]].status = acao[2]
-            print(f"↩️ Status da ocorrência {acao[1]} revertido para {acao[2]}")
+            self._alterar_status(self.ocorrencias_ativas[acao[1]], acao[2])
+            self.saida.emitir('STATUS_REVERTIDO', "↩️ Status da ocorrência {id_ocorrencia} revertido para {status}", id_ocorrencia=acao[1], status=acao[2])
+        elif acao[0] == 'ATUALIZAR_SEVERIDADE' and acao[1] in self.ocorrencias_ativas:
+            self._alterar_severidade(self.ocorrencias_ativas[acao[1]], acao[2])
+            self.saida.emitir('SEVERIDADE_REVERTIDA', "↩️ Severidade da ocorrência {id_ocorrencia} revertida para {severidade}",
+                              id_ocorrencia=acao[1], severidade=acao[2])
+        elif acao[0] == 'MESCLAR_OCORRENCIAS':
+            for id_principal, severidade_anterior, absorvidas in acao[1]:
+                for linha in absorvidas:
+                    ocorrencia = Ocorrencia.de_linha(linha, self.armazem)
+                    ocorrencia.status = "PENDENTE"
+                    self._ativar_ocorrencia(ocorrencia)
+                if id_principal in self.ocorrencias_ativas:
+                    principal = self.ocorrencias_ativas[id_principal]
+                    self._alterar_severidade(principal, severidade_anterior)
+                    del principal.acoes_realizadas[-len(absorvidas):]
+            self.saida.emitir('MESCLAGEM_DESFEITA', "↩️ Mesclagem desfeita: {grupos} grupo(s) restaurado(s)", grupos=len(acao[1]))
+        elif acao[0] in ('ATENDER_OCORRENCIA', 'ATENDER_LOTE'):
+            revertidos = self._desfazer_atendimentos(acao[1] if acao[0] == 'ATENDER_LOTE' else [acao[1:]])
+            self.saida.emitir('ATENDIMENTO_DESFEITO', "↩️ Atendimento desfeito: {revertidos} ocorrência(s) de volta à fila", revertidos=revertidos)
+        elif acao[0] in ('INSERIR_OCORRENCIA', 'INSERIR_LOTE'):
+            removidas = self._desfazer_insercao(acao[1], acao[-1])
+            self.saida.emitir('INSERCAO_DESFEITA', "↩️ Inserção desfeita: {removidas} ocorrência(s) pendente(s) removida(s)", removidas=removidas)
+        self._registrar_operacao('D', None)
         return True
     
+    # Devolve à fila as ocorrências ainda ativas com a equipe do despacho, que volta livre ao local anterior
+    def _desfazer_atendimentos(self, registros):
+        revertidos = 0
+        for id_ocorrencia, id_equipe, localizacao_anterior in reversed(registros):
+            ocorrencia = self.ocorrencias_ativas.get(id_ocorrencia)
+            if not ocorrencia or ocorrencia.equipe_responsavel != id_equipe:
+                continue
+            equipe, despachada_em = self.equipes[id_equipe], ocorrencia.despachada_em
+            self.janelas.registrar('despachos', ocorrencia.regiao, despachada_em, (despachada_em - ocorrencia.timestamp) / MINUTO, quantidade=-1)
+            ocorrencia.equipe_responsavel = ocorrencia.despachada_em = None
+            self._alterar_status(ocorrencia, "PENDENTE")
+            if not equipe.disponivel:
+                equipe.localizacao_atual = localizacao_anterior
+                self._alterar_disponibilidade(equipe, True)
+            equipe.registrar_acao(f"Atendimento da ocorrência {id_ocorrencia} desfeito", self._agora())
+            revertidos += 1
+        return revertidos
+    
+    # Remove as ocorrências do intervalo de ids que ainda não foram atendidas
+    def _desfazer_insercao(self, primeiro_id, ultimo_id):
+        removidas = 0
+        for id_ocorrencia in range(primeiro_id, ultimo_id + 1):
+            ocorrencia = self.ocorrencias_ativas.get(id_ocorrencia)
+            if ocorrencia and ocorrencia.status == "PENDENTE":
+                self._desativar_ocorrencia(id_ocorrencia)
+                self.janelas.registrar('novas', ocorrencia.regiao, ocorrencia.timestamp, quantidade=-1)
+                ocorrencia.liberar()
+                removidas += 1
+        while self.fila_processamento and primeiro_id <= self.fila_processamento[-1] <= ultimo_id:
+            self.fila_processamento.pop()
+        return removidas
+    
+    # Buscas pelos índices secundários: custo proporcional ao resultado, não ao total de ocorrências ativas
     def buscar_ocorrencias_por_regiao(self, regiao):
-        ocorrencias_regiao = [occ for occ in self.ocorrencias_ativas.values() if occ.regiao == regiao]
-        print(f"🔍 Encontradas {len(ocorrencias_regiao)} ocorrências em {regiao}")
+        ocorrencias_regiao = self.indices.consultar(self.indices.por_regiao, regiao)
+        self.saida.emitir('BUSCA_REGIAO', "🔍 Encontradas {total} ocorrências em {regiao}", total=len(ocorrencias_regiao), regiao=regiao)
         return ocorrencias_regiao
     
-    def listar_regioes_por_prioridade(self):
-        print("\n🗺️ REGIÕES POR PRIORIDADE:\n" + "-" * 40)
-        for regiao_info in self.arvore_regioes.listar_em_ordem():
-            print(f"• {regiao_info['regiao']} (Prioridade: {regiao_info['prioridade']})")
+    def buscar_ocorrencias_por_status(self, status):
+        ocorrencias_status = self.indices.consultar(self.indices.por_status, status)
+        self.saida.emitir('BUSCA_STATUS', "🔍 Encontradas {total} ocorrências com status {status}", total=len(ocorrencias_status), status=status)
+        return ocorrencias_status
+    
+    def buscar_ocorrencias_por_severidade(self, faixa):
+        ocorrencias_faixa = self.indices.consultar(self.indices.por_faixa, faixa)
+        self.saida.emitir('BUSCA_SEVERIDADE', "🔍 Encontradas {total} ocorrências de severidade {faixa}", total=len(ocorrencias_faixa), faixa=faixa)
+        return ocorrencias_faixa
+    
+    # Consultas geográficas sobre o índice espacial (coordenadas ou nome de região do mapa)
+    def _resolver_coordenadas(self, referencia):
+        if isinstance(referencia, str):
+            return self.grafo_regioes.coordenadas.get(referencia)
+        return referencia
+    
+    def buscar_ocorrencias_no_raio(self, referencia, raio_km):
+        if (centro := self._resolver_coordenadas(referencia)) is None:
+            self.saida.emitir('REGIAO_NAO_ENCONTRADA', "❌ Região {regiao} não encontrada no mapa", regiao=referencia)
+            return []
+        encontradas = [self.ocorrencias_ativas[id_occ] for _, id_occ in self.indice_espacial.no_raio(centro, raio_km)]
+        self.saida.emitir('BUSCA_RAIO', "📡 Encontradas {total} ocorrências a até {raio_km} km de {centro}",
+                          total=len(encontradas), raio_km=raio_km, centro=centro)
+        return encontradas
+    
+    def ocorrencias_mais_proximas(self, referencia, k=5):
+        if (centro := self._resolver_coordenadas(referencia)) is None:
+            self.saida.emitir('REGIAO_NAO_ENCONTRADA', "❌ Região {regiao} não encontrada no mapa", regiao=referencia)
+            return []
+        proximas = [(self.ocorrencias_ativas[id_occ], dist) for dist, id_occ in self.indice_espacial.mais_proximos(centro, k)]
+        if self.saida.ativa:
+            self.saida.emitir('TITULO', "\n📡 {k} OCORRÊNCIAS MAIS PRÓXIMAS DE {centro}:\n" + "-" * 40, k=len(proximas), centro=centro)
+            for ocorrencia, dist in proximas:
+                self.saida.emitir('OCORRENCIA_PROXIMA', "• {ocorrencia} a {distancia_km:.1f} km", ocorrencia=ocorrencia, distancia_km=dist)
+        return proximas
+    
+    # Mescla relatos duplicados do mesmo foco (ocorrências pendentes a até raio_km umas das outras).
+    # A ocorrência mantida é a já em atendimento ou, senão, a de maior prioridade na fila.
+    def mesclar_ocorrencias_duplicadas(self, raio_km=1.0):
+        mesclagens = []
+        for grupo in self.indice_espacial.agrupar(raio_km):
+            ocorrencias = [self.ocorrencias_ativas[id_occ] for id_occ in grupo]
+            principal = min(ocorrencias, key=lambda o: (o.status == "PENDENTE", o.chave_prioridade()))
+            absorvidas = [o for o in ocorrencias if o is not principal and o.status == "PENDENTE"]
+            if not absorvidas: continue
+            
+            mesclagens.append((principal.id, [o.id for o in absorvidas]))
+        
+        mesclagens = self._mesclar_grupos(mesclagens)
+        total = sum(len(m[2]) for m in mesclagens)
+        self.saida.emitir('OCORRENCIAS_MESCLADAS', "🧩 {total} relato(s) duplicado(s) mesclado(s) em {grupos} ocorrência(s)",
+                          total=total, grupos=len(mesclagens))
+        return {id_principal: [linha[0] for linha in absorvidas] for id_principal, _, absorvidas in mesclagens}
+    
+    # Aplica grupos (id principal, ids absorvidos) já decididos; também usado na recuperação do diário. As
+    # absorvidas vão para a pilha de desfazer como linhas (Ocorrencia.linha) e seus slots voltam ao armazém.
+    def _mesclar_grupos(self, grupos):
+        mesclagens = []
+        for id_principal, ids_absorvidas in grupos:
+            principal, absorvidas = self.ocorrencias_ativas[id_principal], [self.ocorrencias_ativas[i] for i in ids_absorvidas]
+            mesclagens.append((principal.id, principal.severidade, [o.linha() for o in absorvidas]))
+            self._alterar_severidade(principal, max([principal.severidade] + [o.severidade for o in absorvidas]))
+            for ocorrencia in absorvidas:
+                self._desativar_ocorrencia(ocorrencia.id)
+                principal.acoes_realizadas.append(f"Mesclada ocorrência duplicada {ocorrencia.id}")
+                ocorrencia.liberar()
+        
+        if mesclagens:
+            self.pilha_desfazer.append(('MESCLAR_OCORRENCIAS', mesclagens))
+            self._registrar_operacao('M', None, grupos)
+        return mesclagens
+    
+    # Listagem em ordem de prioridade, opcionalmente restrita a uma faixa de risco (ex.: 7 a 9)
+    def listar_regioes_por_prioridade(self, minimo=None, maximo=None):
+        self.saida.emitir('TITULO', "\n🗺️ REGIÕES POR PRIORIDADE:\n" + "-" * 40)
+        for regiao_info in self.arvore_regioes.intervalo(minimo, maximo):
+            self.saida.emitir('REGIAO_PRIORIDADE', "• {regiao} (Prioridade: {prioridade})", **regiao_info)
+    
+    def atualizar_risco_regiao(self, regiao, prioridade):
+        if not 1 <= prioridade <= 10:
+            self.saida.emitir('RISCO_INVALIDO', "❌ Nível de risco deve estar entre 1 e 10")
+            return False
+        self.regioes_risco[regiao] = prioridade
+        self.arvore_regioes.inserir(regiao, prioridade)
+        self._registrar_operacao('K', None, regiao, prioridade)
+        self.saida.emitir('RISCO_ATUALIZADO', "🌡️ Risco de {regiao} atualizado para {prioridade}", regiao=regiao, prioridade=prioridade)
+        return True
     
     def status_sistema(self):
-        print("\n🖥️ STATUS DO SISTEMA IVERN\n" + "=" * 40)
-        print(f"• Ocorrências ativas: {len(self.ocorrencias_ativas)}\n• Ocorrências na fila: {len(self.fila_prioridade)}")
-        print(f"• Equipes disponíveis: {sum(1 for e in self.equipes.values() if e.disponivel)}\n• Total de equipes: {len(self.equipes)}")
-        print(f"• Ações na pilha de desfazer: {len(self.pilha_desfazer)}")
-    
-    # Cálculo de rota otimizada usando Dijkstra
-    def calcular_rota_otima(self, regiao_origem, regiao_destino):
-        caminho, distancia = self.grafo_regioes.dijkstra(regiao_origem, regiao_destino)
+        self.saida.emitir('STATUS_SISTEMA', "\n🖥️ STATUS DO SISTEMA IVERN\n" + "=" * 40 +
+                          "\n• Ocorrências ativas: {ativas}\n• Ocorrências na fila: {na_fila}"
+                          "\n• Equipes disponíveis: {equipes_disponiveis}\n• Total de equipes: {total_equipes}"
+                          "\n• Ações na pilha de desfazer: {pilha_desfazer}",
+                          ativas=len(self.ocorrencias_ativas), na_fila=len(self.fila_prioridade),
+                          equipes_disponiveis=len(self.equipes_disponiveis),
+                          total_equipes=len(self.equipes), pilha_desfazer=len(self.pilha_desfazer))
+        if not self.metricas.ativa:
+            return None
+        
+        instantaneo = self.metricas.instantaneo()
+        if self.saida.ativa:
+            emitir = self.saida.emitir
+            emitir('TITULO', "\n⏱️ LATÊNCIAS (ms)\n" + "-" * 40)
+            for nome, dados in sorted(instantaneo['latencias'].items()):
+                emitir('METRICA_LATENCIA', "• {nome}: {quantidade}x • média {media_ms:.3f} • p50 {p50_ms:.3f} • p99 {p99_ms:.3f} • máx {max_ms:.3f}",
+                       nome=nome, **dados)
+            emitir('TITULO', "\n🔢 CONTADORES\n" + "-" * 40)
+            for nome, valor in sorted(instantaneo['contadores'].items()):
+                emitir('METRICA_CONTADOR', "• {nome}: {valor}", nome=nome, valor=valor)
+        return instantaneo
+    
+    # Instrumentação opcional: as operações principais do sistema e as buscas do grafo passam a ser medidas
+    # (latência), com contadores de eventos e medidores de filas. Com as métricas desligadas não há custo algum:
+    # os cronômetros só existem como atributos da instância enquanto ativos.
+    def ativar_metricas(self, metricas=None):
+        self.desativar_metricas()
+        self.metricas = metricas = metricas or Metricas()
+        incrementar = metricas.incrementar
+        def despacho(resultado):
+            incrementar('despachos' if resultado is not None else 'despachos_falhos')
+            metricas.amostrar()
+        ganchos = {
+            'inserir_nova_ocorrencia': lambda resultado: (incrementar('ocorrencias_inseridas'), metricas.amostrar()),
+            'inserir_ocorrencias_em_lote': lambda resultado: incrementar('ocorrencias_inseridas', resultado['inseridas']),
+            'atender_proxima_ocorrencia': despacho,
+            'atender_em_lote': lambda resultado: incrementar('despachos', len(resultado)),
+            '_encontrar_melhor_equipe': None,
+            'registrar_acoes_realizadas': None,
+            'finalizar_ocorrencia': lambda resultado: resultado and incrementar('ocorrencias_finalizadas'),
+            'atualizar_status_ocorrencia': None,
+            'atualizar_severidade_ocorrencia': None,
+            'desfazer_ultima_acao': lambda resultado: resultado and incrementar('acoes_desfeitas'),
+            'gerar_relatorio_regiao': None,
+            'relatorio_historico': None,
+            'planejar_atendimento_multiplo': None,
+            'calcular_rota_otima': None,
+        }
+        for metodo, ao_concluir in ganchos.items():
+            metricas.instrumentar(self, metodo, ao_concluir)
+        self._instrumentar_grafo()
+        
+        for nome, leitura in [('fila_prioridade', lambda: len(self.fila_prioridade)), ('ocorrencias_ativas', lambda: len(self.ocorrencias_ativas)),
+                              ('equipes_disponiveis', lambda: len(self.equipes_disponiveis)), ('pilha_desfazer', lambda: len(self.pilha_desfazer)),
+                              ('fila_processamento', lambda: len(self.fila_processamento)),
+                              ('arvores_em_cache', lambda: len(self.grafo_regioes.cache_arvores)), ('ocorrencias_resolvidas', lambda: len(self.acervo))]:
+            metricas.observar(nome, leitura)
+        return metricas
+    
+    def desativar_metricas(self):
+        if self.metricas.ativa:
+            self.metricas.remover_instrumentacao()
+        self.metricas = MetricasNulas()
+    
+    # O grafo é trocado por carregar_mapa: a instrumentação acompanha o grafo atual
+    def _instrumentar_grafo(self):
+        grafo, incrementar = self.grafo_regioes, self.metricas.incrementar
+        def arvore_calculada(arvore):
+            incrementar('arvores_calculadas')
+            incrementar('vertices_expandidos', len(arvore[0]))
+        self.metricas.instrumentar(grafo, 'dijkstra')
+        self.metricas.instrumentar(grafo, 'arvore_caminhos')
+        self.metricas.instrumentar(grafo, '_dijkstra_fonte_unica', arvore_calculada)
+        for metodo in ('a_estrela', 'dijkstra_bidirecional'):
+            self.metricas.instrumentar(grafo, metodo, lambda resultado: incrementar('vertices_expandidos', resultado[2]))
+    
+    def exportar_metricas(self, caminho, formato=None):
+        if not self.metricas.ativa:
+            self.saida.emitir('METRICAS_DESATIVADAS', "❌ Métricas desativadas (use ativar_metricas)")
+            return None
+        self.metricas.exportar(caminho, formato)
+        self.saida.emitir('METRICAS_EXPORTADAS', "📈 Métricas exportadas para {caminho}", caminho=caminho)
+        return caminho
+    
+    # Cálculo de rota otimizada (metodo: 'dijkstra', 'a_estrela' ou 'bidirecional')
+    def calcular_rota_otima(self, regiao_origem, regiao_destino, metodo='dijkstra'):
+        caminho, distancia, expandidos = self.grafo_regioes.rota(regiao_origem, regiao_destino, metodo)
         if caminho is None:
-            print(f"❌ Não há rota disponível entre {regiao_origem} e {regiao_destino}")
+            self.saida.emitir('ROTA_INEXISTENTE', "❌ Não há rota disponível entre {origem} e {destino}", origem=regiao_origem, destino=regiao_destino)
             return None
         
-        print(f"\n🛣️ ROTA OTIMIZADA: {regiao_origem} → {regiao_destino}\n" + "=" * 60)
-        print(f"📍 Caminho: {' → '.join(caminho)}\n📏 Distância total: {distancia} unidades")
-        print(f"⏱️ Tempo estimado: {distancia * 0.5:.1f} horas\n🚁 Paradas intermediárias: {len(caminho) - 2}")
-        return {'caminho': caminho, 'distancia': distancia, 'tempo_estimado': distancia * 0.5}
+        self.saida.emitir('ROTA_OTIMIZADA', lambda: f"\n🛣️ ROTA OTIMIZADA: {regiao_origem} → {regiao_destino}\n" + "=" * 60 +
+                          f"\n📍 Caminho: {' → '.join(caminho)}\n📏 Distância total: {distancia} unidades"
+                          f"\n⏱️ Tempo estimado: {distancia * HORAS_POR_UNIDADE:.1f} horas\n🚁 Paradas intermediárias: {len(caminho) - 2}"
+                          f"\n🔎 Vértices expandidos ({metodo}): {expandidos}",
+                          caminho=caminho, distancia=distancia, metodo=metodo, expandidos=expandidos)
+        return {'caminho': caminho, 'distancia': distancia, 'tempo_estimado': distancia * HORAS_POR_UNIDADE, 'metodo': metodo, 'expandidos': expandidos}
     
     # Planejamento estratégico de atendimento múltiplo
     def planejar_atendimento_multiplo(self, regiao_base):
-        regioes_com_ocorrencias = list(set(occ.regiao for occ in self.ocorrencias_ativas.values() if occ.regiao != regiao_base))
+        agregados = self.indices.agregados
+        regioes_com_ocorrencias = [regiao for regiao in agregados if regiao != regiao_base]
         if not regioes_com_ocorrencias:
-            print("❌ Não há ocorrências ativas para planejar rotas")
+            self.saida.emitir('SEM_OCORRENCIAS', "❌ Não há ocorrências ativas para planejar rotas")
             return None
         
-        if regiao_base not in self.grafo_regioes.vertices:
-            print(f"❌ Região base {regiao_base} não encontrada no mapa")
+        if regiao_base not in self.grafo_regioes:
+            self.saida.emitir('REGIAO_NAO_ENCONTRADA', "❌ Região base {regiao} não encontrada no mapa", regiao=regiao_base)
             return None
         
         rotas_priorizadas = []
+        arvore_base = self.grafo_regioes.arvore_caminhos(regiao_base)  # Uma única busca atende todas as regiões
         
         # Cálculo de score para priorização (severidade vs distância)
         for regiao in regioes_com_ocorrencias:
-            caminho, distancia = self.grafo_regioes.dijkstra(regiao_base, regiao)
+            caminho, distancia = self.grafo_regioes.caminho_ate(arvore_base, regiao)
             
             if caminho is None or distancia == float('inf'):
-                print(f"⚠️ Não há rota disponível de {regiao_base} para {regiao}")
+                self.saida.emitir('ROTA_INEXISTENTE', "⚠️ Não há rota disponível de {origem} para {destino}", origem=regiao_base, destino=regiao)
                 continue
             
-            ocorrencias_regiao = [occ for occ in self.ocorrencias_ativas.values() if occ.regiao == regiao]
-            severidade_media = sum(occ.severidade for occ in ocorrencias_regiao) / len(ocorrencias_regiao)
+            agregado = agregados[regiao]
+            severidade_media = agregado['total_severidade'] / agregado['ativas']
             
             rotas_priorizadas.append({
                 'regiao': regiao,
                 'rota': {'caminho': caminho, 'distancia': distancia},
-                'ocorrencias': len(ocorrencias_regiao),
+                'ocorrencias': agregado['ativas'],
                 'severidade_media': severidade_media,
                 'score': (severidade_media * 10) - distancia  # Score de priorização
             })
         
         if not rotas_priorizadas:
-            print("❌ Nenhuma rota válida encontrada para as regiões com ocorrências")
+            self.saida.emitir('SEM_ROTAS_VALIDAS', "❌ Nenhuma rota válida encontrada para as regiões com ocorrências")
             return None
         
         # Ordenação por score de prioridade
         rotas_priorizadas.sort(key=lambda x: x['score'], reverse=True)
-        print(f"\n🗺️ PLANEJAMENTO DE ATENDIMENTO MÚLTIPLO\n📍 Base de operações: {regiao_base}\n" + "=" * 60)
-        print("🎯 ORDEM DE ATENDIMENTO RECOMENDADA:\n" + "-" * 40)
+        self.saida.emitir('TITULO', "\n🗺️ PLANEJAMENTO DE ATENDIMENTO MÚLTIPLO\n📍 Base de operações: {regiao}\n" + "=" * 60 +
+                          "\n🎯 ORDEM DE ATENDIMENTO RECOMENDADA:\n" + "-" * 40, regiao=regiao_base)
         
         for i, info in enumerate(rotas_priorizadas, 1):
-            print(f"{i}. {info['regiao']}\n   📍 Rota: {' → '.join(info['rota']['caminho'])}")
-            print(f"   📏 Distância: {info['rota']['distancia']} unidades\n   ⏱️ Tempo: {info['rota']['distancia'] * 0.5:.1f}h")
-            print(f"   🔥 Ocorrências: {info['ocorrencias']} (severidade média: {info['severidade_media']:.1f})\n   🎯 Score de prioridade: {info['score']:.1f}\n")
+            self.saida.emitir('ROTA_PLANEJADA', lambda i=i, info=info: f"{i}. {info['regiao']}\n   📍 Rota: {' → '.join(info['rota']['caminho'])}"
+                              f"\n   📏 Distância: {info['rota']['distancia']} unidades\n   ⏱️ Tempo: {info['rota']['distancia'] * HORAS_POR_UNIDADE:.1f}h"
+                              f"\n   🔥 Ocorrências: {info['ocorrencias']} (severidade média: {info['severidade_media']:.1f})\n   🎯 Score de prioridade: {info['score']:.1f}\n",
+                              ordem=i, **info)
         
         return rotas_priorizadas
     
+    # Percurso único de uma equipe pela base e por todas as regiões com ocorrências ativas (ver otimizar_percurso),
+    # comparado à ordem por score de planejar_atendimento_multiplo percorrida em sequência. Pesos das paradas:
+    # soma das severidades ativas da região. prazos: {região: horas máximas até a chegada}.
+    def planejar_percurso(self, regiao_base, peso_severidade=1.0, prazos=None, limite_tempo=0.5, caminhos=True):
+        agregados, grafo = self.indices.agregados, self.grafo_regioes
+        if regiao_base not in grafo:
+            self.saida.emitir('REGIAO_NAO_ENCONTRADA', "❌ Região base {regiao} não encontrada no mapa", regiao=regiao_base)
+            return None
+        regioes = [regiao for regiao in agregados if regiao != regiao_base]
+        matriz = grafo.matriz_entre([regiao_base] + regioes)
+        alcancaveis = [k for k in range(1, len(matriz)) if matriz[0][k] != float('inf')]
+        inalcancaveis = [regioes[k - 1] for k in range(1, len(matriz)) if matriz[0][k] == float('inf')]
+        if not alcancaveis:
+            self.saida.emitir('SEM_ROTAS_VALIDAS', "❌ Nenhuma rota válida encontrada para as regiões com ocorrências")
+            return None
+        
+        indices = [0] + alcancaveis
+        distancias = [[matriz[a][b] for b in indices] for a in indices]
+        paradas = [regiao_base] + [regioes[k - 1] for k in alcancaveis]
+        pesos = [0] + [agregados[regiao]['total_severidade'] for regiao in paradas[1:]]
+        prazos_indices = {k: prazos[regiao] for k, regiao in enumerate(paradas) if k and prazos and regiao in prazos}
+        inicio = time.perf_counter()
+        ordem, custo, movimentos = otimizar_percurso(distancias, pesos, peso_severidade, prazos_indices, limite_tempo)
+        duracao = time.perf_counter() - inicio
+        
+        # Plano atual: ordem por score (severidade média × 10 - distância da base), percorrida em sequência
+        por_score = sorted(range(1, len(paradas)), key=lambda k: agregados[paradas[k]]['total_severidade'] / agregados[paradas[k]]['ativas'] * 10 - distancias[0][k],
+                           reverse=True)
+        
+        def resumir(sequencia):
+            visitas, total, anterior, soma_pesos, latencia, atraso = [], 0.0, 0, sum(pesos) or 1, 0.0, 0.0
+            for k in sequencia:
+                total += distancias[anterior][k]
+                latencia += pesos[k] * total
+                atraso += max(0.0, total * HORAS_POR_UNIDADE - prazos_indices[k]) if k in prazos_indices else 0.0
+                visitas.append({'regiao': paradas[k], 'chegada_distancia': total, 'chegada_horas': total * HORAS_POR_UNIDADE,
+                                'ocorrencias': agregados[paradas[k]]['ativas'], 'peso': pesos[k], 'prazo_horas': prazos_indices.get(k)})
+                anterior = k
+            return {'ordem': visitas, 'distancia_total': total, 'horas_total': total * HORAS_POR_UNIDADE,
+                    'chegada_media_ponderada_horas': latencia / soma_pesos * HORAS_POR_UNIDADE, 'atraso_horas': atraso}
+        
+        resultado = {'base': regiao_base, **resumir(ordem), 'custo': custo, 'movimentos': movimentos, 'tempo_s': duracao,
+                     'plano_por_score': resumir(por_score), 'inalcancaveis': inalcancaveis}
+        if caminhos:
+            anterior = regiao_base
+            for visita in resultado['ordem']:
+                visita['caminho'] = grafo.dijkstra_bidirecional(anterior, visita['regiao'])[0]  # Trechos curtos: busca local
+                anterior = visita['regiao']
+        
+        if self.saida.ativa:
+            emitir, atual = self.saida.emitir, resultado['plano_por_score']
+            emitir('TITULO', "\n🧭 PERCURSO OTIMIZADO\n📍 Base de operações: {regiao}\n" + "=" * 60, regiao=regiao_base)
+            for i, visita in enumerate(resultado['ordem'], 1):
+                emitir('PARADA_PERCURSO', lambda i=i, visita=visita: f"{i}. {visita['regiao']} • chegada em {visita['chegada_horas']:.1f}h "
+                       f"({visita['ocorrencias']} ocorrências)" + (f" • prazo {visita['prazo_horas']:.1f}h" if visita['prazo_horas'] is not None else "") +
+                       (f"\n   📍 {' → '.join(visita['caminho'])}" if visita.get('caminho') else ""), ordem=i, **visita)
+            emitir('COMPARACAO_PERCURSO', lambda: f"📏 Percurso: {resultado['distancia_total']:.1f} unidades • {resultado['horas_total']:.1f}h "
+                   f"(chegada média ponderada {resultado['chegada_media_ponderada_horas']:.1f}h)\n"
+                   f"📋 Ordem por score em sequência: {atual['distancia_total']:.1f} unidades • {atual['horas_total']:.1f}h "
+                   f"(chegada média ponderada {atual['chegada_media_ponderada_horas']:.1f}h)" +
+                   (f"\n⏰ Atraso total: {resultado['atraso_horas']:.1f}h (ordem por score: {atual['atraso_horas']:.1f}h)" if prazos_indices else "") +
+                   (f"\n⚠️ Sem rota a partir da base: {', '.join(inalcancaveis)}" if inalcancaveis else ""),
+                   distancia_total=resultado['distancia_total'], distancia_por_score=atual['distancia_total'])
+        return resultado
+    
+    # Planejamento a partir de várias bases de uma vez (por padrão, as posições atuais das equipes) contra todas
+    # as regiões com ocorrências ativas. Em mapas grandes as buscas são distribuídas num ProcessPoolExecutor;
+    # abaixo de limite_sequencial (vértices × bases) rodam no próprio processo, onde abrir processos custaria mais.
+    # O resultado não depende da ordem de conclusão: bases em ordem alfabética, rotas por score e nome.
+    def planejar_multiplas_bases(self, bases=None, caminhos=False, processos=None, limite_sequencial=200000):
+        grafo, agregados = self.grafo_regioes, self.indices.agregados
+        if bases is None:
+            bases = [e.localizacao_atual for e in self.equipes.values() if e.localizacao_atual is not None]
+        bases = sorted({base for base in bases if base in grafo})
+        if not bases or not agregados:
+            self.saida.emitir('SEM_PLANEJAMENTO', "❌ Planejamento requer bases no mapa e ocorrências ativas")
+            return None
+        alvos = sorted((regiao, dados['ativas'], dados['total_severidade'] / dados['ativas']) for regiao, dados in agregados.items()
+                       if regiao in grafo)
+        
+        processos = processos or os.cpu_count() or 1
+        if processos == 1 or len(bases) == 1 or len(grafo) * len(bases) < limite_sequencial:
+            planos = [_planejar_base(grafo, base, alvos, caminhos) for base in bases]
+        else:
+            planos = self._planejar_em_processos(grafo, bases, alvos, caminhos, processos)
+        
+        por_base = dict(zip(bases, planos))
+        melhor_base = {}  # Região → base mais próxima (desempate pelo nome da base)
+        for base, rotas in por_base.items():
+            for rota in rotas:
+                atual = melhor_base.get(rota['regiao'])
+                if atual is None or rota['distancia'] < atual['distancia']:
+                    melhor_base[rota['regiao']] = {'base': base, 'distancia': rota['distancia']}
+        equipes = {e.id: e.localizacao_atual for e in self.equipes.values() if e.localizacao_atual in por_base}
+        
+        if self.saida.ativa:
+            self.saida.emitir('TITULO', "\n🗺️ PLANEJAMENTO DE MÚLTIPLAS BASES ({bases} bases, {regioes} regiões com ocorrências)\n" + "=" * 60,
+                              bases=len(bases), regioes=len(alvos))
+            for base, rotas in por_base.items():
+                self.saida.emitir('PLANO_BASE', lambda base=base, rotas=rotas: f"📍 {base}: " + (", ".join(
+                    f"{r['regiao']} ({r['distancia']:g} un., score {r['score']:.1f})" for r in rotas[:3]) or "nenhuma região alcançável"),
+                    base=base, rotas=rotas)
+        return {'bases': por_base, 'melhor_base_por_regiao': melhor_base, 'equipes': equipes}
+    
+    # Os processos recebem o mapa como arquivo .ivg: o do mapa carregado, se houver, ou um temporário
+    @staticmethod
+    def _planejar_em_processos(grafo, bases, alvos, caminhos, processos):
+        caminho_mapa, temporario = getattr(grafo, 'caminho_arquivo', None), None
+        if caminho_mapa is None:
+            descritor, temporario = tempfile.mkstemp(suffix='.ivg')
+            os.close(descritor)
+            (grafo if isinstance(grafo, GrafoCompacto) else GrafoCompacto.de_grafo(grafo)).salvar(temporario)
+            caminho_mapa = temporario
+        try:
+            tamanho = max(1, math.ceil(len(bases) / (processos * 4)))  # Blocos pequenos equilibram a carga
+            blocos = [bases[i:i + tamanho] for i in range(0, len(bases), tamanho)]
+            with ProcessPoolExecutor(processos, initializer=_iniciar_planejamento, initargs=(caminho_mapa, alvos, caminhos)) as executor:
+                planos = [plano for planos in executor.map(_planejar_bases_processo, blocos) for plano in planos]
+        finally:
+            if temporario:
+                os.remove(temporario)
+        if caminhos:  # Ids na ordem do arquivo: a do próprio GrafoCompacto ou a de de_grafo (ordem dos vértices)
+            nome = grafo._nome if isinstance(grafo, GrafoCompacto) else list(grafo.vertices).__getitem__
+            for rotas in planos:
+                for rota in rotas:
+                    rota['caminho'] = [nome(v) for v in rota['caminho']]
+        return planos
+    
     def visualizar_mapa_conexoes(self):
         self.grafo_regioes.listar_conexoes()
     
+    # Troca o mapa por um grafo compacto: arquivo binário (.ivg, aberto via mmap) ou lista de arestas .csv
+    def carregar_mapa(self, caminho, coordenadas=None):
+        if caminho.lower().endswith('.csv'):
+            self.grafo_regioes = GrafoCompacto.de_csv(caminho, coordenadas, saida=self.saida)
+        else:
+            self.grafo_regioes = GrafoCompacto.abrir(caminho, saida=self.saida)
+        self.mapa_carregado = (caminho, coordenadas)
+        if self.metricas.ativa:
+            self._instrumentar_grafo()
+        self._registrar_operacao('G', None, caminho, coordenadas)
+        self.saida.emitir('MAPA_CARREGADO', "🗺️ Mapa carregado: {regioes} regiões e {conexoes} conexões",
+                          regioes=len(self.grafo_regioes), conexoes=self.grafo_regioes.total_conexoes())
+        return len(self.grafo_regioes)
+    
+    def salvar_mapa(self, caminho):
+        grafo = self.grafo_regioes
+        (grafo if isinstance(grafo, GrafoCompacto) else GrafoCompacto.de_grafo(grafo)).salvar(caminho)
+        self.saida.emitir('MAPA_SALVO', "💾 Mapa salvo em {caminho}", caminho=caminho)
+    
     # Método de debug para verificar conectividade
     def debug_grafo(self):
-        print("\n🔗 VERIFICANDO CONECTIVIDADE DO GRAFO:")
-        print(f"📊 Total de regiões: {len(self.grafo_regioes.vertices)}")
-        print(f"🔗 Total de conexões: {sum(len(c) for c in self.grafo_regioes.vertices.values()) // 2}")
-        print(f"📈 Conectividade média: {sum(len(c) for c in self.grafo_regioes.vertices.values()) / len(self.grafo_regioes.vertices):.1f} conexões por região")
-        
-        print("\n✅ Testando rotas principais:")
+        grafo = self.grafo_regioes
+        self.saida.emitir('DEBUG_GRAFO', "\n🔗 VERIFICANDO CONECTIVIDADE DO GRAFO:\n📊 Total de regiões: {regioes}\n🔗 Total de conexões: {conexoes}"
+                          "\n📈 Conectividade média: {media:.1f} conexões por região\n\n✅ Testando rotas principais:",
+                          regioes=len(grafo), conexoes=grafo.total_conexoes(), media=2 * grafo.total_conexoes() / len(grafo))
         rotas_teste = [
             ("Mata Atlântica Sul", "Amazônia Norte"),
             ("Cerrado Central", "Pantanal"),
@@ -476,20 +3204,202 @@ class SistemaIVERN:
         for origem, destino in rotas_teste:
             caminho, dist = self.grafo_regioes.dijkstra(origem, destino)
             if caminho:
-                print(f"   ✓ {origem} → {destino}: {dist} unidades ({len(caminho)-1} conexões)")
+                self.saida.emitir('DEBUG_ROTA', "   ✓ {origem} → {destino}: {distancia} unidades ({conexoes} conexões)",
+                                  origem=origem, destino=destino, distancia=dist, conexoes=len(caminho) - 1)
             else:
-                print(f"   ❌ {origem} → {destino}: Sem rota disponível")
+                self.saida.emitir('DEBUG_ROTA', "   ❌ {origem} → {destino}: Sem rota disponível", origem=origem, destino=destino, distancia=dist)
+    
+    # Persistência: com diretorio_dados, cada operação que altera o estado é registrada no diário com seu
+    # resultado já decidido (equipe escolhida, grupos mesclados...), e a recuperação a refaz com o relógio
+    # fixado no instante registrado (exato para o timestamp das ocorrências; no histórico das equipes pode diferir
+    # em microssegundos). Alterações feitas direto no grafo não são registradas; use carregar_mapa.
+    def _agora(self):
+        return self._instante_fixo or self.relogio()
+    
+    def _registrar_operacao(self, tipo, instante, *argumentos):
+        if self.diario is None:
+            return
+        self.diario.registrar(tipo, para_microssegundos(instante or self._agora()), *argumentos)
+        if self.diario.precisa_snapshot():
+            self.diario.gravar_snapshot(self._estado_snapshot())
+    
+    def gravar_snapshot(self):
+        if self.diario is None:
+            self.saida.emitir('SEM_PERSISTENCIA', "❌ Sistema iniciado sem diretório de dados")
+            return False
+        self.diario.gravar_snapshot(self._estado_snapshot())
+        self.saida.emitir('SNAPSHOT_GRAVADO', "💾 Snapshot gravado (operação {lsn})", lsn=self.diario.lsn)
+        return True
+    
+    def fechar(self):
+        if self.diario:
+            self.diario.fechar()
+            self.diario = None
+        self.acervo.fechar()
+        for equipe in self.equipes.values():
+            equipe.historico_acoes.fechar()
+    
+    def _recuperar(self, diario):
+        saida, self.saida = self.saida, SaidaNula()
+        refeitas, coletor_ativo = 0, gc.isenabled()
+        gc.disable()  # A carga cria milhões de objetos de vida longa: o coletor cíclico só atrasaria
+        try:
+            if estado := diario.ler_snapshot():
+                self._carregar_snapshot(estado)
+            self.acervo.truncar(estado.get('linhas_acervo', 0) if estado else 0)  # Linhas posteriores voltam pelo diário
+            self._alinhar_historicos(estado)
+            self.fila_prioridade.adiar()  # O diário traz os despachos decididos: a ordem só importa ao final
+            insercoes = []  # Inserções consecutivas são refeitas em bloco (um heapify em vez de N inserções)
+            for registro in diario.ler_registros(diario.lsn):
+                if registro[1] == 'I':
+                    insercoes.append(registro)
+                else:
+                    self._refazer_insercoes(insercoes)
+                    self._aplicar_operacao(registro)
+                refeitas += 1
+            self._refazer_insercoes(insercoes)
+            self._instante_fixo = None
+        finally:
+            self.fila_prioridade.reordenar()
+            self.saida, self._instante_fixo = saida, None
+            self.grafo_regioes.saida = saida
+            if coletor_ativo:
+                gc.enable()
+        diario.abrir()
+        self.diario = diario
+        if estado or refeitas:
+            self.saida.emitir('ESTADO_RECUPERADO', "♻️ Estado recuperado: {ativas} ocorrências ativas ({refeitas} operações refeitas do diário)",
+                              ativas=len(self.ocorrencias_ativas), refeitas=refeitas, snapshot=estado is not None)
+    
+    # Segmentos persistentes podem ter registros posteriores ao snapshot (despejados por fechar()): voltam ao
+    # tamanho do snapshot (ver _carregar_snapshot), ou a zero sem snapshot, e o diário refaz o restante. Os de
+    # equipes cadastradas depois do snapshot são apagados; a equipe e seu histórico também voltam pelo diário.
+    def _alinhar_historicos(self, estado):
+        if not self.diretorio_historico or not os.path.isdir(self.diretorio_historico):
+            return
+        if not estado:
+            for equipe in self.equipes.values():
+                equipe.historico_acoes.truncar(0)
+        for nome in os.listdir(self.diretorio_historico):
+            prefixo, _, sufixo = nome.partition('_')
+            id_equipe = sufixo.removesuffix('.hist')
+            if prefixo == 'equipe' and sufixo.endswith('.hist') and id_equipe.isdigit() and int(id_equipe) >= self.proximo_id_equipe:
+                os.remove(os.path.join(self.diretorio_historico, nome))
+    
+    def _refazer_insercoes(self, registros):
+        if not registros:
+            return
+        primeiro_id = self.proximo_id_ocorrencia
+        novas = [Ocorrencia(primeiro_id + i, regiao, severidade, (latitude, longitude), descricao, de_microssegundos(instante), self.armazem)
+                 for i, (_, _, instante, regiao, severidade, latitude, longitude, descricao) in enumerate(registros)]
+        self._incorporar_ocorrencias(novas)
+        self.pilha_desfazer.extend(('INSERIR_OCORRENCIA', ocorrencia.id) for ocorrencia in novas)
+        registros.clear()
+    
+    def _aplicar_operacao(self, registro):
+        tipo, argumentos = registro[1], registro[3:]
+        self._instante_fixo = de_microssegundos(registro[2])
+        if tipo == 'I':
+            regiao, severidade, latitude, longitude, descricao = argumentos
+            self.inserir_nova_ocorrencia(regiao, severidade, (latitude, longitude), descricao)
+        elif tipo == 'L':
+            self.inserir_ocorrencias_em_lote([(r, s, (lat, lon), d) for r, s, lat, lon, d in argumentos[0]], silencioso=True)
+        elif tipo == 'A': self._despachar(*argumentos)
+        elif tipo == 'AL': self._despachar_lote(argumentos[0])
+        elif tipo == 'R': self.registrar_acoes_realizadas(*argumentos)
+        elif tipo == 'F': self.finalizar_ocorrencia(*argumentos)
+        elif tipo == 'S': self.atualizar_status_ocorrencia(*argumentos)
+        elif tipo == 'V': self.atualizar_severidade_ocorrencia(*argumentos)
+        elif tipo == 'D': self.desfazer_ultima_acao()
+        elif tipo == 'M': self._mesclar_grupos(argumentos[0])
+        elif tipo == 'E': self.adicionar_equipe(*argumentos)
+        elif tipo == 'P': self.alterar_equipe(*argumentos)
+        elif tipo == 'K': self.atualizar_risco_regiao(*argumentos)
+        elif tipo == 'Q':
+            for regiao, prioridade in argumentos[0].items():
+                self.arvore_regioes.inserir(regiao, prioridade)
+        elif tipo == 'G': self.carregar_mapa(*argumentos)
+        else:
+            raise ValueError(f"Operação desconhecida no diário: {tipo}")
+    
+    # Snapshot compacto: ocorrências ativas em linhas (as absorvidas por mesclagens já estão em linhas na pilha de
+    # desfazer; as resolvidas, no acervo); heap, índices e pool de equipes são reconstruídos na carga
+    def _estado_snapshot(self):
+        self.acervo.descarregar()  # O snapshot só referencia linhas já gravadas
+        return {
+            'versao': 1,
+            'proximos_ids': [self.proximo_id_ocorrencia, self.proximo_id_equipe],
+            'ocorrencias': [o.linha() for o in self.ocorrencias_ativas.values()],
+            'fila_processamento': list(self.fila_processamento),
+            'equipes': [[e.id, e.nome, e.especializacao, e.base, e.disponivel, e.localizacao_atual, e.historico_acoes.registros_em_memoria(),
+                         e.historico_acoes.bytes_em_disco] for e in self.equipes.values()],
+            'regioes_risco': self.regioes_risco,
+            'prioridades_escalonadas': {regiao: self.arvore_regioes.prioridade(regiao) for regiao, risco in self.regioes_risco.items()
+                                        if self.arvore_regioes.prioridade(regiao) != risco},  # Ver reavaliar_prioridades
+            'pilha_desfazer': list(self.pilha_desfazer),
+            'mapa': self.mapa_carregado,
+            'linhas_acervo': len(self.acervo),
+            'janelas': self.janelas.estado()
+        }
+    
+    def _carregar_snapshot(self, estado):
+        self.proximo_id_ocorrencia, self.proximo_id_equipe = estado['proximos_ids']
+        self.ocorrencias_ativas = {linha[0]: Ocorrencia.de_linha(linha, self.armazem) for linha in estado['ocorrencias']}
+        self.fila_prioridade = HeapIndexado(Ocorrencia.chave_prioridade)
+        self.fila_prioridade.inserir_lote([o for o in self.ocorrencias_ativas.values() if o.status == "PENDENTE"])
+        self.indice_espacial, self.indices = IndiceEspacial(), IndicesOcorrencias()
+        for ocorrencia in self.ocorrencias_ativas.values():
+            ocorrencia.ativa = True
+            self.indice_espacial.inserir(ocorrencia.id, ocorrencia.coordenadas)
+            self.indices.adicionar(ocorrencia)
+        self.atendimentos = {o.equipe_responsavel: o.id for o in self.indices.consultar(self.indices.por_status, "EM_ATENDIMENTO")}
+        self.fila_processamento = deque(estado['fila_processamento'])
+        
+        self.pilha_desfazer = deque()
+        for acao in estado['pilha_desfazer']:
+            if acao[0] == 'MESCLAR_OCORRENCIAS':
+                acao = [acao[0], [tuple(grupo) for grupo in acao[1]]]
+            elif acao[0] == 'ATENDER_LOTE':
+                acao = [acao[0], [tuple(registro) for registro in acao[1]]]
+            self.pilha_desfazer.append(tuple(acao))
+        
+        for equipe in self.equipes.values():
+            equipe.historico_acoes.fechar()
+        self.equipes, self.equipes_disponiveis = {}, PoolEquipes()
+        for id_equipe, nome, especializacao, base, disponivel, localizacao, historico, segmento in estado['equipes']:
+            equipe = Equipe(id_equipe, nome, especializacao, base, diretorio_historico=self.diretorio_historico, relogio=self._agora)
+            equipe.disponivel, equipe.localizacao_atual = disponivel, localizacao
+            if self.diretorio_historico:  # Ver _alinhar_historicos
+                equipe.historico_acoes.truncar(segmento)
+            for instante, acao in historico:
+                equipe.historico_acoes.registrar(acao, de_microssegundos(instante))
+            self.equipes[id_equipe] = equipe
+            if disponivel:
+                self.equipes_disponiveis.adicionar(equipe)
+        
+        self.regioes_risco, self.arvore_regioes = {}, ArvoreRegiao()
+        for regiao, prioridade in estado['regioes_risco'].items():
+            self.regioes_risco[regiao] = prioridade
+            self.arvore_regioes.inserir(regiao, prioridade)
+        for regiao, prioridade in estado.get('prioridades_escalonadas', {}).items():
+            self.arvore_regioes.inserir(regiao, prioridade)
+        self.janelas.restaurar(estado.get('janelas'))  # Snapshots anteriores não têm as janelas
+        if estado['mapa']:
+            self.carregar_mapa(*estado['mapa'])
 
 # Interface de menu interativo
 def menu_principal():
-    sistema = SistemaIVERN()
+    sistema = SistemaIVERN(SaidaConsole())
     while True:
         print("\n" + "="*60 + "\n🌿 SISTEMA IVERN - COORDENAÇÃO DE QUEIMADAS 🌿\n" + "="*60)
         print("1. 🆕 Inserir nova ocorrência\n2. 🚨 Atender próxima ocorrência\n3. 📝 Registrar ações realizadas")
         print("4. 📋 Listar histórico de equipe\n5. 🔄 Atualizar status de ocorrência\n6. 📊 Gerar relatório por região")
         print("7. 🎲 Simular chamadas aleatórias\n8. ✅ Finalizar ocorrência\n9. 🔍 Buscar ocorrências por região")
         print("10. 🗺️ Listar regiões por prioridade\n11. ↩️ Desfazer última ação\n12. 🖥️ Status do sistema")
-        print("13. 🛣️ Calcular rota otimizada\n14. 🗺️ Planejar atendimento múltiplo\n15. 🌐 Visualizar mapa de conexões\n0. 🚪 Sair")
+        print("13. 🛣️ Calcular rota otimizada\n14. 🗺️ Planejar atendimento múltiplo\n15. 🌐 Visualizar mapa de conexões")
+        print("16. 🔥 Atualizar severidade de ocorrência\n17. 🚒 Atender ocorrências em lote\n18. 🌡️ Atualizar risco de região")
+        print("19. 📚 Histórico de ocorrências resolvidas\n20. 🧭 Planejar a partir de várias bases\n21. 📈 Atividade recente por região")
+        print("22. 🌡️ Reavaliar prioridades pela atividade recente\n23. 🧭 Percurso otimizado por todas as regiões\n0. 🚪 Sair")
         
         try:
             opcao = input("Escolha uma opção: ").strip()
@@ -505,15 +3415,26 @@ def menu_principal():
             elif opcao == "4": sistema.listar_historico_equipe(int(input("ID da equipe: ")))
             elif opcao == "5": sistema.atualizar_status_ocorrencia(int(input("ID da ocorrência: ")), input("Novo status (PENDENTE/EM_ATENDIMENTO/RESOLVIDO): ").upper())
             elif opcao == "6": sistema.gerar_relatorio_regiao(input("Região (deixe vazio para todas): ").strip() or None)
-            elif opcao == "7": sistema.simular_chamadas_aleatorias(int(input("Quantidade de chamadas para simular (padrão 5): ") or "5"))
+            elif opcao == "7":
+                quantidade = int(input("Quantidade de chamadas para simular (padrão 5): ") or "5")
+                sistema.simular_chamadas_aleatorias(quantidade, em_lote=quantidade > 100)
             elif opcao == "8": sistema.finalizar_ocorrencia(int(input("ID da ocorrência para finalizar: ")))
             elif opcao == "9": sistema.buscar_ocorrencias_por_regiao(input("Nome da região para buscar: "))
             elif opcao == "10": sistema.listar_regioes_por_prioridade()
             elif opcao == "11": sistema.desfazer_ultima_acao()
             elif opcao == "12": sistema.status_sistema()
-            elif opcao == "13": sistema.calcular_rota_otima(input("Região de origem: "), input("Região de destino: "))
+            elif opcao == "13": sistema.calcular_rota_otima(input("Região de origem: "), input("Região de destino: "),
+                                                            input("Método (dijkstra/a_estrela/bidirecional) [dijkstra]: ").strip() or 'dijkstra')
             elif opcao == "14": sistema.planejar_atendimento_multiplo(input("Região base para planejamento: "))
             elif opcao == "15": sistema.visualizar_mapa_conexoes()
+            elif opcao == "16": sistema.atualizar_severidade_ocorrencia(int(input("ID da ocorrência: ")), int(input("Nova severidade (1-10): ")))
+            elif opcao == "17": sistema.atender_em_lote(int(input("Máximo de ocorrências (vazio = todas as equipes livres): ") or "0") or None)
+            elif opcao == "18": sistema.atualizar_risco_regiao(input("Região: "), int(input("Nível de risco (1-10): ")))
+            elif opcao == "19": sistema.relatorio_historico()
+            elif opcao == "20": sistema.planejar_multiplas_bases([b.strip() for b in input("Bases separadas por ; (vazio = posições das equipes): ").split(';') if b.strip()] or None)
+            elif opcao == "21": sistema.relatorio_atividade_recente(input("Região (deixe vazio para todas): ").strip() or None)
+            elif opcao == "22": sistema.reavaliar_prioridades()
+            elif opcao == "23": sistema.planejar_percurso(input("Região base do percurso: "))
             elif opcao == "0": print("👋 Encerrando Sistema IVERN. Até logo!"); break
             else: print("❌ Opção inválida!")
         except ValueError: print("❌ Entrada inválida! Tente novamente.")
@@ -0,0 +1,354 @@
+# Serviço de ingestão do Sistema IVERN: aceita, de muitos clientes ao mesmo tempo, relatos de ocorrências e
+# comandos em NDJSON (um objeto JSON por linha) por TCP, ou pelo mesmo socket via HTTP (POST com corpo NDJSON).
+# Cada conexão valida e normaliza suas mensagens e as coloca numa fila limitada: com a fila cheia a leitura do
+# socket para, e o TCP propaga a contrapressão ao cliente. Uma única tarefa escritora é dona do SistemaIVERN e
+# aplica as mensagens em lotes a cada volta do laço de eventos (relatos consecutivos viram uma só inserção em
+# lote, com um só registro no diário). Consultas não entram na fila: são respondidas na hora, a partir do
+# instantâneo publicado após o último lote aplicado; a exceção são as de uma conexão com relatos ou comandos
+# ainda na fila, que entram atrás deles para que a conexão sempre leia o que ela mesma escreveu.
+#
+#   python servidor.py --porta 8765 --dados dados_ivern
+#   {"regiao": "Pantanal", "severidade": 7, "latitude": -19.9, "longitude": -56.1, "ref": 1}
+#   {"op": "atender", "ref": 2}
+#   {"op": "resumo"}
+#   curl -s localhost:8765/resumo   •   curl -s --data-binary @relatos.ndjson localhost:8765/ocorrencias
+
+import argparse
+import asyncio
+import heapq
+import json
+from itertools import islice
+
+from main import SaidaEventos, SistemaIVERN
+
+# Relato normalizado como na ingestão em lote, com região textual e coordenadas geográficas válidas (NaN e
+# infinitos falham nas comparações): a escritora só recebe registros que a inserção em lote não rejeita
+def _relato(mensagem):
+    regiao, severidade, (latitude, longitude), descricao = SistemaIVERN._normalizar_registro(mensagem)
+    if not isinstance(regiao, str) or not regiao:
+        raise TypeError("regiao deve ser um texto não vazio")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"coordenadas fora do intervalo geográfico: ({latitude}, {longitude})")
+    return regiao, severidade, (latitude, longitude), str(descricao)
+
+# Comandos que alteram o estado: método do sistema e extração/validação dos argumentos (feita na conexão)
+COMANDOS = {
+    'atender': ('atender_proxima_ocorrencia', lambda m: ()),
+    'atender_lote': ('atender_em_lote', lambda m: (int(m['limite']) if m.get('limite') else None,)),
+    'acoes': ('registrar_acoes_realizadas', lambda m: (int(m['id']), [str(acao) for acao in m['acoes']])),
+    'finalizar': ('finalizar_ocorrencia', lambda m: (int(m['id']),)),
+    'status': ('atualizar_status_ocorrencia', lambda m: (int(m['id']), str(m['status']).upper())),
+    'severidade': ('atualizar_severidade_ocorrencia', lambda m: (int(m['id']), SistemaIVERN._validar_severidade(m['severidade']))),
+    'risco': ('atualizar_risco_regiao', lambda m: (str(m['regiao']), int(m['prioridade']))),
+    'desfazer': ('desfazer_ultima_acao', lambda m: ()),
+    'gravar_snapshot': ('gravar_snapshot', lambda m: ()),
+}
+CONSULTAS = ('resumo', 'ocorrencia', 'regiao', 'metricas')
+_FIM_CONEXAO = object()  # Marca na fila: todas as mensagens anteriores da conexão já foram respondidas
+
+# Mensagens de uma conexão ainda não respondidas pela escritora (ver _processar)
+class _Conexao:
+    __slots__ = ('pendentes',)
+    def __init__(self): self.pendentes = 0
+
+MOTIVOS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found'}
+
+class ServidorIVERN:
+    def __init__(self, sistema=None, host='127.0.0.1', porta=8765, tamanho_fila=10000, lote_maximo=2000, proximas=10):
+        # Sem sistema fornecido, a saída guarda só o último evento: ele explica as recusas (ex.: OCORRENCIA_NAO_ENCONTRADA)
+        self.sistema = sistema or SistemaIVERN(SaidaEventos(limite=1))
+        self.host, self.porta, self.lote_maximo, self.proximas = host, porta, lote_maximo, proximas
+        self.fila = asyncio.Queue(tamanho_fila)
+        self.versao, self._instantaneo = 0, None
+        self.servidor = self.tarefa_escritora = None
+        self.recebidas = self.lotes = 0
+
+    async def iniciar(self):
+        self.tarefa_escritora = asyncio.create_task(self._escritor())
+        self.servidor = await asyncio.start_server(self._atender_conexao, self.host, self.porta)
+        self.porta = self.servidor.sockets[0].getsockname()[1]  # Porta real quando pedida a 0
+        if self.sistema.metricas.ativa:
+            self.sistema.metricas.observar('fila_servidor', self.fila.qsize)
+        return self
+
+    async def servir(self):
+        async with self.servidor:
+            await self.servidor.serve_forever()
+
+    # Para de aceitar conexões, aplica o que já está na fila e encerra a tarefa escritora
+    async def parar(self):
+        if self.servidor:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        if self.tarefa_escritora:
+            await self.fila.put(None)
+            await self.tarefa_escritora
+
+    # Tarefa escritora: única que altera o sistema. Aplica de uma vez tudo o que já estiver na fila (até
+    # lote_maximo) e devolve o controle ao laço para as conexões lerem mais mensagens.
+    async def _escritor(self):
+        fila = self.fila
+        while True:
+            lote = [await fila.get()]
+            while len(lote) < self.lote_maximo and not fila.empty():
+                lote.append(fila.get_nowait())
+            if not self._aplicar_lote(lote):
+                return
+            await asyncio.sleep(0)
+
+    def _aplicar_lote(self, lote):
+        insercoes, alterou, continuar = [], False, True
+        for item in lote:
+            if item is None:
+                continuar = False
+                break
+            tipo, argumentos, ref, responder = item
+            if tipo == 'inserir':
+                insercoes.append((argumentos, ref, responder))
+                continue
+            alterou |= self._inserir(insercoes)
+            if tipo is _FIM_CONEXAO:
+                responder(None)
+                continue
+            consulta = tipo in CONSULTAS
+            if consulta and alterou:  # A consulta vê o estado após as escritas anteriores do lote
+                self.versao, alterou = self.versao + 1, False
+            alterou |= not consulta
+            try:
+                responder(self._consultar(tipo, argumentos) if consulta else self._executar(tipo, argumentos, ref))
+            except Exception as erro:  # Ex.: resultado que não vira JSON; a resposta de erro sempre vira
+                responder({'ref': ref, 'ok': False, 'erro': f"{type(erro).__name__}: {erro}"})
+        alterou |= self._inserir(insercoes)
+        if alterou:
+            self.versao += 1
+        self.lotes += 1
+        return continuar
+
+    # Relatos consecutivos viram uma inserção em lote; todo o bloco forma uma única ação de desfazer. Já
+    # normalizados na conexão, não deveriam ser rejeitados, mas uma recusa (linha nos erros do resumo) ou uma
+    # exceção é respondida aos relatos afetados com ok: False, sem derrubar a escritora.
+    def _inserir(self, insercoes):
+        if not insercoes:
+            return False
+        try:
+            resumo = self.sistema.inserir_ocorrencias_em_lote([registro for registro, _, _ in insercoes], silencioso=True)
+        except Exception as erro:
+            for _, ref, responder in insercoes:
+                responder({'ref': ref, 'ok': False, 'erro': f"{type(erro).__name__}: {erro}"})
+            insercoes.clear()
+            return True  # O estado pode ter mudado antes da falha: o instantâneo é refeito
+        ids, recusadas = iter(range(resumo['ids'][0], resumo['ids'][1] + 1) if resumo['ids'] else ()), dict(resumo['erros'])
+        for linha, (_, ref, responder) in enumerate(insercoes, 1):
+            if linha not in recusadas and (id_ocorrencia := next(ids, None)) is not None:
+                responder({'ref': ref, 'ok': True, 'id': id_ocorrencia})
+            else:
+                responder({'ref': ref, 'ok': False, 'erro': f"Relato recusado: {recusadas.get(linha, 'RECUSADO')}"})
+        insercoes.clear()
+        return resumo['inseridas'] > 0
+
+    def _executar(self, tipo, argumentos, ref):
+        metodo = COMANDOS[tipo][0]
+        try:
+            resultado = getattr(self.sistema, metodo)(*argumentos)
+        except Exception as erro:  # Um comando com falha não derruba a tarefa escritora
+            return {'ref': ref, 'ok': False, 'erro': f"{type(erro).__name__}: {erro}"}
+        if resultado is None or resultado is False or resultado == []:
+            return {'ref': ref, 'ok': False, 'erro': self._motivo_recusa()}
+        return {'ref': ref, 'ok': True} if resultado is True else {'ref': ref, 'ok': True, 'resultado': resultado}
+
+    def _motivo_recusa(self):
+        eventos = getattr(self.sistema.saida, 'eventos', None)
+        return eventos[-1].tipo if eventos else 'RECUSADO'
+
+    # Instantâneo somente leitura, refeito no máximo uma vez por versão (só quando consultado). Como a escritora
+    # aplica cada lote sem ceder o laço, toda leitura vê o estado entre dois lotes, nunca um lote pela metade.
+    def instantaneo(self):
+        if self._instantaneo is not None and self._instantaneo['versao'] == self.versao:
+            return self._instantaneo
+        sistema = self.sistema
+        fila, agregados = sistema.fila_prioridade, sistema.indices.agregados
+        self._instantaneo = {
+            'versao': self.versao,
+            'instante': sistema.relogio().isoformat(timespec='milliseconds'),
+            'ativas': len(sistema.ocorrencias_ativas),
+            'na_fila': len(fila),
+            'por_status': {status: len(ids) for status, ids in sistema.indices.por_status.items()},
+            'regioes': {regiao: {'ativas': dados['ativas'], 'severidade_media': dados['total_severidade'] / dados['ativas']}
+                        for regiao, dados in agregados.items()},
+            'equipes': [{'id': e.id, 'nome': e.nome, 'especializacao': e.especializacao, 'disponivel': e.disponivel,
+                         'localizacao': e.localizacao_atual} for e in sistema.equipes.values()],
+            'proximas': [self._descrever(o) for o in self._primeiros_da_fila(fila, self.proximas)],
+            'resolvidas': len(sistema.acervo),
+            'servidor': {'recebidas': self.recebidas, 'lotes': self.lotes, 'fila': self.fila.qsize()},
+        }
+        return self._instantaneo
+
+    # k primeiros do heap sem alterá-lo: fronteira de filhos em O(k log k)
+    @staticmethod
+    def _primeiros_da_fila(fila, k):
+        primeiros, fronteira = [], [(fila.chaves[0], 0)] if fila.itens else []
+        while fronteira and len(primeiros) < k:
+            _, posicao = heapq.heappop(fronteira)
+            primeiros.append(fila.itens[posicao])
+            for filho in (2 * posicao + 1, 2 * posicao + 2):
+                if filho < len(fila.itens):
+                    heapq.heappush(fronteira, (fila.chaves[filho], filho))
+        return primeiros
+
+    @staticmethod
+    def _descrever(ocorrencia):
+        return {'id': ocorrencia.id, 'regiao': ocorrencia.regiao, 'severidade': ocorrencia.severidade,
+                'coordenadas': ocorrencia.coordenadas, 'descricao': ocorrencia.descricao,
+                'timestamp': ocorrencia.timestamp.isoformat(), 'status': ocorrencia.status,
+                'equipe': ocorrencia.equipe_responsavel, 'acoes': list(ocorrencia.listar_acoes())}
+
+    def _consultar(self, tipo, mensagem):
+        ref = mensagem.get('ref')
+        if tipo == 'resumo':
+            return {'ref': ref, 'ok': True, 'resultado': self.instantaneo()}
+        if tipo == 'metricas':
+            metricas = self.sistema.metricas
+            return {'ref': ref, 'ok': metricas.ativa, 'resultado': metricas.instantaneo()} if metricas.ativa else \
+                   {'ref': ref, 'ok': False, 'erro': 'METRICAS_DESATIVADAS'}
+        if tipo == 'ocorrencia':
+            ocorrencia = self.sistema.ocorrencias_ativas.get(int(mensagem['id']))
+            if ocorrencia is None:
+                return {'ref': ref, 'ok': False, 'erro': 'OCORRENCIA_NAO_ENCONTRADA', 'versao': self.versao}
+            return {'ref': ref, 'ok': True, 'versao': self.versao, 'resultado': self._descrever(ocorrencia)}
+        # regiao: ids das ocorrências ativas da região, limitados a `limite`
+        ids = self.sistema.indices.por_regiao.get(mensagem['regiao'], {})
+        return {'ref': ref, 'ok': True, 'versao': self.versao, 'total': len(ids),
+                'resultado': list(islice(ids, int(mensagem.get('limite', 100))))}
+
+    # Uma mensagem NDJSON: consultas respondem na hora; relatos e comandos entram na fila (espera se cheia).
+    # Enquanto a conexão tiver mensagens na fila, suas consultas também entram, para serem respondidas depois delas.
+    async def _processar(self, linha, responder, conexao):
+        try:
+            mensagem = json.loads(linha)
+            if not isinstance(mensagem, dict):
+                raise ValueError("mensagem deve ser um objeto JSON")
+        except ValueError as erro:
+            responder({'ok': False, 'erro': f"JSON inválido: {erro}"})
+            return
+        tipo, ref = mensagem.get('op', 'inserir'), mensagem.get('ref')
+        try:
+            if tipo in CONSULTAS and not conexao.pendentes:
+                responder(self._consultar(tipo, mensagem))
+                return
+            if tipo in CONSULTAS:
+                argumentos = mensagem
+            elif tipo == 'inserir':
+                argumentos = _relato(mensagem)
+            elif tipo in COMANDOS:
+                argumentos = COMANDOS[tipo][1](mensagem)
+            else:
+                responder({'ref': ref, 'ok': False, 'erro': f"Operação desconhecida: {tipo}"})
+                return
+        except (KeyError, IndexError, TypeError, ValueError) as erro:
+            responder({'ref': ref, 'ok': False, 'erro': f"Mensagem inválida ({type(erro).__name__}: {erro})"})
+            return
+        self.recebidas += 1
+        conexao.pendentes += 1
+        def concluir(resposta):
+            conexao.pendentes -= 1
+            responder(resposta)
+        await self.fila.put((tipo, argumentos, ref, concluir))
+
+    async def _atender_conexao(self, leitor, escritor):
+        try:
+            linha = await leitor.readline()
+            if linha.startswith((b'GET ', b'POST ')):
+                await self._atender_http(linha, leitor, escritor)
+                return
+            responder, conexao = self._responder_stream(escritor), _Conexao()
+            while linha:
+                if linha.strip():
+                    await self._processar(linha, responder, conexao)
+                if escritor.transport.get_write_buffer_size() > 1 << 20:
+                    await escritor.drain()  # Cliente que não lê as respostas também sofre contrapressão
+                linha = await leitor.readline()
+            # Fim da entrada: fecha só depois que a escritora responder tudo o que a conexão enfileirou
+            concluido = asyncio.get_running_loop().create_future()
+            await self.fila.put((_FIM_CONEXAO, None, None, lambda _: concluido.done() or concluido.set_result(None)))
+            await concluido
+            await escritor.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass  # Conexão perdida ou linha acima do limite do leitor: a conexão é descartada
+        finally:
+            escritor.close()
+
+    @staticmethod
+    def _responder_stream(escritor):
+        def responder(resposta):
+            if resposta is not None and not escritor.is_closing():
+                escritor.write(json.dumps(resposta, ensure_ascii=False).encode('utf-8') + b"\n")
+        return responder
+
+    # HTTP mínimo (uma requisição por conexão): GET /resumo, /metricas (texto Prometheus), /ocorrencias/<id>;
+    # POST com corpo NDJSON (relatos e comandos), respondido com uma linha NDJSON por mensagem, na ordem
+    async def _atender_http(self, linha_pedido, leitor, escritor):
+        metodo, caminho, _ = linha_pedido.decode('latin-1').split(' ', 2)
+        cabecalhos = {}
+        while (linha := await leitor.readline()) not in (b'\r\n', b'\n', b''):
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        status, tipo_conteudo, corpo = 200, 'application/json', None
+        if metodo == 'GET' and caminho in ('/', '/resumo'):
+            corpo = json.dumps(self.instantaneo(), ensure_ascii=False)
+        elif metodo == 'GET' and caminho == '/metricas' and self.sistema.metricas.ativa:
+            tipo_conteudo, corpo = 'text/plain; version=0.0.4', self.sistema.metricas.prometheus()
+        elif metodo == 'GET' and caminho.startswith('/ocorrencias/') and caminho[13:].isdigit():
+            resposta = self._consultar('ocorrencia', {'id': caminho[13:]})
+            status, corpo = (200 if resposta['ok'] else 404), json.dumps(resposta, ensure_ascii=False)
+        elif metodo == 'POST' and not (tamanho := cabecalhos.get('content-length', '0')).isdigit():
+            status, corpo = 400, json.dumps({'ok': False, 'erro': f"Content-Length inválido: {tamanho}"}, ensure_ascii=False)
+        elif metodo == 'POST':
+            linhas = [l for l in (await leitor.readexactly(int(tamanho))).split(b"\n") if l.strip()]
+            respostas, concluido = [None] * len(linhas), asyncio.get_running_loop().create_future()
+            pendentes = len(linhas)
+            def responder_em(i):
+                def responder(resposta):
+                    nonlocal pendentes
+                    respostas[i], pendentes = resposta, pendentes - 1
+                    if not pendentes and not concluido.done(): concluido.set_result(None)
+                return responder
+            conexao = _Conexao()
+            for i, l in enumerate(linhas):
+                await self._processar(l, responder_em(i), conexao)
+            if linhas:
+                await concluido
+            tipo_conteudo, corpo = 'application/x-ndjson', "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in respostas)
+        else:
+            status, corpo = 404, json.dumps({'ok': False, 'erro': 'Rota não encontrada'})
+
+        dados = corpo.encode('utf-8')
+        escritor.write(f"HTTP/1.1 {status} {MOTIVOS_HTTP[status]}\r\nContent-Type: {tipo_conteudo}; charset=utf-8\r\n"
+                       f"Content-Length: {len(dados)}\r\nConnection: close\r\n\r\n".encode('latin-1') + dados)
+        await escritor.drain()
+
+async def _executar(opcoes):
+    sistema = SistemaIVERN(SaidaEventos(limite=1), diretorio_dados=opcoes.dados, metricas=opcoes.metricas)
+    servidor = await ServidorIVERN(sistema, opcoes.host, opcoes.porta, opcoes.tamanho_fila, opcoes.lote_maximo).iniciar()
+    print(f"🌐 Servidor IVERN em {opcoes.host}:{servidor.porta} (NDJSON por TCP ou HTTP)")
+    try:
+        await servidor.servir()
+    finally:
+        await servidor.parar()
+        sistema.fechar()  # Confirma o último grupo do diário
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de ingestão do Sistema IVERN")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--dados', help="diretório de persistência (diário + snapshots)")
+    parser.add_argument('--tamanho-fila', dest='tamanho_fila', type=int, default=10000)
+    parser.add_argument('--lote-maximo', dest='lote_maximo', type=int, default=2000)
+    parser.add_argument('--metricas', action='store_true', help="liga a instrumentação (GET /metricas)")
+    try:
+        asyncio.run(_executar(parser.parse_args()))
+    except KeyboardInterrupt:
+        print("\n👋 Servidor encerrado.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+# Simulador de eventos discretos do Sistema IVERN: um heap de eventos sobre um relógio virtual conduz um
+# SistemaIVERN silencioso por uma temporada inteira de incêndios sem esperar o tempo real. Chamadas chegam por
+# processos de Poisson por região (taxa proporcional ao risco, modulada pela sazonalidade e pelo ciclo diário);
+# cada despacho leva a equipe pelo mapa (distância * HORAS_POR_UNIDADE), o combate dura mais quanto maior a
+# severidade e, ao final, a equipe descansa/reabastece e volta à base antes de ficar disponível de novo.
+# O relatório (JSON) traz esperas na fila, tempos de resposta, utilização das equipes e ocorrências não
+# atendidas no prazo, para dimensionar as brigadas.
+#
+#   python simulacao.py --dias 120 --chamadas-por-dia 12 --equipes 12 --saida temporada.json
+#   python simulacao.py --dias 90 --nos 400 --chamadas-por-dia 150 --equipes 150,250,350   # Compara frotas
+
+import argparse
+import bisect
+import datetime
+import heapq
+import json
+import math
+import random
+import sys
+import time
+from itertools import accumulate
+
+from benchmark import gerar_grafo
+from main import HORAS_POR_UNIDADE, HistogramaLatencia, RelogioVirtual, SaidaNula, SistemaIVERN, faixa_severidade
+
+ESPECIALIZACOES = ("TERRESTRE", "AEREA", "RESGATE")
+PERCENTIS = (50, 90, 99)
+HORA = datetime.timedelta(hours=1)
+CHEGADA, FIM_COMBATE, LIBERACAO = range(3)  # Tipos de evento do heap
+
+# Duração do combate (horas): gama de forma 2 com média 0,5 h + 0,5 h por ponto de severidade
+def tempo_servico_padrao(severidade, rng):
+    return rng.gammavariate(2.0, (0.5 + 0.5 * severidade) / 2.0)
+
+# Severidade de uma chamada: normal em torno do risco da região menos 2 (desvio 2), limitada a 1-10
+def severidade_padrao(risco, rng):
+    return min(10, max(1, round(rng.gauss(risco - 2, 2))))
+
+class Simulador:
+    def __init__(self, sistema=None, dias=90, chamadas_por_dia=10.0, equipes=None, semente=0, taxas=None,
+                 prazo_resposta=3.0, retorno=1.0, voltar_base=True, sazonalidade=0.5, ciclo_diario=0.5,
+                 tempo_servico=tempo_servico_padrao, severidade=severidade_padrao, inicio=None, horas_por_unidade=HORAS_POR_UNIDADE):
+        self.relogio = RelogioVirtual(inicio or datetime.datetime(2025, 6, 1))
+        self.inicio = self.relogio()
+        self.sistema = sistema or SistemaIVERN(SaidaNula())
+        self.sistema.relogio = self.relogio  # Todo "agora" do sistema passa a vir do relógio virtual
+        self.horizonte, self.chamadas_por_dia = dias * 24.0, chamadas_por_dia
+        self.prazo_resposta, self.retorno, self.voltar_base = prazo_resposta, retorno, voltar_base
+        self.horas_por_unidade = horas_por_unidade  # Deslocamento por unidade de peso do mapa
+        self.sazonalidade, self.ciclo_diario = sazonalidade, ciclo_diario
+        self.tempo_servico, self.severidade = tempo_servico, severidade
+        self.semente, self.rng = semente, random.Random(semente)
+        self.eventos, self.sequencia, self.agora = [], 0, 0.0  # Heap de (instante em horas, sequência, tipo, a, b)
+
+        # Regiões de origem das chamadas: taxas explícitas (peso relativo) ou proporcionais ao risco
+        grafo = self.sistema.grafo_regioes
+        self.regioes = [regiao for regiao in grafo.vertices if not taxas or taxas.get(regiao, 0) > 0]
+        riscos = self.sistema.regioes_risco
+        self.riscos = [riscos.get(regiao, 5) for regiao in self.regioes]
+        pesos = [taxas[regiao] for regiao in self.regioes] if taxas else self.riscos
+        self.acumulados = list(accumulate(pesos))
+        if not self.regioes or self.acumulados[-1] <= 0:
+            raise ValueError("Nenhuma região com taxa de chamadas positiva")
+
+        self._preparar_equipes(equipes)
+        self.hora_inicial = self.inicio.hour + self.inicio.minute / 60
+        self.intensidade_maxima = (1 + sazonalidade) * (1 + ciclo_diario)
+
+        # Estatísticas
+        self.chegadas = {}  # id da ocorrência → (instante de chegada, faixa de severidade)
+        self.espera, self.resposta = HistogramaLatencia(), HistogramaLatencia()  # Em segundos
+        self.por_faixa = {}  # faixa → [chamadas, histograma de espera, histograma de resposta, fora do prazo]
+        self.total_chamadas = self.despachadas = self.resolvidas = self.esperaram = self.fora_do_prazo = self.sem_rota = 0
+        self.ocupacao = {id_equipe: 0.0 for id_equipe in self.sistema.equipes}  # Horas ocupadas dentro do horizonte
+        self.ocupada_desde = {}
+        self.horas_fase = {'deslocamento': 0.0, 'combate': 0.0, 'retorno': 0.0}
+        self.area_fila, self.fila_maxima, self._ultimo_instante = 0.0, 0, 0.0
+        self.processados, self.duracao = 0, None
+
+    # Completa a frota até `equipes` (especializações em rodízio) e distribui as bases pelas regiões em ordem
+    # de risco; as árvores de caminhos das bases entram no cache, e as distâncias base → ocorrência saem delas
+    def _preparar_equipes(self, equipes):
+        sistema, existentes = self.sistema, len(self.sistema.equipes)
+        total = max(existentes, equipes or 0)
+        candidatas = sorted(self.regioes, key=lambda regiao: -sistema.regioes_risco.get(regiao, 0))
+        bases = [candidatas[i * len(candidatas) // total] for i in range(total)] if total else []
+        # Equipes novas já nascem na base; as existentes só são movidas se estiverem em outro lugar
+        for i in range(existentes, total):
+            sistema.adicionar_equipe(f"Brigada {i + 1}", ESPECIALIZACOES[i % len(ESPECIALIZACOES)], bases[i])
+        self.bases = dict(zip(sistema.equipes, bases))
+        grafo = sistema.grafo_regioes
+        grafo.capacidade_cache = max(grafo.capacidade_cache, len(set(bases)) + 64)
+        for id_equipe, base in self.bases.items():
+            if sistema.equipes[id_equipe].localizacao_atual != base:
+                sistema.alterar_equipe(id_equipe, localizacao=base)
+            grafo.arvore_caminhos(base)
+        self.locais = dict(self.bases)
+
+    def _agendar(self, instante, tipo, a=None, b=None):
+        self.sequencia += 1
+        heapq.heappush(self.eventos, (instante, self.sequencia, tipo, a, b))
+
+    # Fator da taxa no instante (horas desde o início): pico da temporada no meio do horizonte, do dia às 15h
+    def intensidade(self, horas):
+        temporada = 1 + self.sazonalidade * (2 * math.sin(math.pi * horas / self.horizonte) - 1)
+        dia = 1 + self.ciclo_diario * math.sin(2 * math.pi * (self.hora_inicial + horas - 9) / 24)
+        return temporada * dia
+
+    # Superposição dos processos de Poisson das regiões: uma única taxa total (afinada pela intensidade) e
+    # a região sorteada na proporção do seu peso, o que equivale a um processo independente por região
+    def _proxima_chegada(self):
+        taxa_maxima, instante = self.chamadas_por_dia / 24 * self.intensidade_maxima, self.agora
+        if taxa_maxima <= 0:
+            return
+        while True:
+            instante += self.rng.expovariate(taxa_maxima)
+            if instante > self.horizonte:
+                return
+            if self.rng.random() * self.intensidade_maxima <= self.intensidade(instante):
+                self._agendar(instante, CHEGADA)
+                return
+
+    # A simulação nunca desfaz: a pilha de desfazer e a fila de processamento, que guardariam todas as chamadas
+    # da temporada, são esvaziadas a cada dia simulado para a memória não crescer com o horizonte
+    def executar(self):
+        inicio, heap, relogio, sistema = time.perf_counter(), self.eventos, self.relogio, self.sistema
+        self._proxima_chegada()
+        proxima_limpeza = 24.0
+        while heap and heap[0][0] <= self.horizonte:
+            instante, _, tipo, a, b = heapq.heappop(heap)
+            if instante >= proxima_limpeza:
+                sistema.pilha_desfazer.clear()
+                sistema.fila_processamento.clear()
+                proxima_limpeza += 24.0
+            fila = len(sistema.fila_prioridade)
+            self.area_fila += fila * (instante - self._ultimo_instante)
+            self.agora = self._ultimo_instante = instante
+            relogio.ajustar(self.inicio + instante * HORA)
+            if tipo == CHEGADA: self._chegada()
+            elif tipo == FIM_COMBATE: self._fim_combate(a, b)
+            else: self._liberar(a)
+            self.processados += 1
+        self.area_fila += len(sistema.fila_prioridade) * (self.horizonte - self._ultimo_instante)
+        self.duracao = time.perf_counter() - inicio
+        return self.relatorio()
+
+    def _chegada(self):
+        rng, sistema = self.rng, self.sistema
+        indice = bisect.bisect_left(self.acumulados, rng.random() * self.acumulados[-1])
+        regiao, severidade = self.regioes[indice], self.severidade(self.riscos[indice], rng)
+        coordenadas = sistema.grafo_regioes.coordenadas.get(regiao) or (0.0, 0.0)
+        id_ocorrencia = sistema.inserir_nova_ocorrencia(regiao, severidade, coordenadas, "Chamada simulada")
+        faixa = faixa_severidade(severidade)
+        self.chegadas[id_ocorrencia] = (self.agora, faixa)
+        if (dados := self.por_faixa.get(faixa)) is None:
+            dados = self.por_faixa[faixa] = [0, HistogramaLatencia(), HistogramaLatencia(), 0]
+        dados[0] += 1
+        self.total_chamadas += 1
+        self._despachar()
+        self.fila_maxima = max(self.fila_maxima, len(sistema.fila_prioridade))
+        self._proxima_chegada()
+
+    # Despacha pela regra do próprio sistema (mais grave primeiro, equipe adequada mais próxima) enquanto houver
+    # fila e equipe livre; o deslocamento parte de onde a equipe estava antes do despacho
+    def _despachar(self):
+        sistema, agora = self.sistema, self.agora
+        while sistema.fila_prioridade and sistema.equipes_disponiveis:
+            if (id_ocorrencia := sistema.atender_proxima_ocorrencia()) is None:
+                return
+            ocorrencia = sistema.ocorrencias_ativas[id_ocorrencia]
+            id_equipe, regiao = ocorrencia.equipe_responsavel, ocorrencia.regiao
+            distancia = sistema.grafo_regioes.distancia(self.locais[id_equipe], regiao)
+            if not math.isfinite(distancia):
+                self.sem_rota, distancia = self.sem_rota + 1, 0.0
+            deslocamento, combate = distancia * self.horas_por_unidade, self.tempo_servico(ocorrencia.severidade, self.rng)
+            self.locais[id_equipe], self.ocupada_desde[id_equipe] = regiao, agora
+            self.horas_fase['deslocamento'] += deslocamento
+            self.horas_fase['combate'] += combate
+            self._agendar(agora + deslocamento + combate, FIM_COMBATE, id_ocorrencia, id_equipe)
+
+            chegada, faixa = self.chegadas.pop(id_ocorrencia)
+            espera, resposta = agora - chegada, agora - chegada + deslocamento
+            _, espera_faixa, resposta_faixa, _ = dados = self.por_faixa[faixa]
+            for histograma, valor in ((self.espera, espera), (espera_faixa, espera), (self.resposta, resposta), (resposta_faixa, resposta)):
+                histograma.registrar(round(valor * 3600))
+            self.despachadas += 1
+            self.esperaram += espera > 0
+            if resposta > self.prazo_resposta:
+                self.fora_do_prazo += 1
+                dados[3] += 1
+
+    def _fim_combate(self, id_ocorrencia, id_equipe):
+        sistema = self.sistema
+        sistema.finalizar_ocorrencia(id_ocorrencia)
+        self.resolvidas += 1
+        volta = (sistema.grafo_regioes.distancia(self.bases[id_equipe], self.locais[id_equipe]) * self.horas_por_unidade
+                 if self.voltar_base else 0.0)
+        retorno = self.retorno + (volta if math.isfinite(volta) else 0.0)
+        if retorno > 0:
+            sistema.alterar_equipe(id_equipe, disponivel=False)
+            self.horas_fase['retorno'] += retorno
+            self._agendar(self.agora + retorno, LIBERACAO, id_equipe)
+        else:
+            self._encerrar_ocupacao(id_equipe)
+        self._despachar()
+
+    def _liberar(self, id_equipe):
+        localizacao = self.bases[id_equipe] if self.voltar_base else None
+        self.sistema.alterar_equipe(id_equipe, disponivel=True, localizacao=localizacao)
+        if localizacao:
+            self.locais[id_equipe] = localizacao
+        self._encerrar_ocupacao(id_equipe)
+        self._despachar()
+
+    def _encerrar_ocupacao(self, id_equipe, ate=None):
+        self.ocupacao[id_equipe] += (self.agora if ate is None else ate) - self.ocupada_desde.pop(id_equipe)
+
+    @staticmethod
+    def _resumo_histograma(histograma):
+        if not histograma:
+            return {'quantidade': 0}
+        percentis = histograma.percentis(PERCENTIS)
+        return {'quantidade': len(histograma), 'media_min': histograma.soma / len(histograma) / 60,
+                **{f"p{p}_min": percentis[p] / 60 for p in PERCENTIS}, 'max_min': histograma.maximo / 60}
+
+    # Relatório da temporada; equipes ainda ocupadas no fim contam só até o horizonte, e as chamadas ainda na
+    # fila entram como não atendidas (com a espera acumulada até o horizonte)
+    def relatorio(self):
+        sistema, horizonte = self.sistema, self.horizonte
+        ocupacao = dict(self.ocupacao)
+        for id_equipe, desde in self.ocupada_desde.items():
+            ocupacao[id_equipe] += horizonte - desde
+        utilizacao = {id_equipe: horas / horizonte for id_equipe, horas in ocupacao.items()} if horizonte else {}
+        por_especializacao = {}
+        for id_equipe, fracao in utilizacao.items():
+            por_especializacao.setdefault(sistema.equipes[id_equipe].especializacao, []).append(fracao)
+        pendentes = [horizonte - chegada for chegada, _ in self.chegadas.values()]
+        pendentes_fora = sum(espera > self.prazo_resposta for espera in pendentes)
+        nao_atendidas = self.fora_do_prazo + pendentes_fora
+        return {
+            'parametros': {'dias': horizonte / 24, 'chamadas_por_dia': self.chamadas_por_dia, 'equipes': len(sistema.equipes),
+                           'regioes': len(self.regioes), 'semente': self.semente, 'prazo_resposta_h': self.prazo_resposta,
+                           'retorno_h': self.retorno, 'horas_por_unidade': self.horas_por_unidade, 'voltar_base': self.voltar_base, 'sazonalidade': self.sazonalidade,
+                           'ciclo_diario': self.ciclo_diario, 'inicio': self.inicio.isoformat()},
+            'execucao': {'eventos': self.processados, 'duracao_s': self.duracao,
+                         'eventos_por_s': self.processados / self.duracao if self.duracao else None,
+                         'aceleracao': horizonte * 3600 / self.duracao if self.duracao else None},
+            'chamadas': {'total': self.total_chamadas, 'despachadas': self.despachadas, 'resolvidas': self.resolvidas,
+                         'esperaram_na_fila': self.esperaram},
+            'espera_fila': self._resumo_histograma(self.espera),
+            'resposta': self._resumo_histograma(self.resposta),
+            'por_faixa': {faixa: {'chamadas': chamadas, 'espera_fila': self._resumo_histograma(espera),
+                                  'resposta': self._resumo_histograma(resposta), 'fora_do_prazo': fora}
+                          for faixa, (chamadas, espera, resposta, fora) in self.por_faixa.items()},
+            'fila': {'media': self.area_fila / horizonte if horizonte else 0.0, 'maxima': self.fila_maxima},
+            'equipes': {'utilizacao_media': sum(utilizacao.values()) / len(utilizacao) if utilizacao else None,
+                        'utilizacao_minima': min(utilizacao.values(), default=None),
+                        'utilizacao_maxima': max(utilizacao.values(), default=None),
+                        'por_especializacao': {esp: {'equipes': len(fracoes), 'utilizacao_media': sum(fracoes) / len(fracoes)}
+                                               for esp, fracoes in por_especializacao.items()},
+                        'horas_por_fase': self.horas_fase},
+            'nao_atendidas': {'total': nao_atendidas, 'fracao': nao_atendidas / self.total_chamadas if self.total_chamadas else 0.0,
+                              'respondidas_fora_do_prazo': self.fora_do_prazo, 'pendentes_no_fim': len(pendentes),
+                              'pendentes_fora_do_prazo': pendentes_fora, 'mais_antiga_pendente_h': max(pendentes, default=0.0),
+                              'em_atendimento_no_fim': len(self.ocupada_desde), 'sem_rota': self.sem_rota},
+        }
+
+# Uma rodada por tamanho de frota, todas com a mesma semente (mesmas chamadas até a fila divergir). O mapa
+# sintético da bancada tem pesos em km: sem horas_por_unidade explícito, as equipes andam a 60 km/h nele.
+def simular_frotas(frotas, nos=0, semente=0, horas_por_unidade=None, **parametros):
+    relatorios = []
+    if horas_por_unidade is None:
+        horas_por_unidade = 1 / 60 if nos else HORAS_POR_UNIDADE
+    for equipes in frotas:
+        sistema = None
+        if nos:  # nos=0 mantém o mapa padrão de cinco regiões
+            sistema = SistemaIVERN(SaidaNula())
+            sistema.grafo_regioes = gerar_grafo(nos, semente, saida=sistema.saida)
+        relatorios.append(Simulador(sistema, equipes=equipes, semente=semente, horas_por_unidade=horas_por_unidade, **parametros).executar())
+    return relatorios
+
+def formatar_tabela(relatorios):
+    linhas = [f"{'equipes':>7} {'chamadas':>9} {'espera p50':>11} {'espera p90':>11} {'resposta p90':>13} {'fora prazo':>11} "
+              f"{'pendentes':>9} {'fila média':>10} {'utilização':>10} {'eventos/s':>10}"]
+    for r in relatorios:
+        espera, resposta, nao_atendidas = r['espera_fila'], r['resposta'], r['nao_atendidas']
+        linhas.append(f"{r['parametros']['equipes']:>7} {r['chamadas']['total']:>9} {espera.get('p50_min', 0):>9.1f}m "
+                      f"{espera.get('p90_min', 0):>9.1f}m {resposta.get('p90_min', 0):>11.1f}m {nao_atendidas['fracao']:>10.1%} "
+                      f"{nao_atendidas['pendentes_no_fim']:>9} {r['fila']['media']:>10.1f} {r['equipes']['utilizacao_media'] or 0:>10.1%} "
+                      f"{r['execucao']['eventos_por_s'] or 0:>10.0f}")
+    execucao = relatorios[-1]['execucao'] if relatorios else None
+    if execucao and execucao['aceleracao']:
+        linhas.append(f"\núltima rodada: {execucao['eventos']} eventos em {execucao['duracao_s']:.2f}s "
+                      f"({execucao['aceleracao']:,.0f}× o tempo real)")
+    return "\n".join(linhas)
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Simulação de temporada de incêndios do Sistema IVERN")
+    parser.add_argument('--dias', type=float, default=90, help="duração da temporada simulada")
+    parser.add_argument('--chamadas-por-dia', dest='chamadas_por_dia', type=float, default=10, help="taxa média de referência")
+    parser.add_argument('--equipes', default='12', help="tamanho da frota; vários separados por vírgula comparam frotas")
+    parser.add_argument('--nos', type=int, default=0, help="regiões do mapa sintético (0 = mapa padrão)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--prazo', type=float, default=3.0, help="prazo de resposta em horas (chamada → equipe no local)")
+    parser.add_argument('--horas-por-unidade', dest='horas_por_unidade', type=float,
+                        help=f"deslocamento por unidade de peso do mapa (padrão {HORAS_POR_UNIDADE} no mapa padrão, 1/60 no sintético em km)")
+    parser.add_argument('--retorno', type=float, default=1.0, help="horas de descanso/reabastecimento após cada combate")
+    parser.add_argument('--sem-voltar-base', dest='voltar_base', action='store_false', help="equipes ficam no local atendido")
+    parser.add_argument('--sazonalidade', type=float, default=0.5, help="amplitude da variação ao longo da temporada (0-1)")
+    parser.add_argument('--ciclo-diario', dest='ciclo_diario', type=float, default=0.5, help="amplitude da variação ao longo do dia (0-1)")
+    parser.add_argument('--saida', help="arquivo JSON dos relatórios ('-' = saída padrão)")
+    opcoes = parser.parse_args(argumentos)
+
+    relatorios = simular_frotas([int(n) for n in opcoes.equipes.split(',')], opcoes.nos, opcoes.semente, dias=opcoes.dias,
+                                chamadas_por_dia=opcoes.chamadas_por_dia, horas_por_unidade=opcoes.horas_por_unidade, prazo_resposta=opcoes.prazo, retorno=opcoes.retorno,
+                                voltar_base=opcoes.voltar_base, sazonalidade=opcoes.sazonalidade, ciclo_diario=opcoes.ciclo_diario)
+    texto = json.dumps(relatorios if len(relatorios) > 1 else relatorios[0], ensure_ascii=False, indent=2)
+    if opcoes.saida == '-':
+        print(texto)
+    else:
+        print(formatar_tabela(relatorios), file=sys.stderr)
+        if opcoes.saida:
+            with open(opcoes.saida, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+import main
+from main import AcervoOcorrencias, SaidaNula, SistemaIVERN
+
+REGIOES = ["Mata Atlântica Sul", "Cerrado Central", "Amazônia Norte", "Pantanal", "Caatinga"]
+
+def _resolver(sistema, rng, quantidade):
+    resolvidas = []
+    for _ in range(quantidade):
+        regiao, severidade = rng.choice(REGIOES), rng.randint(1, 10)
+        id_ocorrencia = sistema.inserir_nova_ocorrencia(regiao, severidade, (rng.uniform(-20, -10), rng.uniform(-50, -40)))
+        despachada = rng.random() < 0.5 and sistema.atender_proxima_ocorrencia() == id_ocorrencia
+        sistema.finalizar_ocorrencia(id_ocorrencia)
+        resolvidas.append((regiao, severidade, despachada))
+    return resolvidas
+
+def _esperado(resolvidas):
+    por_regiao = {}
+    for regiao, severidade, _ in resolvidas:
+        por_regiao.setdefault(regiao, []).append(severidade)
+    return {regiao: {'resolvidas': len(s), 'severidade_media': pytest.approx(sum(s) / len(s)),
+                     'severidade_minima': min(s), 'severidade_maxima': max(s)} for regiao, s in por_regiao.items()}
+
+# Blocos pequenos (vários blocos gravados + cauda), com e sem compressão e com e sem NumPy: as consultas
+# conferem com o que foi resolvido, também depois de reabrir o acervo e de truncá-lo
+@pytest.mark.parametrize('comprimir', [False, True])
+@pytest.mark.parametrize('com_numpy', [False, True])
+def test_consultas_conferem_com_as_resolvidas(tmp_path, monkeypatch, comprimir, com_numpy):
+    if com_numpy and main.np is None:
+        pytest.skip("NumPy não instalado")
+    if not com_numpy:
+        monkeypatch.setattr(main, 'np', None)
+    rng = random.Random(14)
+    sistema = SistemaIVERN(SaidaNula())
+    sistema.acervo = AcervoOcorrencias(str(tmp_path), comprimir=comprimir, linhas_por_bloco=7)
+    resolvidas = _resolver(sistema, rng, 60)
+    acervo = sistema.acervo
+    assert len(acervo) == 60 and len(acervo.blocos) == 8
+    assert acervo.resumo_por_regiao() == _esperado(resolvidas)
+    assert sum(quantidade for _, quantidade in acervo.contagem_por_periodo()) == 60
+    assert acervo.tempos_resposta()['amostras'] == sum(despachada for _, _, despachada in resolvidas)
+    assert acervo.tempos_resposta(regiao="Inexistente")['amostras'] == 0
+    acervo.fechar()
+    reaberto = AcervoOcorrencias(str(tmp_path))
+    assert reaberto.resumo_por_regiao() == _esperado(resolvidas)
+    reaberto.truncar(25)
+    assert len(reaberto) == 25 and reaberto.resumo_por_regiao() == _esperado(resolvidas[:25])
+    reaberto.fechar()
+
+def test_acervo_vazio():
+    assert AcervoOcorrencias().resumo_por_regiao() == {}
+    assert AcervoOcorrencias().tempos_resposta()['media'] is None
+
+# A coluna de severidade é uint8: valores fora de 1-10 são recusados antes de chegar ao acervo
+def test_severidade_fora_do_intervalo_e_recusada():
+    sistema = SistemaIVERN(SaidaNula())
+    assert sistema.inserir_nova_ocorrencia("Pantanal", 0, (0, 0)) is None
+    assert sistema.inserir_nova_ocorrencia("Pantanal", 256, (0, 0)) is None
+    assert not sistema.ocorrencias_ativas and len(sistema.acervo) == 0
\ No newline at end of file
@@ -0,0 +1,53 @@
+import random
+
+from main import Equipe, GrafoRegioes, PoolEquipes, SaidaEventos, SaidaNula, SistemaIVERN
+
+# A equipe escolhida está à menor distância pelo mapa entre as livres das especializações pedidas; equipes
+# sem localização ou inalcançáveis só quando nenhuma alcançável está livre
+def test_mais_proxima_confere_com_forca_bruta():
+    rng = random.Random(9)
+    for _ in range(100):
+        grafo, regioes = GrafoRegioes(SaidaNula()), [f"R{i}" for i in range(rng.randint(1, 12))]
+        for regiao in regioes:
+            grafo.adicionar_vertice(regiao)
+        for _ in range(len(regioes)):
+            regiao1, regiao2 = rng.choice(regioes), rng.choice(regioes)
+            if regiao1 != regiao2:
+                grafo.adicionar_aresta(regiao1, regiao2, rng.randint(1, 9))
+        pool, livres = PoolEquipes(), []
+        for id_equipe in range(1, rng.randint(1, 15)):
+            livres.append(Equipe(id_equipe, f"E{id_equipe}", rng.choice(("TERRESTRE", "AEREA", "RESGATE")), rng.choice(regioes + [None])))
+            pool.adicionar(livres[-1])
+        for equipe in rng.sample(livres, len(livres) // 3):
+            pool.remover(equipe)
+            livres.remove(equipe)
+        assert len(pool) == len(livres)
+        for especializacoes in (None, ("AEREA",), ("AEREA", "TERRESTRE")):
+            origem = rng.choice(regioes)
+            candidatas = [e for e in livres if especializacoes is None or e.especializacao in especializacoes]
+            escolhida = pool.mais_proxima(grafo.por_distancia(origem), especializacoes)
+            if not candidatas:
+                assert escolhida is None
+                continue
+            distancia = lambda e: grafo.distancia(origem, e.localizacao_atual) if e.localizacao_atual else float('inf')
+            assert escolhida in candidatas and distancia(escolhida) == min(map(distancia, candidatas))
+
+# Equipes padrão: Alpha (TERRESTRE, Cerrado Central), Beta (AEREA, Amazônia Norte), Gamma (RESGATE, Mata Atlântica Sul)
+def test_despacho_por_especializacao_e_distancia():
+    saida = SaidaEventos()
+    sistema = SistemaIVERN(saida)
+    caatinga = sistema.inserir_nova_ocorrencia("Caatinga", 9, (-9.7, -40.5))
+    assert sistema.atender_proxima_ocorrencia() == caatinga
+    assert sistema.ocorrencias_ativas[caatinga].equipe_responsavel == 1  # Cerrado (14) antes de Amazônia (20)
+    # Gamma está no local, mas severidade 9 exige AEREA ou TERRESTRE: vai a Beta, a 27 de distância
+    mata = sistema.inserir_nova_ocorrencia("Mata Atlântica Sul", 9, (-23.5, -46.6))
+    sistema.atender_proxima_ocorrencia()
+    assert sistema.ocorrencias_ativas[mata].equipe_responsavel == 2
+    # Sem especializada livre, severidade 7 fica com a mais próxima de qualquer especialização
+    pantanal = sistema.inserir_nova_ocorrencia("Pantanal", 7, (-19.9, -56.1))
+    sistema.atender_proxima_ocorrencia()
+    assert sistema.ocorrencias_ativas[pantanal].equipe_responsavel == 3
+    sistema.inserir_nova_ocorrencia("Pantanal", 2, (-19.9, -56.1))
+    assert sistema.atender_proxima_ocorrencia() is None and saida.filtrar('SEM_EQUIPE_DISPONIVEL')
+    sistema.finalizar_ocorrencia(caatinga)
+    assert sistema.equipes[1].disponivel and sistema.equipes[1].localizacao_atual == "Caatinga"
\ No newline at end of file
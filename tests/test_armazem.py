@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+import main
+from main import FAIXAS_SEVERIDADE, ArmazemOcorrencias, Ocorrencia, SaidaNula, SistemaIVERN, faixa_severidade
+
+REGIOES = ["Mata Atlântica Sul", "Cerrado Central", "Amazônia Norte"]
+
+def _varredura(sistema):
+    estatisticas = {}
+    for ocorrencia in sistema.ocorrencias_ativas.values():
+        dados = estatisticas.setdefault(ocorrencia.regiao, {'severidades': [], 'por_faixa': {nome: 0 for _, nome in FAIXAS_SEVERIDADE}})
+        dados['severidades'].append(ocorrencia.severidade)
+        dados['por_faixa'][faixa_severidade(ocorrencia.severidade)] += 1
+    return {regiao: {'ativas': len(d['severidades']), 'severidade_media': sum(d['severidades']) / len(d['severidades']),
+                     'severidade_maxima': max(d['severidades']), 'por_faixa': d['por_faixa']} for regiao, d in estatisticas.items()}
+
+# Estatísticas por região (bincount e laço puro) e as de uma região só conferem com uma varredura das ativas
+@pytest.mark.parametrize('com_numpy', [False, True])
+def test_estatisticas_por_regiao_conferem_com_varredura(monkeypatch, com_numpy):
+    if com_numpy and main.np is None:
+        pytest.skip("NumPy não instalado")
+    if not com_numpy:
+        monkeypatch.setattr(main, 'np', None)
+    rng = random.Random(19)
+    sistema = SistemaIVERN(SaidaNula())
+    for _ in range(300):
+        ids = sorted(sistema.ocorrencias_ativas)
+        if ids and rng.random() < 0.3:
+            sistema.finalizar_ocorrencia(rng.choice(ids))
+        elif ids and rng.random() < 0.2:
+            sistema.atualizar_severidade_ocorrencia(rng.choice(ids), rng.randint(1, 10))
+        else:
+            sistema.inserir_nova_ocorrencia(rng.choice(REGIOES), rng.randint(1, 10), (rng.uniform(-20, -10), rng.uniform(-60, -40)))
+    esperado, estatisticas = _varredura(sistema), sistema.armazem.estatisticas_por_regiao()
+    assert set(estatisticas) == set(esperado)
+    for regiao, dados in esperado.items():
+        for obtido in (estatisticas[regiao], sistema._estatisticas_regiao(regiao)):
+            assert obtido.pop('severidade_media') == pytest.approx(dados['severidade_media'])
+            assert obtido == {chave: valor for chave, valor in dados.items() if chave != 'severidade_media'}
+
+# Slots liberados (finalização) são reaproveitados pelas próximas ocorrências, sem herdar campos antigos
+def test_slots_liberados_sao_reutilizados():
+    sistema = SistemaIVERN(SaidaNula())
+    for i in range(5):
+        sistema.inserir_nova_ocorrencia("Cerrado Central", 3 + i, (-15.0 - i, -47.0), "foco")
+    sistema.atualizar_status_ocorrencia(2, "EM_ATENDIMENTO")
+    sistema.ocorrencias_ativas[2].acoes_realizadas.append("Aceiro")
+    sistema.finalizar_ocorrencia(2)
+    sistema.finalizar_ocorrencia(4)
+    assert len(sistema.armazem) == 3 and len(sistema.armazem.ids) == 5
+    
+    sistema.inserir_nova_ocorrencia("Pantanal Oeste", 9, (-19.5, -56.5))
+    sistema.inserir_nova_ocorrencia("Pantanal Oeste", 1, (-19.6, -56.6))
+    assert len(sistema.armazem) == 5 and len(sistema.armazem.ids) == 5
+    for id_ocorrencia in (6, 7):
+        nova = sistema.ocorrencias_ativas[id_ocorrencia]
+        assert (nova.regiao, nova.status, nova.equipe_responsavel, nova.despachada_em, nova.descricao) == ("Pantanal Oeste", "PENDENTE", None, None, "")
+        assert nova.listar_acoes() == [] and nova.ativa
+    assert sistema.fila_prioridade.espiar().id == 6
+
+# Cada sistema tem o próprio armazém: ocorrências com o mesmo id não se misturam
+def test_sistemas_tem_armazens_separados():
+    primeiro, segundo = SistemaIVERN(SaidaNula()), SistemaIVERN(SaidaNula())
+    assert primeiro.armazem is not segundo.armazem
+    primeiro.inserir_nova_ocorrencia("Amazônia Norte", 8, (-3.1, -60.0))
+    segundo.inserir_nova_ocorrencia("Cerrado Central", 2, (-15.8, -47.9))
+    primeiro.atualizar_severidade_ocorrencia(1, 10)
+    assert (primeiro.ocorrencias_ativas[1].regiao, primeiro.ocorrencias_ativas[1].severidade) == ("Amazônia Norte", 10)
+    assert (segundo.ocorrencias_ativas[1].regiao, segundo.ocorrencias_ativas[1].severidade) == ("Cerrado Central", 2)
+    assert len(primeiro.armazem) == len(segundo.armazem) == 1
+
+# linha/de_linha preservam todos os campos, inclusive coordenadas exatas; a mesclagem desfeita devolve as absorvidas
+def test_linha_e_mesclagem_desfeita_preservam_campos():
+    armazem = ArmazemOcorrencias()
+    original = Ocorrencia(1, "Pantanal Oeste", 7, (-19.123456789, -56.987654321), "relato", None, armazem)
+    original.status, original.equipe_responsavel = "EM_ATENDIMENTO", 4
+    original.despachada_em = original.timestamp
+    original.acoes_realizadas.append("Despachada")
+    copia = Ocorrencia.de_linha(original.linha(), ArmazemOcorrencias())
+    assert copia.linha() == original.linha() and copia.coordenadas == (-19.123456789, -56.987654321)
+    with pytest.raises(ValueError):
+        Ocorrencia(2, "Pantanal Oeste", 256, (0.0, 0.0), armazem=armazem)
+    
+    sistema = SistemaIVERN(SaidaNula())
+    for severidade in (4, 9, 6):
+        sistema.inserir_nova_ocorrencia("Pantanal Oeste", severidade, (-19.5, -56.5), f"relato {severidade}")
+    antes = {i: o.linha() for i, o in sistema.ocorrencias_ativas.items()}
+    assert sistema.mesclar_ocorrencias_duplicadas(0.5) == {2: [1, 3]}
+    assert len(sistema.armazem) == 1 and sistema.ocorrencias_ativas[2].severidade == 9
+    sistema.desfazer_ultima_acao()
+    depois = {i: o.linha() for i, o in sistema.ocorrencias_ativas.items()}
+    assert depois == antes and len(sistema.armazem) == 3
\ No newline at end of file
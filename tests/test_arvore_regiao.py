@@ -0,0 +1,32 @@
+import random
+
+from main import ArvoreRegiao, SaidaBuffer, SistemaIVERN
+
+# Consultas por faixa comparadas com a lista ordenada por (prioridade, região), inclusive faixas acima da
+# maior prioridade e abaixo da menor, com inserções, atualizações e remoções intercaladas
+def test_intervalo_confere_com_referencia_ordenada():
+    rng = random.Random(11)
+    for _ in range(200):
+        arvore, prioridades = ArvoreRegiao(), {}
+        for _ in range(rng.randint(0, 40)):
+            regiao = f"R{rng.randint(0, 25)}"
+            if prioridades and rng.random() < 0.2:
+                removida = rng.choice(sorted(prioridades))
+                arvore.remover(removida)
+                del prioridades[removida]
+            else:
+                prioridades[regiao] = rng.randint(1, 10)
+                arvore.inserir(regiao, prioridades[regiao])
+        referencia = sorted((p, r) for r, p in prioridades.items())
+        for minimo in (None, *range(0, 13)):
+            for maximo in (None, *range(0, 13)):
+                esperado = [r for p, r in referencia if (minimo is None or p >= minimo) and (maximo is None or p <= maximo)]
+                assert [d['regiao'] for d in arvore.intervalo(minimo, maximo)] == esperado
+
+def test_intervalo_acima_da_maior_prioridade():
+    arvore = ArvoreRegiao()
+    arvore.inserir('A', 3)
+    assert list(arvore.intervalo(5)) == []
+    sistema = SistemaIVERN(SaidaBuffer())
+    sistema.listar_regioes_por_prioridade(10, 10)
+    assert not [linha for linha in sistema.saida.linhas if 'Prioridade' in linha]
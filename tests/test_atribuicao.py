@@ -0,0 +1,42 @@
+import itertools
+import random
+
+import pytest
+
+import main
+from main import SaidaNula, SistemaIVERN, atribuicao_otima
+
+def _custo(custos, atribuicao):
+    return sum(custos[i][j] for i, j in enumerate(atribuicao))
+
+# Método húngaro (com e sem NumPy) contra a enumeração de todas as atribuições em matrizes pequenas
+@pytest.mark.parametrize('com_numpy', [False, True])
+def test_atribuicao_otima_confere_com_forca_bruta(monkeypatch, com_numpy):
+    if com_numpy and main.np is None:
+        pytest.skip("NumPy não instalado")
+    if not com_numpy:
+        monkeypatch.setattr(main, 'np', None)
+    rng = random.Random(10)
+    for _ in range(300):
+        n = rng.randint(1, 5)
+        m = rng.randint(n, 6)
+        custos = [[rng.choice((rng.randint(0, 20), rng.uniform(0, 20))) for _ in range(m)] for _ in range(n)]
+        atribuicao = atribuicao_otima(custos)
+        assert len(set(atribuicao)) == n and all(0 <= j < m for j in atribuicao)
+        otimo = min(_custo(custos, p) for p in itertools.permutations(range(m), n))
+        assert _custo(custos, atribuicao) == pytest.approx(otimo)
+    assert atribuicao_otima([]) == []
+    with pytest.raises(ValueError):
+        atribuicao_otima([[1], [2]])
+
+# Atender uma a uma manda Alpha (a mais próxima) para a Caatinga e deixa o Pantanal com Beta, do outro lado
+# do mapa (14 + 23); o lote troca as duas e percorre menos no total (20 + 8)
+def test_lote_minimiza_a_distancia_total():
+    sistema = SistemaIVERN(SaidaNula())
+    caatinga = sistema.inserir_nova_ocorrencia("Caatinga", 9, (-9.7, -40.5))
+    pantanal = sistema.inserir_nova_ocorrencia("Pantanal", 8, (-19.9, -56.1))
+    pares = dict(sistema.atender_em_lote(limite=2))
+    assert pares == {caatinga: 2, pantanal: 1}
+    assert not sistema.fila_prioridade and not sistema.equipes[1].disponivel
+    assert sistema.desfazer_ultima_acao()
+    assert len(sistema.fila_prioridade) == 2 and sistema.equipes[1].disponivel and sistema.equipes[2].disponivel
\ No newline at end of file
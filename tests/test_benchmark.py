@@ -0,0 +1,43 @@
+import copy
+import random
+
+import pytest
+
+from benchmark import ConjuntoSorteavel, comparar, executar_bancada, gerar_grafo, percentil
+
+# A mesma semente reproduz a carga: mesmas contagens por operação e mesmo estado final do sistema
+def test_carga_reprodutivel_pela_semente():
+    parametros = dict(incidentes=300, nos=30, equipes=8, operacoes=800, semente=3)
+    primeiro, segundo = executar_bancada('minimo', **parametros), executar_bancada('minimo', **parametros)
+    contagens = lambda relatorio: {op: dados['quantidade'] for op, dados in relatorio['operacoes'].items()}
+    assert contagens(primeiro) == contagens(segundo) and primeiro['estado_final'] == segundo['estado_final']
+    assert sum(contagens(primeiro).values()) == primeiro['total']['operacoes'] <= 800
+    assert primeiro['estado_final']['resolvidas'] > 0
+    outra = executar_bancada('minimo', **dict(parametros, semente=4))
+    assert outra['estado_final'] != primeiro['estado_final'] or contagens(outra) != contagens(primeiro)
+
+def test_comparar_aponta_regressoes():
+    referencia = executar_bancada('minimo', incidentes=100, nos=10, equipes=5, operacoes=300, mistura={'inserir': 1, 'atender': 1})
+    assert comparar(referencia, referencia) == ([], [])
+    lenta = copy.deepcopy(referencia)
+    lenta['operacoes']['inserir']['vazao_por_s'] *= 0.5
+    lenta['operacoes']['inserir']['p50_us'] *= 2
+    regressoes, avisos = comparar(lenta, referencia)
+    assert len(regressoes) == 2 and all(r.startswith("inserir") for r in regressoes) and not avisos
+    with pytest.raises(ValueError):
+        executar_bancada('minimo', mistura={'dormir': 1})
+
+def test_mapa_sintetico_conexo():
+    grafo = gerar_grafo(50, semente=1)
+    assert len(grafo) == 50 and len(grafo.coordenadas) == 50
+    assert all(d < float('inf') for _, d in grafo.por_distancia("R000000")) and len(list(grafo.por_distancia("R000000"))) == 50
+
+def test_conjunto_sorteavel_e_percentil():
+    rng, conjunto = random.Random(15), ConjuntoSorteavel()
+    for item in range(10):
+        conjunto.adicionar(item)
+    for item in (3, 9, 0, 3):
+        conjunto.remover(item)
+    assert sorted(conjunto.itens) == [1, 2, 4, 5, 6, 7, 8] and all(conjunto.itens[p] == i for i, p in conjunto.posicoes.items())
+    assert {conjunto.sortear(rng) for _ in range(200)} == set(conjunto.itens)
+    assert [percentil(list(range(1, 101)), p) for p in (50, 90, 99.9)] == [50, 90, 100]
\ No newline at end of file
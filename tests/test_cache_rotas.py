@@ -0,0 +1,54 @@
+import random
+
+from main import GrafoRegioes, SaidaNula
+
+def _floyd(regioes, arestas):
+    infinito = float('inf')
+    dist = {(a, b): 0 if a == b else infinito for a in regioes for b in regioes}
+    for regiao1, regiao2, peso in arestas:
+        dist[regiao1, regiao2] = dist[regiao2, regiao1] = peso
+    for k in regioes:
+        for a in regioes:
+            for b in regioes:
+                if dist[a, k] + dist[k, b] < dist[a, b]:
+                    dist[a, b] = dist[a, k] + dist[k, b]
+    return dist
+
+# Consultas em qualquer ordem (árvore da origem, do destino ou nenhuma em cache) e uma aresta nova no meio:
+# distâncias e caminhos conferem com Floyd-Warshall, sem árvores antigas sobrevivendo à mudança do mapa
+def test_distancias_com_cache_conferem_com_floyd():
+    rng = random.Random(5)
+    for _ in range(40):
+        regioes = [f"R{i}" for i in range(rng.randint(2, 15))]
+        grafo, arestas = GrafoRegioes(SaidaNula(), capacidade_cache=3), []
+        for regiao in regioes:
+            grafo.adicionar_vertice(regiao)
+        for fase in range(2):
+            for _ in range(rng.randint(1, 2 * len(regioes))):
+                regiao1, regiao2 = rng.sample(regioes, 2)
+                if any({regiao1, regiao2} == {a, b} for a, b, _ in arestas):
+                    continue
+                arestas.append((regiao1, regiao2, rng.randint(1, 50)))
+                grafo.adicionar_aresta(*arestas[-1])
+            dist = _floyd(regioes, arestas)
+            pesos = {(a, b): p for a, b, p in arestas} | {(b, a): p for a, b, p in arestas}
+            for _ in range(20):
+                origem, destino = rng.choice(regioes), rng.choice(regioes)
+                caminho, distancia = grafo.dijkstra(origem, destino)
+                assert distancia == dist[origem, destino] == grafo.distancia(origem, destino)
+                if caminho:
+                    assert (caminho[0], caminho[-1]) == (origem, destino)
+                    assert sum(pesos[trecho] for trecho in zip(caminho, caminho[1:])) == distancia
+            assert len(grafo.cache_arvores) <= 3
+            matriz = grafo.matriz_distancias()
+            assert all(matriz[a].get(b, float('inf')) == dist[a, b] for a in regioes for b in regioes)
+
+def test_cache_e_invalidado_ao_mudar_o_mapa():
+    grafo = GrafoRegioes(SaidaNula())
+    grafo.adicionar_aresta("A", "B", 10)
+    grafo.adicionar_aresta("B", "C", 10)
+    assert grafo.distancia("A", "C") == 20 and grafo.cache_arvores
+    grafo.adicionar_aresta("A", "C", 5)
+    assert not grafo.cache_arvores and grafo.dijkstra("C", "A") == (["C", "A"], 5)
+    grafo.adicionar_vertice("D")
+    assert grafo.distancia("A", "D") == float('inf') and grafo.dijkstra("A", "Z") == (None, float('inf'))
\ No newline at end of file
@@ -0,0 +1,31 @@
+import random
+
+from main import HeapIndexado
+
+class _Item:
+    def __init__(self, id_item, prioridade):
+        self.id, self.prioridade = id_item, prioridade
+
+# Inserções, remoções arbitrárias e mudanças de prioridade intercaladas: a ordem de extração confere com a
+# ordenação de referência por (prioridade, id)
+def test_extracao_confere_com_referencia_ordenada():
+    rng = random.Random(1)
+    for _ in range(200):
+        heap, itens = HeapIndexado(lambda item: (item.prioridade, item.id)), {}
+        for id_item in range(rng.randint(0, 60)):
+            operacao = rng.random()
+            if itens and operacao < 0.2:
+                removido = rng.choice(sorted(itens))
+                assert heap.remover(removido) is itens.pop(removido)
+            elif itens and operacao < 0.4:
+                alterado = itens[rng.choice(sorted(itens))]
+                alterado.prioridade = rng.randint(0, 20)
+                assert heap.atualizar(alterado.id)
+            else:
+                itens[id_item] = _Item(id_item, rng.randint(0, 20))
+                heap.inserir(itens[id_item])
+        assert len(heap) == len(itens) and all(id_item in heap for id_item in itens)
+        esperado = sorted(itens.values(), key=lambda item: (item.prioridade, item.id))
+        assert heap.espiar() is (esperado[0] if esperado else None)
+        assert [heap.extrair() for _ in range(len(itens))] == esperado
+        assert heap.extrair() is None and heap.remover(0) is None and not heap.atualizar(0)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import io
+import random
+
+import pytest
+
+from main import GrafoCompacto, GrafoRegioes, SaidaNula
+
+def _grafo_aleatorio(rng, n):
+    grafo = GrafoRegioes(SaidaNula())
+    for i in range(n):  # Nomes com acentos: a busca binária do arquivo ordena pelos bytes em UTF-8
+        grafo.adicionar_vertice(f"Região {i} {'ãéç'[i % 3]}", (rng.uniform(-30, 0), rng.uniform(-70, -40)) if rng.random() < 0.7 else None)
+    nomes = list(grafo.vertices)
+    for _ in range(2 * n):
+        regiao1, regiao2 = rng.sample(nomes, 2)
+        grafo.adicionar_aresta(regiao1, regiao2, rng.randint(1, 3000))
+    return grafo, nomes
+
+# O CSR em memória e o reaberto via mmap respondem igual ao grafo em dicionário (rotas, vizinhos, coordenadas)
+def test_compacto_e_mapeado_conferem_com_dicionario(tmp_path):
+    rng = random.Random(7)
+    for rodada in range(10):
+        grafo, nomes = _grafo_aleatorio(rng, rng.randint(2, 40))
+        compacto = GrafoCompacto.de_grafo(grafo)
+        compacto.salvar(tmp_path / f"mapa{rodada}.ivg")
+        mapeado = GrafoCompacto.abrir(tmp_path / f"mapa{rodada}.ivg", saida=SaidaNula())
+        for g in (compacto, mapeado):
+            assert len(g) == len(grafo) and g.total_conexoes() == grafo.total_conexoes()
+            assert dict(g.coordenadas) == grafo.coordenadas
+            assert all(g.vertices[nome] == grafo.vertices[nome] for nome in nomes)
+            for _ in range(10):
+                origem, destino = rng.choice(nomes), rng.choice(nomes)
+                esperado = grafo.dijkstra(origem, destino)[1]
+                for metodo in ('dijkstra', 'a_estrela', 'bidirecional'):
+                    assert g.rota(origem, destino, metodo)[1] == esperado
+            assert g.distancia(nomes[0], "inexistente") == float('inf')
+
+def test_de_csv_com_coordenadas():
+    arestas = io.StringIO("origem,destino,peso\nA,B,4\nB,C,2.5\n\nA,C,9\n")
+    grafo = GrafoCompacto.de_csv(arestas, {'A': (-15.0, -47.0)}, saida=SaidaNula())
+    assert grafo.dijkstra('A', 'C') == (['A', 'B', 'C'], 6.5)
+    assert dict(grafo.coordenadas) == {'A': (-15.0, -47.0)} and grafo.vertices['B'] == {'A': 4.0, 'C': 2.5}
+
+def test_arquivo_invalido(tmp_path):
+    (tmp_path / "mapa.ivg").write_bytes(b"XXXX" + bytes(64))
+    with pytest.raises(ValueError):
+        GrafoCompacto.abrir(tmp_path / "mapa.ivg")
\ No newline at end of file
@@ -0,0 +1,37 @@
+import datetime
+
+import pytest
+
+from main import HistoricoAcoes
+
+INICIO = datetime.datetime(2025, 8, 1, 12, 0)
+
+def _preencher(historico, quantidade):
+    for i in range(quantidade):
+        historico.registrar(f"ação {i} – ✓", INICIO + datetime.timedelta(minutes=i))
+
+# Buffer de 4 posições: os registros mais antigos vão para o segmento em disco e continuam visíveis na
+# listagem, na paginação e na consulta por período, sempre do mais recente para o mais antigo
+def test_historico_despeja_no_disco_sem_perder_registros():
+    historico = HistoricoAcoes(7, capacidade=4)
+    _preencher(historico, 11)
+    assert len(historico) == 11 and historico.em_memoria <= 4
+    assert [r['acao'] for r in historico.listar()] == [f"ação {i} – ✓" for i in range(10, -1, -1)]
+    assert [r['acao'] for r in historico.pagina(2, 3)] == [f"ação {i} – ✓" for i in (7, 6, 5)]
+    periodo = list(historico.no_periodo(INICIO + datetime.timedelta(minutes=3), INICIO + datetime.timedelta(minutes=6)))
+    assert [r['timestamp'] for r in periodo] == [INICIO + datetime.timedelta(minutes=i) for i in (6, 5, 4, 3)]
+    assert all(r['equipe_id'] == 7 for r in periodo)
+
+def test_historico_sobrevive_a_reabertura(tmp_path):
+    historico = HistoricoAcoes(3, capacidade=4, diretorio=str(tmp_path))
+    _preencher(historico, 10)
+    esperado = historico.listar()
+    historico.fechar()
+    reaberto = HistoricoAcoes(3, capacidade=4, diretorio=str(tmp_path))
+    assert reaberto.listar() == esperado
+    reaberto.registrar("nova", INICIO + datetime.timedelta(hours=1))
+    assert len(reaberto) == 11 and reaberto.pagina(1, 2)[1] == esperado[0]
+
+def test_capacidade_invalida():
+    with pytest.raises(ValueError):
+        HistoricoAcoes(1, capacidade=0)
\ No newline at end of file
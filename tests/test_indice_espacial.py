@@ -0,0 +1,47 @@
+import random
+
+from main import IndiceEspacial, SaidaNula, SistemaIVERN, distancia_haversine
+
+def _pontos(rng, n):
+    return {i: (rng.uniform(-18, -12), rng.uniform(-50, -44)) for i in range(n)}
+
+# Raio, k mais próximos e agrupamento comparados com a varredura de todos os pontos, com remoções e
+# reinserções no meio (células vazias, limites da grade que só crescem)
+def test_consultas_conferem_com_forca_bruta():
+    rng = random.Random(4)
+    for _ in range(30):
+        indice, pontos = IndiceEspacial(tamanho_celula=rng.choice((0.05, 0.1, 0.5))), _pontos(rng, rng.randint(0, 150))
+        for id_item, coordenadas in pontos.items():
+            indice.inserir(id_item, coordenadas)
+        for id_item in rng.sample(sorted(pontos), len(pontos) // 4):
+            assert indice.remover(id_item)
+            del pontos[id_item]
+        movido = next(iter(pontos), None)
+        if movido is not None:
+            pontos[movido] = (-15.0, -47.0)
+            indice.inserir(movido, pontos[movido])
+        assert len(indice) == len(pontos) and not indice.remover(-1)
+        for _ in range(10):
+            centro, raio = (rng.uniform(-19, -11), rng.uniform(-51, -43)), rng.choice((0.5, 5, 30, 200, 1000))
+            distancias = sorted((distancia_haversine(centro, c), i) for i, c in pontos.items())
+            assert [i for _, i in indice.no_raio(centro, raio)] == [i for d, i in distancias if d <= raio]
+            k = rng.randint(1, 8)
+            assert [round(d, 9) for d, _ in indice.mais_proximos(centro, k)] == [round(d, 9) for d, _ in distancias[:k]]
+
+def test_agrupar_forma_componentes_conexas():
+    indice = IndiceEspacial()
+    for id_item, coordenadas in {1: (-15.0, -47.0), 2: (-15.005, -47.0), 3: (-15.01, -47.0), 4: (-16.0, -47.0), 5: (-16.0, -47.003)}.items():
+        indice.inserir(id_item, coordenadas)
+    assert sorted(indice.agrupar(0.6)) == [[1, 2, 3], [4, 5]]
+    assert indice.agrupar(0.1) == []
+
+def test_mesclar_duplicadas_e_desfazer():
+    sistema = SistemaIVERN(SaidaNula())
+    for severidade, coordenadas in ((3, (-15.0, -47.0)), (8, (-15.002, -47.0)), (5, (-15.0, -47.002)), (9, (-10.0, -40.0))):
+        sistema.inserir_nova_ocorrencia("Cerrado Central", severidade, coordenadas)
+    assert sistema.mesclar_ocorrencias_duplicadas(1.0) == {2: [1, 3]}
+    assert sorted(sistema.ocorrencias_ativas) == [2, 4] and len(sistema.fila_prioridade) == 2
+    assert [o.id for o in sistema.buscar_ocorrencias_no_raio((-15.0, -47.0), 1.0)] == [2]
+    assert sistema.desfazer_ultima_acao()
+    assert sorted(sistema.ocorrencias_ativas) == [1, 2, 3, 4]
+    assert sorted(o.id for o in sistema.buscar_ocorrencias_no_raio((-15.0, -47.0), 1.0)) == [1, 2, 3]
\ No newline at end of file
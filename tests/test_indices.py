@@ -0,0 +1,41 @@
+import random
+
+from main import FAIXAS_SEVERIDADE, SaidaNula, SistemaIVERN, faixa_severidade
+
+REGIOES = ["Mata Atlântica Sul", "Cerrado Central", "Amazônia Norte", "Pantanal Oeste"]
+
+def _conferir(sistema):
+    ativas = sistema.ocorrencias_ativas
+    for regiao in REGIOES:
+        esperadas = sorted(i for i, o in ativas.items() if o.regiao == regiao)
+        assert sorted(o.id for o in sistema.buscar_ocorrencias_por_regiao(regiao)) == esperadas
+        agregado = sistema.indices.agregados.get(regiao, {'ativas': 0, 'total_severidade': 0})
+        assert (agregado['ativas'], agregado['total_severidade']) == (len(esperadas), sum(ativas[i].severidade for i in esperadas))
+    for status in ("PENDENTE", "EM_ATENDIMENTO"):
+        assert sorted(o.id for o in sistema.buscar_ocorrencias_por_status(status)) == sorted(i for i, o in ativas.items() if o.status == status)
+    for _, faixa in FAIXAS_SEVERIDADE:
+        assert sorted(o.id for o in sistema.buscar_ocorrencias_por_severidade(faixa)) == \
+               sorted(i for i, o in ativas.items() if faixa_severidade(o.severidade) == faixa)
+
+# Índices e agregados mantidos a cada operação (inclusive lote, mesclagem e desfazer) conferem com uma
+# varredura das ocorrências ativas
+def test_indices_acompanham_as_operacoes():
+    rng = random.Random(8)
+    sistema = SistemaIVERN(SaidaNula())
+    for _ in range(400):
+        operacao, ids = rng.random(), sorted(sistema.ocorrencias_ativas)
+        if not ids or operacao < 0.3:
+            sistema.inserir_nova_ocorrencia(rng.choice(REGIOES), rng.randint(1, 10), (rng.uniform(-20, -19.9), rng.uniform(-50, -49.9)))
+        elif operacao < 0.35:
+            sistema.inserir_ocorrencias_em_lote([(rng.choice(REGIOES), rng.randint(1, 10), (-19.95, -49.95)) for _ in range(5)], silencioso=True)
+        elif operacao < 0.5:
+            sistema.atualizar_status_ocorrencia(rng.choice(ids), rng.choice(("PENDENTE", "EM_ATENDIMENTO")))
+        elif operacao < 0.65:
+            sistema.atualizar_severidade_ocorrencia(rng.choice(ids), rng.randint(1, 10))
+        elif operacao < 0.75:
+            sistema.finalizar_ocorrencia(rng.choice(ids))
+        elif operacao < 0.78:
+            sistema.mesclar_ocorrencias_duplicadas(0.5)
+        else:
+            sistema.desfazer_ultima_acao()
+        _conferir(sistema)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import io
+import random
+
+from main import SistemaIVERN
+
+def test_lote_rejeita_registros_invalidos():
+    sistema = SistemaIVERN()
+    resumo = sistema.inserir_ocorrencias_em_lote([
+        ("A", 5, (1, 2)),
+        {"regiao": "B", "severidade": "9", "latitude": "3", "longitude": "4", "descricao": "fumaça"},
+        ("C", 7.9, (0, 0)),  # int(7.9) truncaria para 7
+        ("D", 11, (0, 0)),
+        ("E",),
+        {"regiao": "F"},
+    ], silencioso=True)
+    assert (resumo['inseridas'], resumo['rejeitadas'], resumo['ids']) == (2, 4, (1, 2))
+    assert resumo['por_regiao'] == {"A": 1, "B": 1}
+    assert [linha for linha, _ in resumo['erros']] == [3, 4, 5, 6]
+    assert sorted(sistema.ocorrencias_ativas) == [1, 2]
+
+def test_lote_csv_e_ndjson():
+    sistema = SistemaIVERN()
+    csv = io.StringIO("regiao,severidade,latitude,longitude,descricao\nA,3,-10.5,-50.25,foco\nB,x,0,0,\n")
+    assert sistema.inserir_ocorrencias_em_lote(csv, silencioso=True)['inseridas'] == 1
+    ndjson = io.StringIO('{"regiao": "C", "severidade": 8, "coordenadas": [1, 2]}\n\n{"regiao": "D", "severidade": 2, "coordenadas": [3, 4]}\n')
+    assert sistema.inserir_ocorrencias_em_lote(ndjson, silencioso=True)['ids'] == (2, 3)
+
+# O heapify do lote deixa a fila na mesma ordem que inserções uma a uma: severidade decrescente, depois chegada
+def test_lote_ordena_como_insercoes_individuais():
+    rng = random.Random(2)
+    registros = [(f"R{rng.randint(0, 5)}", rng.randint(1, 10), (rng.uniform(-30, 0), rng.uniform(-70, -40))) for _ in range(300)]
+    em_lote, uma_a_uma = SistemaIVERN(), SistemaIVERN()
+    em_lote.inserir_ocorrencias_em_lote(registros[:100], silencioso=True)
+    em_lote.inserir_ocorrencias_em_lote(registros[100:], silencioso=True)
+    for regiao, severidade, coordenadas in registros:
+        uma_a_uma.inserir_nova_ocorrencia(regiao, severidade, coordenadas)
+    esperado = sorted(range(1, 301), key=lambda id_ocorrencia: (-registros[id_ocorrencia - 1][1], id_ocorrencia))
+    for sistema in (em_lote, uma_a_uma):
+        assert [sistema.fila_prioridade.extrair().id for _ in range(300)] == esperado
+
+def test_desfazer_remove_o_lote_inteiro():
+    sistema = SistemaIVERN()
+    sistema.inserir_nova_ocorrencia("A", 4, (0, 0))
+    sistema.inserir_ocorrencias_em_lote([("B", 6, (1, 1)), ("C", 9, (2, 2))], silencioso=True)
+    assert sistema.desfazer_ultima_acao()
+    assert sorted(sistema.ocorrencias_ativas) == [1] and len(sistema.fila_prioridade) == 1
\ No newline at end of file
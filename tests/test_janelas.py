@@ -0,0 +1,75 @@
+import datetime
+import random
+
+import pytest
+
+from main import EPOCA, MICROSSEGUNDO, JanelasDeslizantes, SaidaNula, SistemaIVERN
+
+INICIO = datetime.datetime(2025, 3, 1, 8, 0)
+
+# Contagens e somas por janela conferem com os eventos cujo balde está entre os `baldes` mais recentes, inclusive
+# depois de retirar eventos (quantidade negativa, como no desfazer)
+def test_janelas_conferem_com_eventos_nos_baldes():
+    rng = random.Random(20)
+    janelas = JanelasDeslizantes((datetime.timedelta(minutes=10), datetime.timedelta(hours=1)), baldes=10)
+    assert janelas.rotulos == ["10min", "1h"]
+    eventos, instante = [], INICIO
+    for _ in range(600):
+        instante += datetime.timedelta(seconds=rng.randint(0, 90))
+        if eventos and rng.random() < 0.15:
+            evento = eventos.pop(rng.randrange(len(eventos)))
+            janelas.registrar(*evento, quantidade=-1)
+        else:
+            evento = (rng.choice(JanelasDeslizantes.EVENTOS), rng.choice(("Pantanal", "Caatinga")), instante, float(rng.randint(1, 60)))
+            janelas.registrar(*evento)
+            eventos.append(evento)
+        if rng.random() < 0.1:
+            agora = instante + datetime.timedelta(seconds=rng.randint(0, 900))
+            for regiao in ("Pantanal", "Caatinga", None):
+                resumo = janelas.resumo(regiao, agora)
+                for janela, largura, rotulo in zip(janelas.janelas, janelas.larguras, janelas.rotulos):
+                    atual = ((agora - EPOCA) // MICROSSEGUNDO) // largura
+                    dentro = [e for e in eventos if regiao in (None, e[1]) and atual - 10 < ((e[2] - EPOCA) // MICROSSEGUNDO) // largura <= atual]
+                    novas = sum(e[0] == 'novas' for e in dentro)
+                    assert resumo[rotulo]['novas'] == novas
+                    assert resumo[rotulo]['novas_por_hora'] == pytest.approx(novas / (janela / datetime.timedelta(hours=1)))
+                    for evento, chave in (('despachos', 'tempo_medio_despacho_min'), ('resolucoes', 'tempo_medio_resolucao_min')):
+                        valores = [e[3] for e in dentro if e[0] == evento]
+                        assert resumo[rotulo][evento] == len(valores)
+                        assert resumo[rotulo][chave] == (pytest.approx(sum(valores) / len(valores)) if valores else None)
+    
+    copia = JanelasDeslizantes((datetime.timedelta(minutes=10), datetime.timedelta(hours=1)), baldes=10)
+    assert copia.restaurar(janelas.estado()) and copia.resumo(None, instante) == janelas.resumo(None, instante)
+    assert not JanelasDeslizantes().restaurar(janelas.estado())
+    janelas.podar(instante + datetime.timedelta(hours=2))
+    assert len(janelas) == 0
+
+# O sistema alimenta as janelas (inserção, finalização, desfazer) e um surto na janela curta eleva a prioridade da
+# região na árvore sem mudar o risco configurado; passado o surto, a região volta ao risco original
+def test_sistema_registra_eventos_e_reavalia_prioridades():
+    sistema = SistemaIVERN(SaidaNula())
+    for hora in range(24, 0, -1):
+        sistema._instante_fixo = INICIO - datetime.timedelta(hours=hora)
+        sistema.inserir_nova_ocorrencia("Pantanal", 5, (-19.5, -56.5))
+    sistema._instante_fixo = INICIO
+    for _ in range(8):
+        sistema.inserir_nova_ocorrencia("Pantanal", 5, (-19.5, -56.5))
+    sistema.inserir_nova_ocorrencia("Caatinga", 6, (-8.0, -40.0))
+    sistema.inserir_nova_ocorrencia("Caatinga", 6, (-8.1, -40.1))
+    sistema.desfazer_ultima_acao()
+    
+    sistema._instante_fixo = INICIO + datetime.timedelta(minutes=5)
+    recentes = sistema.relatorio_atividade_recente()
+    assert recentes["Pantanal"]["15min"]["novas"] == 8 and recentes["Caatinga"]["1h"]["novas"] == 1
+    assert sistema.reavaliar_prioridades() == {"Pantanal": 10}
+    assert sistema.arvore_regioes.prioridade("Pantanal") == 10 and sistema.regioes_risco["Pantanal"] == 7
+    assert sistema.reavaliar_prioridades() == {}
+    
+    sistema._instante_fixo = INICIO + datetime.timedelta(minutes=30)
+    id_caatinga = next(o.id for o in sistema.ocorrencias_ativas.values() if o.regiao == "Caatinga")
+    sistema.finalizar_ocorrencia(id_caatinga)
+    caatinga = sistema.relatorio_atividade_recente("Caatinga")["Caatinga"]
+    assert caatinga["15min"]["resolucoes"] == 1 and caatinga["15min"]["tempo_medio_resolucao_min"] == pytest.approx(30.0)
+    
+    sistema._instante_fixo = INICIO + datetime.timedelta(hours=2)
+    assert sistema.reavaliar_prioridades() == {"Pantanal": 7}
\ No newline at end of file
@@ -0,0 +1,54 @@
+import json
+import math
+import random
+
+from main import HistogramaLatencia, Metricas, SaidaNula, SistemaIVERN
+
+# Percentis do histograma contra o posto exato: nunca abaixo do valor real, com erro relativo de até 1/2**BITS
+# (exatos abaixo de 2 * SUBFAIXAS) e sem passar do máximo observado
+def test_percentis_do_histograma():
+    rng = random.Random(16)
+    for _ in range(50):
+        valores = [int(rng.lognormvariate(rng.uniform(0, 14), 2)) for _ in range(rng.randint(1, 2000))]
+        histograma = HistogramaLatencia()
+        for valor in valores:
+            histograma.registrar(valor)
+        ordenados = sorted(valores)
+        assert (len(histograma), histograma.minimo, histograma.maximo, histograma.soma) == (len(valores), ordenados[0], ordenados[-1], sum(valores))
+        for p, estimado in histograma.percentis((0.1, 50, 90, 99, 99.9, 100)).items():
+            exato = ordenados[max(1, math.ceil(p / 100 * len(ordenados))) - 1]
+            assert exato <= estimado <= min(ordenados[-1], exato + exato / HistogramaLatencia.SUBFAIXAS)
+            if exato < 2 * HistogramaLatencia.SUBFAIXAS:
+                assert estimado == exato
+    assert HistogramaLatencia().percentis((50,)) == {50: None}
+
+def test_instrumentacao_do_sistema_e_exportacao(tmp_path):
+    sistema = SistemaIVERN(SaidaNula())
+    metricas = sistema.ativar_metricas()
+    for regiao in ("Pantanal", "Caatinga", "Cerrado Central"):
+        sistema.inserir_nova_ocorrencia(regiao, 5, (0, 0))
+    for _ in range(4):
+        sistema.atender_proxima_ocorrencia()
+    sistema.calcular_rota_otima("Pantanal", "Caatinga", "a_estrela")
+    instantaneo = metricas.instantaneo()
+    assert instantaneo['contadores']['ocorrencias_inseridas'] == 3
+    assert (instantaneo['contadores']['despachos'], instantaneo['contadores']['despachos_falhos']) == (3, 1)
+    assert instantaneo['latencias']['atender_proxima_ocorrencia']['quantidade'] == 4
+    assert instantaneo['medidores']['fila_prioridade'] == 0 and instantaneo['medidores']['equipes_disponiveis'] == 0
+
+    texto = open(sistema.exportar_metricas(str(tmp_path / "ivern.prom")), encoding='utf-8').read()
+    assert 'ivern_operacao_duracao_segundos_count{operacao="inserir_nova_ocorrencia"} 3' in texto
+    assert "ivern_despachos_total 3" in texto.splitlines()
+    assert json.load(open(sistema.exportar_metricas(str(tmp_path / "ivern.json")), encoding='utf-8'))['contadores']['despachos'] == 3
+
+    sistema.desativar_metricas()
+    assert 'atender_proxima_ocorrencia' not in vars(sistema) and 'dijkstra' not in vars(sistema.grafo_regioes)
+    sistema.inserir_nova_ocorrencia("Pantanal", 5, (0, 0))
+    assert metricas.contadores['ocorrencias_inseridas'] == 3 and sistema.exportar_metricas(str(tmp_path / "x.prom")) is None
+
+def test_amostragem_respeita_o_intervalo():
+    metricas, leituras = Metricas(intervalo_amostragem=3600), iter(range(100))
+    metricas.observar('fila', lambda: next(leituras))
+    for _ in range(5):
+        metricas.amostrar()
+    assert [amostra['fila'] for amostra in metricas.instantaneo()['serie']] == [0]
\ No newline at end of file
@@ -0,0 +1,82 @@
+import itertools
+import random
+
+import pytest
+
+from main import HORAS_POR_UNIDADE, SaidaNula, SistemaIVERN, otimizar_percurso
+
+def _custo(distancias, pesos, ordem, peso_severidade, prazos, multa_atraso=1000.0):
+    fator, tempo, latencia, atraso, anterior = peso_severidade / (sum(pesos[1:]) or 1), 0.0, 0.0, 0.0, 0
+    for parada in ordem:
+        tempo += distancias[anterior][parada]
+        latencia += pesos[parada] * tempo
+        if parada in prazos:
+            atraso += max(0.0, tempo * HORAS_POR_UNIDADE - prazos[parada])
+        anterior = parada
+    return tempo + fator * latencia + multa_atraso * atraso
+
+def _instancia(rng, n):
+    pontos = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(n + 1)]
+    distancias = [[((p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2) ** 0.5 for q in pontos] for p in pontos]
+    return distancias, [0] + [rng.randint(1, 30) for _ in range(n)]
+
+# O custo devolvido (avaliado em O(1) pelas somas prefixadas) confere com o da ordem recalculada do zero, e em
+# instâncias pequenas fica perto do ótimo da enumeração de todas as ordens (em geral igual a ele)
+def test_percurso_confere_com_forca_bruta():
+    rng, otimos = random.Random(21), 0
+    for _ in range(200):
+        n = rng.randint(1, 6)
+        distancias, pesos = _instancia(rng, n)
+        peso_severidade = rng.choice((0.0, 1.0, 5.0))
+        prazos = {k: rng.uniform(5, 60) for k in range(1, n + 1) if rng.random() < 0.3}
+        ordem, custo, _ = otimizar_percurso(distancias, pesos, peso_severidade, prazos, limite_tempo=5)
+        assert sorted(ordem) == list(range(1, n + 1))
+        assert custo == pytest.approx(_custo(distancias, pesos, ordem, peso_severidade, prazos))
+        otimo = min(_custo(distancias, pesos, p, peso_severidade, prazos) for p in itertools.permutations(range(1, n + 1)))
+        assert custo <= otimo * 1.1 + 1e-9
+        otimos += custo <= otimo + 1e-9
+    assert otimos >= 190
+    assert otimizar_percurso([[0]], [0]) == ([], 0.0, 0)
+
+# Com todas as paradas entre os vizinhos candidatos, o resultado é um ótimo local: nenhuma inversão de trecho
+# (2-opt) nem mudança de posição de uma parada reduz o custo
+def test_percurso_e_otimo_local():
+    rng = random.Random(5)
+    for _ in range(100):
+        n = rng.randint(2, 9)
+        distancias, pesos = _instancia(rng, n)
+        ordem, custo, _ = otimizar_percurso(distancias, pesos, limite_tempo=5)
+        for i, j in itertools.product(range(n), repeat=2):
+            realocada = ordem[:i] + ordem[i + 1:]
+            realocada.insert(j, ordem[i])
+            assert _custo(distancias, pesos, realocada, 1.0, {}) >= custo - 1e-9
+            if i < j:
+                assert _custo(distancias, pesos, ordem[:i] + ordem[i:j + 1][::-1] + ordem[j + 1:], 1.0, {}) >= custo - 1e-9
+
+# planejar_percurso visita as regiões com ocorrências alcançáveis a partir da base; chegadas e caminhos conferem
+# com as distâncias do grafo, e regiões fora do mapa são listadas à parte
+def test_planejar_percurso_no_mapa_padrao():
+    sistema = SistemaIVERN(SaidaNula())
+    for regiao, severidade in [("Pantanal", 9), ("Caatinga", 4), ("Amazônia Norte", 7), ("Mata Atlântica Sul", 2),
+                               ("Cerrado Central", 5), ("Ilha", 8)]:
+        sistema.inserir_nova_ocorrencia(regiao, severidade, (-10.0, -50.0))
+    grafo = sistema.grafo_regioes
+    regioes = ["Cerrado Central", "Pantanal", "Caatinga", "Amazônia Norte", "Mata Atlântica Sul", "Ilha"]
+    matriz = grafo.matriz_entre(regioes)
+    for (i, a), (j, b) in itertools.product(enumerate(regioes), repeat=2):
+        assert matriz[i][j] == (0 if a == b and a in grafo else grafo.dijkstra_bidirecional(a, b)[1])
+    
+    resultado = sistema.planejar_percurso("Cerrado Central")
+    visitas = resultado['ordem']
+    assert sorted(v['regiao'] for v in visitas) == ["Amazônia Norte", "Caatinga", "Mata Atlântica Sul", "Pantanal"]
+    assert resultado['inalcancaveis'] == ["Ilha"]
+    anterior, total = "Cerrado Central", 0.0
+    for visita in visitas:
+        total += grafo.dijkstra_bidirecional(anterior, visita['regiao'])[1]
+        assert visita['chegada_distancia'] == pytest.approx(total)
+        assert (visita['caminho'][0], visita['caminho'][-1]) == (anterior, visita['regiao'])
+        anterior = visita['regiao']
+    assert resultado['distancia_total'] == pytest.approx(total)
+    assert resultado['horas_total'] == pytest.approx(total * HORAS_POR_UNIDADE)
+    assert sorted(v['regiao'] for v in resultado['plano_por_score']['ordem']) == sorted(v['regiao'] for v in visitas)
+    assert sistema.planejar_percurso("Atlântida") is None
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+
+from main import DiarioOperacoes, HeapIndexado, SaidaNula, SistemaIVERN
+
+def _estado(sistema):
+    return {
+        'ocorrencias': {i: (o.regiao, o.severidade, o.status, o.equipe_responsavel) for i, o in sistema.ocorrencias_ativas.items()},
+        'fila': [o.id for o in sorted(sistema.fila_prioridade, key=lambda o: o.chave_prioridade())],
+        'equipes': {i: (e.disponivel, e.localizacao_atual) for i, e in sistema.equipes.items()},
+        'proximos': (sistema.proximo_id_ocorrencia, sistema.proximo_id_equipe),
+        'desfazer': len(sistema.pilha_desfazer),
+    }
+
+def _operar(sistema, rodada):
+    coordenadas = (-15.8 - rodada / 1000, -47.9)
+    sistema.inserir_nova_ocorrencia("Cerrado Central", 7, coordenadas)
+    sistema.inserir_nova_ocorrencia("Cerrado Central", 3, coordenadas)  # Duplicata para a mesclagem
+    sistema.inserir_ocorrencias_em_lote([("Pantanal", 9, (-19.9, -56.1)), ("Caatinga", 4, (-9.7, -40.5), "ç ✓")], silencioso=True)
+    sistema.mesclar_ocorrencias_duplicadas(0.5)
+    sistema.atender_proxima_ocorrencia()
+    id_ocorrencia = max(sistema.ocorrencias_ativas)
+    sistema.atualizar_severidade_ocorrencia(id_ocorrencia, 10)
+    sistema.atualizar_status_ocorrencia(id_ocorrencia, "EM_ATENDIMENTO")
+    sistema.desfazer_ultima_acao()
+    sistema.atender_em_lote(limite=2)
+    if em_atendimento := sistema.buscar_ocorrencias_por_status("EM_ATENDIMENTO"):
+        sistema.finalizar_ocorrencia(em_atendimento[0].id)
+    sistema.adicionar_equipe(f"Equipe {rodada}", "TERRESTRE", "Pantanal")
+
+def _abrir(diretorio):
+    return SistemaIVERN(SaidaNula(), diretorio_dados=diretorio)
+
+# Queda sem fechar (o que foi sincronizado sobrevive), snapshot no meio do diário e reabertura sucessiva
+def test_recuperacao_reconstroi_o_estado(tmp_path):
+    diretorio = str(tmp_path)
+    sistema = _abrir(diretorio)
+    for rodada in range(3):
+        _operar(sistema, rodada)
+    sistema.gravar_snapshot()
+    for rodada in range(3, 5):
+        _operar(sistema, rodada)
+    sistema.diario.sincronizar()
+    esperado = _estado(sistema)
+    recuperado = _abrir(diretorio)
+    assert _estado(recuperado) == esperado
+    _operar(recuperado, 5)
+    esperado = _estado(recuperado)
+    recuperado.fechar()
+    assert _estado(_abrir(diretorio)) == esperado
+
+# Última linha cortada no meio da escrita: é descartada e as operações seguintes continuam o diário
+def test_linha_incompleta_no_fim_do_diario(tmp_path):
+    diretorio = str(tmp_path)
+    sistema = _abrir(diretorio)
+    _operar(sistema, 0)
+    esperado = _estado(sistema)
+    sistema.fechar()
+    with open(os.path.join(diretorio, 'operacoes.log'), 'ab') as arquivo:
+        arquivo.write(b'[999,"I",0,"Pantan')
+    recuperado = _abrir(diretorio)
+    assert _estado(recuperado) == esperado
+    recuperado.inserir_nova_ocorrencia("Pantanal", 5, (-19.9, -56.1))
+    esperado = _estado(recuperado)
+    recuperado.fechar()
+    assert _estado(_abrir(diretorio)) == esperado
+
+# Snapshots automáticos a cada N operações mantêm o diário curto
+def test_snapshot_automatico(tmp_path):
+    sistema = SistemaIVERN(SaidaNula(), diretorio_dados=DiarioOperacoes(str(tmp_path), snapshot_a_cada=10))
+    for rodada in range(4):
+        _operar(sistema, rodada)
+    esperado = _estado(sistema)
+    sistema.fechar()
+    assert os.path.exists(tmp_path / 'snapshot.json')
+    with open(tmp_path / 'operacoes.log', 'rb') as arquivo:
+        assert len(arquivo.readlines()) < 10
+    assert _estado(_abrir(str(tmp_path))) == esperado
+
+# Modo adiado da fila (refazer do diário): operações sem reordenar e um único heapify no fim
+def test_fila_adiada_reordena_no_fim():
+    class Item:
+        def __init__(self, id_item, prioridade): self.id, self.prioridade = id_item, prioridade
+    fila = HeapIndexado(lambda item: (item.prioridade, item.id))
+    fila.inserir_lote([Item(i, (7 * i) % 11) for i in range(20)])
+    fila.adiar()
+    fila.inserir(Item(20, 3))
+    fila.inserir_lote([Item(i, i % 4) for i in range(21, 30)])
+    fila.remover(5), fila.remover(0)
+    fila.itens[fila.posicoes[7]].prioridade = -1
+    fila.atualizar(7)
+    fila.reordenar()
+    esperado = sorted(fila.itens, key=lambda item: (item.prioridade, item.id))
+    assert [fila.extrair() for _ in range(len(esperado))] == esperado and esperado[0].id == 7
\ No newline at end of file
@@ -0,0 +1,46 @@
+import random
+
+from main import GrafoRegioes, SaidaNula, SistemaIVERN
+
+def _sistema(rng, n=40):
+    sistema = SistemaIVERN(SaidaNula())
+    grafo = sistema.grafo_regioes = GrafoRegioes(SaidaNula())
+    regioes = [f"R{i}" for i in range(n)]
+    for i in range(1, n):  # Árvore aleatória (conexa) mais alguns atalhos e uma região isolada
+        grafo.adicionar_aresta(regioes[i], regioes[rng.randrange(i)], rng.randint(1, 20))
+    for _ in range(n // 2):
+        grafo.adicionar_aresta(*rng.sample(regioes, 2), rng.randint(1, 20))
+    grafo.adicionar_vertice("Ilha")
+    for _ in range(60):
+        sistema.inserir_nova_ocorrencia(rng.choice(regioes + ["Ilha"]), rng.randint(1, 10), (0, 0))
+    return sistema, regioes
+
+def _sem_caminhos(plano):
+    return dict(plano, bases={base: [{k: v for k, v in rota.items() if k != 'caminho'} for rota in rotas] for base, rotas in plano['bases'].items()})
+
+# O pool de processos (mapa salvo em .ivg e reaberto via mmap, caminhos em ids) devolve o mesmo plano que a
+# execução sequencial, e cada rota confere com a distância mínima do grafo (entre caminhos de mesmo
+# comprimento, cada execução pode devolver um diferente)
+def test_processos_e_sequencial_conferem():
+    rng = random.Random(18)
+    sistema, regioes = _sistema(rng)
+    bases = rng.sample(regioes, 6) + ["Fora do mapa"]
+    sequencial = sistema.planejar_multiplas_bases(bases, caminhos=True, processos=1)
+    paralelo = sistema.planejar_multiplas_bases(bases, caminhos=True, processos=2, limite_sequencial=0)
+    assert _sem_caminhos(paralelo) == _sem_caminhos(sequencial) and len(sequencial['bases']) == 6
+    grafo, agregados = sistema.grafo_regioes, sistema.indices.agregados
+    for plano in (sequencial, paralelo):
+        for base, rotas in plano['bases'].items():
+            assert {r['regiao'] for r in rotas} == set(agregados) - {base, "Ilha"}
+            assert [r['score'] for r in rotas] == sorted((r['score'] for r in rotas), reverse=True)
+            for rota in rotas:
+                caminho = rota['caminho']
+                assert rota['distancia'] == grafo.distancia(base, rota['regiao'])
+                assert (caminho[0], caminho[-1]) == (base, rota['regiao'])
+                assert sum(grafo.vertices[a][b] for a, b in zip(caminho, caminho[1:])) == rota['distancia']
+    for regiao, melhor in sequencial['melhor_base_por_regiao'].items():
+        assert melhor['distancia'] == min(grafo.distancia(base, regiao) for base in sequencial['bases'] if base != regiao)
+
+def test_sem_bases_no_mapa():
+    sistema, _ = _sistema(random.Random(1), 5)
+    assert sistema.planejar_multiplas_bases(["Fora do mapa"]) is None
\ No newline at end of file
@@ -0,0 +1,48 @@
+import random
+
+from main import GrafoRegioes, SaidaNula
+
+def _grafo(arestas, coordenadas):
+    grafo = GrafoRegioes(SaidaNula())
+    for regiao, coords in coordenadas.items():
+        grafo.adicionar_vertice(regiao, coords)
+    for regiao1, regiao2, peso in arestas:
+        grafo.adicionar_aresta(regiao1, regiao2, peso)
+    return grafo
+
+# Vértices sem coordenadas (B, W) no caminho mínimo: com a razão peso/km das outras arestas, a heurística
+# superestimaria a distância restante a partir de V e o A* devolveria S-W-C (103)
+def test_a_estrela_com_coordenadas_parciais():
+    grafo = _grafo([('S', 'V', 100), ('V', 'B', 1), ('B', 'C', 1), ('S', 'W', 51), ('W', 'C', 52)],
+                   {'S': (0, 0), 'V': (0, 0.5), 'C': (0, 1)})
+    for metodo in ('dijkstra', 'a_estrela', 'bidirecional'):
+        caminho, distancia, _ = grafo.rota('S', 'C', metodo)
+        assert (caminho, distancia) == (['S', 'V', 'B', 'C'], 102), metodo
+
+def test_metodos_concordam_em_grafos_aleatorios():
+    rng = random.Random(6)
+    for _ in range(100):
+        n = rng.randint(2, 25)
+        coordenadas = {f"R{i}": (rng.uniform(-30, 0), rng.uniform(-70, -40)) if rng.random() < 0.8 else None for i in range(n)}
+        arestas = [(f"R{rng.randrange(n)}", f"R{rng.randrange(n)}", rng.randint(1, 2000)) for _ in range(rng.randint(1, 3 * n))]
+        arestas = [a for a in arestas if a[0] != a[1]]
+        grafo, pesos = _grafo(arestas, coordenadas), {}
+        for regiao1, regiao2, peso in arestas:  # A última aresta entre duas regiões substitui as anteriores
+            pesos[regiao1, regiao2] = pesos[regiao2, regiao1] = peso
+        for _ in range(5):
+            origem, destino = f"R{rng.randrange(n)}", f"R{rng.randrange(n)}"
+            esperado = grafo.dijkstra(origem, destino)[1]
+            for metodo in ('dijkstra', 'a_estrela', 'bidirecional'):
+                caminho, distancia, _ = grafo.rota(origem, destino, metodo)
+                assert distancia == esperado, (metodo, origem, destino)
+                if caminho:
+                    assert sum(pesos[trecho] for trecho in zip(caminho, caminho[1:])) == distancia
+
+# A contagem do Dijkstra vem da busca ponto a ponto: a mesma com ou sem árvore em cache, e menor que o total
+# de vértices quando o destino está perto da origem
+def test_expansoes_do_dijkstra_sao_medidas():
+    grafo = _grafo([(f"R{i}", f"R{i + 1}", 1) for i in range(50)], {})
+    _, _, sem_cache = grafo.rota('R0', 'R3', 'dijkstra')
+    grafo.arvore_caminhos('R0')
+    _, _, com_cache = grafo.rota('R0', 'R3', 'dijkstra')
+    assert sem_cache == com_cache == 4
@@ -0,0 +1,27 @@
+from main import SaidaBuffer, SaidaEventos, SaidaNula, SistemaIVERN
+
+def test_eventos_tipados_carregam_os_dados():
+    recebidos = []
+    saida = SaidaEventos(ao_emitir=recebidos.append)
+    sistema = SistemaIVERN(saida)
+    id_ocorrencia = sistema.inserir_nova_ocorrencia("Cerrado Central", 7, (-15.0, -47.0))
+    sistema.finalizar_ocorrencia(999)
+    [inserida] = saida.filtrar('OCORRENCIA_INSERIDA')
+    assert inserida.dados['ocorrencia'].id == id_ocorrencia
+    assert saida.filtrar('OCORRENCIA_NAO_ENCONTRADA')[0].dados == {'id_ocorrencia': 999}
+    assert recebidos == list(saida.eventos)
+
+def test_buffer_formata_e_respeita_o_limite():
+    saida = SaidaBuffer(limite=2)
+    sistema = SistemaIVERN(saida)
+    sistema.atender_proxima_ocorrencia()
+    for id_ocorrencia in (7, 8):
+        sistema.finalizar_ocorrencia(id_ocorrencia)
+    assert saida.texto() == "❌ Ocorrência 7 não encontrada\n❌ Ocorrência 8 não encontrada"
+
+# A saída nula não chega a formatar a mensagem (nem a chamar mensagens preguiçosas)
+def test_saida_nula_nao_formata():
+    chamadas = []
+    SaidaNula().emitir('X', lambda: chamadas.append(1) or "texto", valor=1)
+    assert chamadas == []
+    assert SaidaNula.formatar("{a}-{b}", {'a': 1, 'b': 2}) == "1-2"
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+from main import SaidaEventos, SaidaNula, SistemaIVERN
+from servidor import ServidorIVERN
+
+def _rodar(cenario):
+    async def principal():
+        servidor = await ServidorIVERN(SistemaIVERN(SaidaEventos(limite=1)), porta=0).iniciar()
+        try:
+            return await cenario(servidor)
+        finally:
+            await servidor.parar()
+    return asyncio.run(principal())
+
+async def _ndjson(servidor, mensagens):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', servidor.porta)
+    escritor.write(b"".join(m if isinstance(m, bytes) else json.dumps(m).encode('utf-8') + b"\n" for m in mensagens))
+    escritor.write_eof()
+    respostas = [json.loads(linha) for linha in (await leitor.read()).splitlines()]
+    escritor.close()
+    return respostas
+
+async def _http(servidor, pedido):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', servidor.porta)
+    escritor.write(pedido)
+    escritor.write_eof()
+    cabecalho, _, corpo = (await leitor.read()).partition(b"\r\n\r\n")
+    escritor.close()
+    return cabecalho.split(b"\r\n")[0].decode(), corpo.decode('utf-8')
+
+# Consultas atrás de escritas da mesma conexão enxergam essas escritas; mensagens inválidas são recusadas
+# uma a uma, sem derrubar a conexão
+def test_conexao_le_o_que_escreveu():
+    relato = {"regiao": "Pantanal", "severidade": 9, "latitude": -19.9, "longitude": -56.1, "descricao": "ç"}
+    respostas = _rodar(lambda servidor: _ndjson(servidor, [
+        dict(relato, ref=1), {"op": "ocorrencia", "id": 1, "ref": 2}, {"op": "atender", "ref": 3}, {"op": "resumo", "ref": 4},
+        dict(relato, severidade=7.9, ref=5), dict(relato, latitude=95, ref=6), b"{nao e json\n", {"op": "voar", "ref": 7},
+        {"op": "finalizar", "id": 42, "ref": 8},
+    ]))
+    por_ref = {resposta.get('ref'): resposta for resposta in respostas}
+    assert por_ref[1] == {'ref': 1, 'ok': True, 'id': 1}
+    assert por_ref[2]['ok'] and por_ref[2]['resultado']['descricao'] == "ç"
+    por_status = por_ref[4]['resultado']['por_status']
+    assert por_ref[3]['ok'] and por_status.get('EM_ATENDIMENTO') == 1 and not por_status.get('PENDENTE')
+    assert not any(por_ref[ref]['ok'] for ref in (5, 6, 7, 8)) and por_ref[8]['erro'] == 'OCORRENCIA_NAO_ENCONTRADA'
+    # Recusas na validação saem na hora; as mensagens enfileiradas são respondidas na ordem de chegada
+    assert len(respostas) == 9 and [r.get('ref') for r in respostas if r.get('ref') in (1, 2, 3, 4, 8)] == [1, 2, 3, 4, 8]
+
+def test_http():
+    async def cenario(servidor):
+        corpo = b'{"regiao": "Caatinga", "severidade": 4, "latitude": -9.7, "longitude": -40.5}\n{"op": "ocorrencia", "id": 1}\n'
+        post = await _http(servidor, b"POST /ocorrencias HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(corpo) + corpo)
+        return (post, await _http(servidor, b"GET /ocorrencias/1 HTTP/1.1\r\n\r\n"), await _http(servidor, b"GET /ocorrencias/9 HTTP/1.1\r\n\r\n"),
+                await _http(servidor, b"POST /ocorrencias HTTP/1.1\r\nContent-Length: abc\r\n\r\n"), await _http(servidor, b"GET /nada HTTP/1.1\r\n\r\n"))
+    post, encontrada, ausente, invalido, rota = _rodar(cenario)
+    assert post[0] == "HTTP/1.1 200 OK" and [json.loads(l)['ok'] for l in post[1].splitlines()] == [True, True]
+    assert encontrada[0] == "HTTP/1.1 200 OK" and json.loads(encontrada[1])['resultado']['regiao'] == "Caatinga"
+    assert ausente[0] == "HTTP/1.1 404 Not Found" and rota[0] == "HTTP/1.1 404 Not Found"
+    assert invalido[0] == "HTTP/1.1 400 Bad Request"
+
+def test_primeiros_da_fila_sem_alterar_o_heap():
+    sistema = SistemaIVERN(SaidaNula())
+    for i in range(40):
+        sistema.inserir_nova_ocorrencia("Pantanal", i * 7 % 10 + 1, (0, 0))
+    ordem = [o.id for o in sorted(sistema.fila_prioridade, key=lambda o: o.chave_prioridade())]
+    assert [o.id for o in ServidorIVERN._primeiros_da_fila(sistema.fila_prioridade, 12)] == ordem[:12]
+    assert len(sistema.fila_prioridade) == 40
\ No newline at end of file
@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+
+from main import RelogioVirtual, SaidaEventos, SaidaNula, SistemaIVERN
+from simulacao import Simulador, simular_frotas
+
+def _sem_execucao(relatorio):
+    return {chave: valor for chave, valor in relatorio.items() if chave != 'execucao'}
+
+# Mesma semente, mesma temporada; as contagens do relatório fecham entre si
+def test_simulacao_reproduzivel_e_consistente():
+    parametros = dict(dias=20, chamadas_por_dia=15, equipes=4, semente=3)
+    relatorio = Simulador(**parametros).executar()
+    assert _sem_execucao(relatorio) == _sem_execucao(Simulador(**parametros).executar())
+    chamadas, nao_atendidas = relatorio['chamadas'], relatorio['nao_atendidas']
+    assert chamadas['total'] > 200 and relatorio['parametros']['equipes'] == 4
+    assert chamadas['resolvidas'] <= chamadas['despachadas'] <= chamadas['total']
+    assert nao_atendidas['pendentes_no_fim'] == chamadas['total'] - chamadas['despachadas']
+    assert relatorio['espera_fila']['quantidade'] == relatorio['resposta']['quantidade'] == chamadas['despachadas']
+    assert sum(dados['chamadas'] for dados in relatorio['por_faixa'].values()) == chamadas['total']
+    assert 0 <= relatorio['equipes']['utilizacao_minima'] <= relatorio['equipes']['utilizacao_maxima'] <= 1
+    assert relatorio['espera_fila']['p50_min'] <= relatorio['espera_fila']['p99_min'] <= relatorio['espera_fila']['max_min'] + 1e-9
+
+# Com a mesma semente, uma frota maior não deixa as chamadas esperarem mais na fila
+def test_frota_maior_reduz_espera():
+    pequena, grande = simular_frotas([2, 12], dias=15, chamadas_por_dia=20, semente=1)
+    assert pequena['chamadas']['total'] > 0
+    assert grande['espera_fila']['media_min'] <= pequena['espera_fila']['media_min']
+    assert grande['nao_atendidas']['total'] <= pequena['nao_atendidas']['total']
+
+# O relógio virtual só avança; as ocorrências e os despachos usam o "agora" dele
+def test_relogio_virtual_conduz_o_sistema():
+    relogio = RelogioVirtual(datetime.datetime(2025, 8, 1, 6, 0))
+    sistema = SistemaIVERN(SaidaNula(), relogio=relogio)
+    id_ocorrencia = sistema.inserir_nova_ocorrencia("Cerrado Central", 8, (-15.8, -47.9))
+    relogio.avancar(datetime.timedelta(minutes=45))
+    sistema.atender_proxima_ocorrencia()
+    ocorrencia = sistema.ocorrencias_ativas[id_ocorrencia]
+    assert ocorrencia.timestamp == datetime.datetime(2025, 8, 1, 6, 0)
+    assert ocorrencia.despachada_em == datetime.datetime(2025, 8, 1, 6, 45)
+    with pytest.raises(ValueError):
+        relogio.ajustar(datetime.datetime(2025, 8, 1, 6, 0))
+
+# Equipe em atendimento não pode ser liberada por alterar_equipe; depois de finalizada ou desfeita a ocorrência, pode
+def test_alterar_equipe_recusa_equipe_em_atendimento():
+    saida = SaidaEventos()
+    sistema = SistemaIVERN(saida)
+    sistema.inserir_nova_ocorrencia("Pantanal", 7, (-19.5, -56.5))
+    id_ocorrencia = sistema.atender_proxima_ocorrencia()
+    id_equipe = sistema.ocorrencias_ativas[id_ocorrencia].equipe_responsavel
+    assert sistema.alterar_equipe(id_equipe, disponivel=True) is False
+    assert saida.filtrar('EQUIPE_EM_ATENDIMENTO')[0].dados['id_ocorrencia'] == id_ocorrencia
+    assert sistema.alterar_equipe(id_equipe, localizacao="Caatinga")  # Só mover não libera a equipe
+    sistema.desfazer_ultima_acao()
+    assert sistema.alterar_equipe(id_equipe, disponivel=False) and sistema.alterar_equipe(id_equipe, disponivel=True)
+    
+    sistema.inserir_nova_ocorrencia("Pantanal", 9, (-19.5, -56.5))
+    id_ocorrencia = sistema.atender_proxima_ocorrencia()
+    id_equipe = sistema.ocorrencias_ativas[id_ocorrencia].equipe_responsavel
+    sistema.finalizar_ocorrencia(id_ocorrencia)
+    assert sistema.alterar_equipe(id_equipe, disponivel=False) and sistema.alterar_equipe(id_equipe, disponivel=True, localizacao="Pantanal")
+    assert len(saida.filtrar('EQUIPE_EM_ATENDIMENTO')) == 1
+
+# por_distancia entrega as regiões em ordem de distância à medida que a busca avança; só a expansão completa
+# entra no cache de árvores
+def test_por_distancia_expande_sob_demanda():
+    grafo = SistemaIVERN(SaidaNula()).grafo_regioes
+    grafo.cache_arvores.clear()
+    parcial = grafo.por_distancia("Cerrado Central")
+    assert next(parcial) == ("Cerrado Central", 0)
+    parcial.close()
+    assert not grafo.cache_arvores
+    ordem = list(grafo.por_distancia("Cerrado Central"))
+    assert [d for _, d in ordem] == sorted(d for _, d in ordem)
+    assert {regiao: d for regiao, d in ordem} == {regiao: grafo.distancia("Cerrado Central", regiao) for regiao in grafo.vertices}
+    assert len(grafo.cache_arvores) == 1 and list(grafo.por_distancia("Cerrado Central")) == ordem
+    assert list(grafo.por_distancia("Atlântida")) == []
\ No newline at end of file